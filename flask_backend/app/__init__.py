@@ -1,15 +1,27 @@
 from flask import Flask
-from .db import db,migrate
+from .db import db, init_foreign_keys
 from .config import Config
 from app.model import User, Player, Game, GamePlayer
 from flask_bcrypt import Bcrypt 
-from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from datetime import timedelta
-from app.routes import user_bp,game_bp,move_bp,house_bp
+from app.routes import user_bp,game_bp,move_bp,house_bp,ai_bp,jobs_bp,admin_bp,leaderboard_bp,board_bp
+from app.jobs import job_queue, WorkerPool
+from app.jobs.cli import jobs_cli
+from app.cli import archive_cli, data_cli, db_cli, shards_cli, startup_profile, stats_cli, sweep_cli
+from app.metrics import metrics_bp
+from app.profiling import init_profiling
+from app.compression import init_compression
+from app.replica import init_replica
+from app.shards import router as shard_router
+from app.game import instrumentation
+from app.invalidation import bus
+from app.admission import admission
+from app.idempotency import idempotency
+from app.jwt_cache import CachingJWTManager
 import os
 
-jwt = JWTManager()
+jwt = CachingJWTManager()
 cors = CORS()
 bcrypt = Bcrypt()
 
@@ -20,7 +32,6 @@ def create_app():
 
     # Initialize the database
     db.init_app(app)
-    migrate.init_app(app, db)
     jwt.init_app(app)
     cors.init_app(app)
     bcrypt.init_app(app)
@@ -33,5 +44,42 @@ def create_app():
     app.register_blueprint(game_bp,url_prefix="/game")
     app.register_blueprint(move_bp,url_prefix="/game")
     app.register_blueprint(house_bp,url_prefix="/game")
+    app.register_blueprint(ai_bp,url_prefix="/ai")
+    app.register_blueprint(jobs_bp,url_prefix="/jobs")
+    app.register_blueprint(admin_bp,url_prefix="/admin")
+    app.register_blueprint(leaderboard_bp,url_prefix="/leaderboard")
+    app.register_blueprint(board_bp,url_prefix="/board")
+    app.register_blueprint(metrics_bp)
+
+    # Before anything opens a connection, so every pooled one has the pragma
+    init_foreign_keys(app)
+    shard_router.init_app(app)
+    init_replica(app)
+    init_profiling(app)
+    init_compression(app)
+    instrumentation.configure(
+        app.config['ENGINE_INSTRUMENTATION'],
+        app.config['ENGINE_INSTRUMENTATION_SAMPLE'],
+    )
+
+    # Optional subsystems: imported only when switched on
+    if app.config['SOCIAL_AUTH_ENABLED']:
+        from app.routes.auth_social import auth_social_bp
+        app.register_blueprint(auth_social_bp)
+
+    job_queue.init_app(app)
+    bus.init_app(app)
+    admission.init_app(app)
+    idempotency.init_app(app)
+    app.cli.add_command(db_cli)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(startup_profile)
+    app.cli.add_command(archive_cli)
+    app.cli.add_command(data_cli)
+    app.cli.add_command(sweep_cli)
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(shards_cli)
+    if app.config['JOB_WORKERS'] > 0:
+        WorkerPool(app, job_queue, app.config['JOB_WORKERS']).start()
     
     return app
@@ -0,0 +1,189 @@
+"""
+Admission control for mutating game routes
+Token buckets keyed by JWT identity and by game id cap how fast one client
+or one game can push load→mutate→commit cycles. On top of that a per-game
+gate bounds how many requests for the same game run at once: extra ones
+wait up to ADMISSION_QUEUE_MS for a slot instead of piling onto the same
+row. Rejections are 429 with Retry-After.
+Buckets live in this process, or in a SQLite file shared by all workers
+(ADMISSION_BACKEND=sqlite). The per-game gate is always per process.
+"""
+import functools
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, jsonify
+from flask_jwt_extended import get_jwt_identity
+
+from app.metrics import metrics
+
+rejected_total = metrics.counter(
+    'admission_rejected_total', "Requests rejected by admission control", ('reason',))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def _refill(tokens, updated_at, now, rate, burst):
+    return min(burst, tokens + (now - updated_at) * rate)
+
+
+def _take(tokens, rate):
+    """(allowed, tokens left, seconds until one token is available)"""
+    if tokens >= 1:
+        return True, tokens - 1, 0.0
+    return False, tokens, (1 - tokens) / rate
+
+
+class LocalBuckets:
+    """Token buckets in a bounded LRU (idle keys fall out; a fresh bucket is full)"""
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, rate, burst):
+        """Returns (allowed, retry_after_seconds)"""
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated_at = self.buckets.get(key, (burst, now))
+            tokens = _refill(tokens, updated_at, now, rate, burst)
+            allowed, tokens, wait = _take(tokens, rate)
+            self.buckets[key] = (tokens, now)
+            self.buckets.move_to_end(key)
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return allowed, wait
+
+
+class SQLiteBuckets:
+    """Token buckets in a SQLite file, so every worker on the host shares them"""
+
+    def __init__(self, path):
+        self.path = path
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def take(self, key, rate, burst):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens = _refill(*row, now, rate, burst) if row else burst
+            allowed, tokens, wait = _take(tokens, rate)
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                (key, tokens, now),
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return allowed, wait
+
+
+class GameGate:
+    """At most `limit` requests per game inside the route at once, in this process"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.lock = threading.Lock()
+        # game id -> [semaphore, users]; entries go away when unused
+        self.gates = {}
+
+    def acquire(self, game_id, timeout):
+        with self.lock:
+            gate = self.gates.setdefault(game_id, [threading.BoundedSemaphore(self.limit), 0])
+            gate[1] += 1
+        if gate[0].acquire(timeout=timeout):
+            return True
+        self._leave(game_id, gate)
+        return False
+
+    def release(self, game_id):
+        with self.lock:
+            gate = self.gates[game_id]
+        gate[0].release()
+        self._leave(game_id, gate)
+
+    def _leave(self, game_id, gate):
+        with self.lock:
+            gate[1] -= 1
+            if gate[1] == 0:
+                del self.gates[game_id]
+
+
+class Admission:
+    """Initialised like the other extensions; `admitted` reads it from current_app"""
+
+    def __init__(self):
+        self.buckets = None
+        self.gate = None
+
+    def init_app(self, app):
+        config = app.config
+        if config['ADMISSION_BACKEND'] == 'sqlite':
+            self.buckets = SQLiteBuckets(config['ADMISSION_URL'])
+        else:
+            self.buckets = LocalBuckets()
+        self.gate = GameGate(config['ADMISSION_GAME_IN_FLIGHT'])
+        app.extensions['admission'] = self
+
+
+admission = Admission()
+
+
+def _too_many(reason, retry_after):
+    rejected_total(reason)
+    response = jsonify({'error': 'Too many requests', 'reason': reason})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def admitted(fn):
+    """
+    Admission control for a mutating route with a `game_id` argument
+    Goes below @jwt_required() so the identity is known.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        config = current_app.config
+        if not config['ADMISSION_ENABLED']:
+            return fn(*args, **kwargs)
+
+        game_id = kwargs.get('game_id')
+        allowed, wait = admission.buckets.take(
+            f'user:{get_jwt_identity()}', config['ADMISSION_USER_RATE'], config['ADMISSION_USER_BURST'])
+        if not allowed:
+            return _too_many('user_rate', wait)
+        if game_id is None:
+            return fn(*args, **kwargs)
+
+        allowed, wait = admission.buckets.take(
+            f'game:{game_id}', config['ADMISSION_GAME_RATE'], config['ADMISSION_GAME_BURST'])
+        if not allowed:
+            return _too_many('game_rate', wait)
+
+        if not admission.gate.acquire(game_id, config['ADMISSION_QUEUE_MS'] / 1000):
+            return _too_many('game_busy', config['ADMISSION_QUEUE_MS'] / 1000)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            admission.gate.release(game_id)
+    return wrapper
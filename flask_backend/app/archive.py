@@ -0,0 +1,126 @@
+"""
+Game archive
+Finished games and games nobody has played for a while are moved from the
+`game` table into `game_archive` (compressed state, no join rows) in bounded
+batches, so the hot table only grows with active play. An archived game is
+moved back the first time it is loaded again. Game and player ids are
+AUTOINCREMENT on SQLite, so an archived id is never handed to a new row.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+
+from app.db import db
+from app.model import Game, GameArchive, Player
+
+PLAYER_COLUMNS = ('id', 'name', 'color', 'position', 'money', 'properties', 'is_computer')
+
+
+def _player_row(player):
+    row = {column: getattr(player, column) for column in PLAYER_COLUMNS}
+    row['created_at'] = player.created_at.isoformat() if player.created_at else None
+    return row
+
+
+def _player_from_row(row):
+    created_at = row.get('created_at')
+    return Player(
+        **{column: row.get(column) for column in PLAYER_COLUMNS},
+        created_at=datetime.fromisoformat(created_at) if created_at else None,
+    )
+
+
+def archive_game(game, reason):
+    """Moves one game (and players no other game uses) into game_archive; caller commits"""
+    players = list(game.players)
+    unshared = [p for p in players if len(p.games) == 1]
+    db.session.add(GameArchive(
+        id=game.id,
+        state=game.state,
+        players=[_player_row(p) for p in players],
+        status=game.status,
+        reason=reason,
+        owner_id=game.owner_id,
+        created_at=game.created_at,
+        updated_at=game.updated_at,
+    ))
+    # Deleting the game also deletes its game_player rows
+    db.session.delete(game)
+    for player in unshared:
+        db.session.delete(player)
+
+
+def archive_batch(batch_size, finished_after, idle_after, now=None):
+    """
+    Archives up to `batch_size` games: finished ones not updated for
+    `finished_after` and any game not updated for `idle_after` (timedeltas)
+    Returns: {'finished': n, 'idle': n}
+    """
+    now = now or datetime.utcnow()
+    finished_cutoff = now - finished_after
+    idle_cutoff = now - idle_after
+
+    games = (
+        Game.query
+        .filter(or_(
+            and_(Game.status == 'finished', Game.updated_at < finished_cutoff),
+            Game.updated_at < idle_cutoff,
+        ))
+        .order_by(Game.id)
+        .limit(batch_size)
+        .all()
+    )
+
+    counts = {'finished': 0, 'idle': 0}
+    for game in games:
+        reason = 'finished' if game.status == 'finished' else 'idle'
+        archive_game(game, reason)
+        counts[reason] += 1
+    db.session.commit()
+    return counts
+
+
+def archive_settings(config):
+    """archive_batch arguments from the app config"""
+    return {
+        'batch_size': config['ARCHIVE_BATCH_SIZE'],
+        'finished_after': timedelta(hours=config['ARCHIVE_FINISHED_HOURS']),
+        'idle_after': timedelta(days=config['ARCHIVE_IDLE_DAYS']),
+    }
+
+
+def rehydrate(game_id):
+    """
+    Moves an archived game back into the game table
+    Returns: the Game, or None if there is no such archived game
+    """
+    archived = db.session.get(GameArchive, game_id)
+    if archived is None:
+        return None
+
+    game = Game(
+        id=archived.id,
+        state=archived.state,
+        status=archived.status,
+        owner_id=archived.owner_id,
+        created_at=archived.created_at,
+        # Loading counts as activity, so it is not archived again right away
+        updated_at=datetime.utcnow(),
+    )
+    for row in archived.players:
+        game.players.append(db.session.get(Player, row['id']) or _player_from_row(row))
+    db.session.add(game)
+    db.session.delete(archived)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another request rehydrated it first
+        db.session.rollback()
+        return db.session.get(Game, game_id)
+    return game
+
+
+def load_game(game_id):
+    """The Game, moved back from the archive if needed; None if there is no such game"""
+    return db.session.get(Game, game_id) or rehydrate(game_id)
@@ -0,0 +1,325 @@
+"""
+App CLI commands
+"""
+import gzip
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import click
+from flask import current_app, g
+from flask.cli import AppGroup, ScriptInfo
+
+from app.db import db
+
+
+class LazyMigrateGroup(click.Group):
+    """
+    `flask db ...` without paying for Flask-Migrate/Alembic on every start:
+    the real command group is imported and Migrate is initialised only when
+    a db command is actually run.
+    """
+
+    def _load(self, ctx):
+        from flask_migrate import Migrate
+        from flask_migrate.cli import db as db_group
+
+        app = ctx.ensure_object(ScriptInfo).load_app()
+        if 'migrate' not in app.extensions:
+            Migrate(app, db)
+        return db_group
+
+    def list_commands(self, ctx):
+        return self._load(ctx).list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self._load(ctx).get_command(ctx, name)
+
+
+@click.group('db', cls=LazyMigrateGroup)
+@click.option('-d', '--directory', default=None,
+              help='Migration script directory (default is "migrations")')
+@click.option('-x', '--x-arg', multiple=True,
+              help='Additional arguments consumed by custom env.py scripts')
+def db_cli(directory, x_arg):
+    """Perform database migrations."""
+    # Same as flask_migrate.cli.db, whose subcommands read these from g
+    g.directory = directory
+    g.x_arg = x_arg
+
+
+# Runs in a fresh interpreter so nothing is already imported
+PROBE = """
+import json, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+app.test_client().get('/metrics')
+served = time.perf_counter()
+print(json.dumps({
+    'import_app_s': imported - start,
+    'create_app_s': created - imported,
+    'first_request_s': served - created,
+}))
+"""
+
+
+def parse_importtime(stderr):
+    """Rows of (module, self_us, cumulative_us, depth) from `python -X importtime` output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+@click.command('startup-profile')
+@click.option('--top', default=20, help="Number of modules/packages to list")
+@click.option('--json', 'as_json', is_flag=True, help="Print the report as JSON")
+def startup_profile(top, as_json):
+    """Cold-start report: per-module import time and time to first request"""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE],
+        capture_output=True, text=True, cwd=project_root, env=os.environ.copy(),
+    )
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise click.ClickException(f"Startup probe failed:\n{result.stderr[-2000:]}")
+
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    rows = parse_importtime(result.stderr)
+
+    packages = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        packages[name.split('.')[0]] += self_us
+
+    report = {
+        'process_wall_s': wall,
+        **timings,
+        'modules_imported': len(rows),
+        'total_import_s': sum(r[1] for r in rows) / 1e6,
+        'slowest_modules': [
+            {'module': name, 'cumulative_ms': cum / 1000, 'self_ms': own / 1000}
+            for name, own, cum, _ in sorted(rows, key=lambda r: r[2], reverse=True)[:top]
+        ],
+        'packages': [
+            {'package': name, 'self_ms': us / 1000}
+            for name, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        ],
+    }
+
+    if as_json:
+        click.echo(json.dumps(report, indent=2))
+        return
+
+    click.echo(f"process wall time   {report['process_wall_s'] * 1000:8.1f} ms")
+    click.echo(f"import app          {report['import_app_s'] * 1000:8.1f} ms")
+    click.echo(f"create_app()        {report['create_app_s'] * 1000:8.1f} ms")
+    click.echo(f"first request       {report['first_request_s'] * 1000:8.1f} ms")
+    click.echo(f"modules imported    {report['modules_imported']:8d}")
+    click.echo("\nSlowest imports (cumulative):")
+    for row in report['slowest_modules']:
+        click.echo(f"  {row['cumulative_ms']:8.1f} ms  {row['module']}")
+    click.echo("\nImport time by top-level package (self):")
+    for row in report['packages']:
+        click.echo(f"  {row['self_ms']:8.1f} ms  {row['package']}")
+
+
+archive_cli = AppGroup('archive', help="Game archive (finished and idle games)")
+
+
+@archive_cli.command('run')
+@click.option('--batch-size', type=int, default=None, help="Games per batch (default: ARCHIVE_BATCH_SIZE)")
+@click.option('--max-batches', type=int, default=None, help="Stop after this many batches")
+@click.option('--queue', 'use_queue', is_flag=True, help="Queue an archive job for the workers instead")
+def archive_run(batch_size, max_batches, use_queue):
+    """Moves finished and idle games into game_archive, one batch at a time"""
+    from app.archive import archive_batch, archive_settings
+    from app.jobs import job_queue
+    from app.jobs.tasks import MAINTENANCE_GAME_ID
+    from app.shards import router
+
+    if use_queue:
+        job_id = job_queue.enqueue('archive', MAINTENANCE_GAME_ID)
+        click.echo(f"Queued archive job {job_id}")
+        return
+
+    settings = archive_settings(current_app.config)
+    if batch_size:
+        settings['batch_size'] = batch_size
+    batches = 0
+    totals = {'finished': 0, 'idle': 0}
+    for shard in router.shards():
+        with router.pinned(shard):
+            while max_batches is None or batches < max_batches:
+                counts = archive_batch(**settings)
+                batches += 1
+                for reason, count in counts.items():
+                    totals[reason] += count
+                click.echo(f"batch {batches} (shard {shard}): "
+                           f"{counts['finished']} finished, {counts['idle']} idle")
+                if sum(counts.values()) < settings['batch_size']:
+                    break
+    click.echo(f"Archived {totals['finished']} finished and {totals['idle']} idle game(s)")
+
+
+@archive_cli.command('status')
+def archive_status():
+    """Prints how many games are hot and archived"""
+    from app.model import Game, GameArchive
+    from app.shards import router
+
+    click.echo(f"hot: {sum(router.fan_out(lambda: [Game.query.count()]))}")
+    click.echo(f"archived: {sum(router.fan_out(lambda: [GameArchive.query.count()]))}")
+
+
+data_cli = AppGroup('data', help="NDJSON export/import of games")
+
+
+@data_cli.command('export')
+@click.option('--out', default='-', help="Output file, '-' for stdout; gzipped if it ends in .gz")
+@click.option('--owner-id', default=None, help="Only games of this user id")
+@click.option('--status', default=None, help="Only games with this status")
+@click.option('--since', default=None, help="Updated at or after this ISO date")
+@click.option('--until', default=None, help="Updated before this ISO date")
+@click.option('--archived', is_flag=True, help="Include archived games")
+def data_export(out, owner_id, status, since, until, archived):
+    """Streams games as NDJSON, one line per game"""
+    from app.export import export_games, parse_filters
+
+    lines = export_games(include_archived=archived,
+                         **parse_filters(owner_id, status, since, until))
+    if out == '-':
+        for line in lines:
+            click.echo(line, nl=False)
+        return
+
+    opener = gzip.open if out.endswith('.gz') else open
+    count = 0
+    with opener(out, 'wt', encoding='utf-8') as f:
+        for line in lines:
+            f.write(line)
+            count += 1
+    click.echo(f"Exported {count} game(s) to {out}", err=True)
+
+
+@data_cli.command('import')
+@click.argument('path')
+@click.option('--batch-size', type=int, default=500, help="Games per transaction")
+@click.option('--owner-email', default=None, help="Assign every imported game to this user")
+def data_import(path, batch_size, owner_email):
+    """Loads games from an NDJSON export (plain or gzipped); existing ids are skipped"""
+    from app.export import import_games, open_ndjson
+    from app.model import User
+
+    owner_id = None
+    if owner_email:
+        owner = User.query.filter_by(email=owner_email).first()
+        if not owner:
+            raise click.ClickException(f"No user with email {owner_email}")
+        owner_id = owner.id
+
+    totals = {'imported': 0, 'skipped': 0}
+    with open_ndjson(path) as lines:
+        for totals in import_games(lines, owner_id=owner_id, batch_size=batch_size):
+            click.echo(f"imported {totals['imported']}, skipped {totals['skipped']}")
+    click.echo(f"Imported {totals['imported']} game(s), skipped {totals['skipped']} existing")
+
+
+sweep_cli = AppGroup('sweep', help="Orphaned player/game_player cleanup")
+
+
+@sweep_cli.command('run')
+@click.option('--batch-size', type=int, default=None, help="Rows per batch (default: SWEEP_BATCH_SIZE)")
+@click.option('--max-batches', type=int, default=None, help="Stop after this many batches")
+@click.option('--queue', 'use_queue', is_flag=True, help="Queue a sweep job for the workers instead")
+def sweep_run(batch_size, max_batches, use_queue):
+    """Deletes orphaned players and links in batches, printing progress"""
+    from app.jobs import job_queue
+    from app.jobs.tasks import MAINTENANCE_GAME_ID
+    from app.sweeper import count_orphans, sweep
+
+    if use_queue:
+        job_id = job_queue.enqueue('sweep', MAINTENANCE_GAME_ID)
+        click.echo(f"Queued sweep job {job_id}")
+        return
+
+    remaining = count_orphans()
+    click.echo(f"Orphans: {remaining['links']} link(s), {remaining['players']} player(s)")
+    totals = {'links': 0, 'players': 0}
+    for totals in sweep(batch_size or current_app.config['SWEEP_BATCH_SIZE'], max_batches):
+        click.echo(f"batch {totals['batches']}: "
+                   f"{totals['links']}/{remaining['links']} links, "
+                   f"{totals['players']}/{remaining['players']} players")
+    click.echo(f"Deleted {totals['links']} link(s) and {totals['players']} player(s)")
+
+
+@sweep_cli.command('status')
+def sweep_status():
+    """Counts orphaned players and links"""
+    from app.sweeper import count_orphans
+
+    for name, count in count_orphans().items():
+        click.echo(f"{name}: {count}")
+
+
+stats_cli = AppGroup('stats', help="User stats and leaderboard")
+
+
+@stats_cli.command('backfill')
+@click.option('--chunk-size', type=int, default=500, help="Games read per chunk")
+def stats_backfill(chunk_size):
+    """Recomputes every user's stats from all games, hot and archived"""
+    from app.stats import rebuild
+
+    seen = 0
+    for seen in rebuild(chunk_size):
+        click.echo(f"read {seen} game(s)")
+    click.echo(f"Stats rebuilt from {seen} game(s)")
+
+
+shards_cli = AppGroup('shards', help="Game shards (see app/shards.py)")
+
+
+@shards_cli.command('upgrade')
+@click.option('--revision', default='head', help="Target revision (default: head)")
+def shards_upgrade(revision):
+    """Runs the migrations on the main database and on every game shard"""
+    from flask_migrate import Migrate, upgrade
+    from app.shards import router
+
+    app = current_app._get_current_object()
+    if 'migrate' not in app.extensions:
+        Migrate(app, db)
+    for shard in router.shards():
+        click.echo(f"shard {shard}: upgrading to {revision}")
+        upgrade(revision=revision, x_arg=[f'shard={shard}'])
+
+
+@shards_cli.command('status')
+def shards_status():
+    """Prints the schema revision and number of games of every shard"""
+    from alembic.migration import MigrationContext
+    from app.model import Game
+    from app.routing import shard_bind
+    from app.shards import router
+
+    for shard in router.shards():
+        with db.engines[shard_bind(shard)].connect() as connection:
+            revision = MigrationContext.configure(connection).get_current_revision()
+        if revision is None:
+            click.echo(f"shard {shard}: not migrated")
+            continue
+        with router.pinned(shard):
+            games = Game.query.count()
+        click.echo(f"shard {shard}: revision {revision}, {games} game(s)")
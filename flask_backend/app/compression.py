@@ -0,0 +1,150 @@
+"""
+Response compression
+JSON responses above COMPRESSION_MIN_BYTES are compressed with the best
+encoding the client accepts: zstd and brotli when their packages are
+installed, then gzip and deflate. Compressed bodies are cached by a digest
+of the uncompressed body, so polling an unchanged game doesn't compress
+the same state again. A strong ETag becomes weak when the body is
+compressed: the bytes differ per encoding.
+"""
+import gzip
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+
+from flask import request
+
+from app.metrics import metrics
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+responses_total = metrics.counter(
+    'compression_responses_total', "Compressed responses", ('encoding', 'cache'))
+bytes_saved_total = metrics.counter(
+    'compression_bytes_saved_total', "Response bytes saved by compression", ('encoding',))
+
+
+def _zstd_compress():
+    """A ZstdCompressor must not be shared between threads: one per thread"""
+    local = threading.local()
+
+    def compress(data):
+        compressor = getattr(local, 'compressor', None)
+        if compressor is None:
+            compressor = local.compressor = zstandard.ZstdCompressor(level=3)
+        return compressor.compress(data)
+    return compress
+
+
+def _compressors(level):
+    """Available encodings, most preferred first"""
+    compressors = OrderedDict()
+    if zstandard is not None:
+        compressors['zstd'] = _zstd_compress()
+    if brotli is not None:
+        compressors['br'] = lambda data: brotli.compress(data, quality=5)
+    compressors['gzip'] = lambda data: gzip.compress(data, compresslevel=level, mtime=0)
+    compressors['deflate'] = lambda data: zlib.compress(data, level)
+    return compressors
+
+
+def accepted_encodings(header):
+    """Accept-Encoding -> {encoding: q}, leaving out refused (q=0) ones"""
+    accepted = {}
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                continue
+        if name and q > 0:
+            accepted[name.lower()] = q
+    return accepted
+
+
+def choose_encoding(header, available):
+    """Highest q wins; ties go to the order of `available`"""
+    accepted = accepted_encodings(header)
+    best = None
+    for name in available:
+        q = accepted.get(name, accepted.get('*', 0))
+        if q > 0 and (best is None or q > best[1]):
+            best = (name, q)
+    return best[0] if best else None
+
+
+class CompressedCache:
+    """Bounded LRU of (body digest, encoding) -> compressed body"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+def init_compression(app):
+    if not app.config['COMPRESSION_ENABLED']:
+        return
+
+    min_bytes = app.config['COMPRESSION_MIN_BYTES']
+    compressors = _compressors(app.config['COMPRESSION_LEVEL'])
+    cache = CompressedCache(app.config['COMPRESSION_CACHE_SIZE'])
+
+    @app.after_request
+    def compress_response(response):
+        response.vary.add('Accept-Encoding')
+        if (response.direct_passthrough or response.is_streamed
+                or response.status_code < 200 or response.status_code >= 300
+                or 'Content-Encoding' in response.headers
+                or response.mimetype != 'application/json'):
+            return response
+
+        encoding = choose_encoding(request.headers.get('Accept-Encoding', ''), compressors)
+        if encoding is None:
+            return response
+        body = response.get_data()
+        if len(body) < min_bytes:
+            return response
+
+        key = (hashlib.blake2b(body, digest_size=16).digest(), encoding)
+        compressed = cache.get(key)
+        responses_total(encoding, 'hit' if compressed is not None else 'miss')
+        if compressed is None:
+            compressed = compressors[encoding](body)
+            cache.put(key, compressed)
+        if len(compressed) >= len(body):
+            return response
+
+        bytes_saved_total(encoding, amount=len(body) - len(compressed))
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -5,4 +5,109 @@ load_dotenv()
 
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
-    SQLALCHEMY_TRACK_MODIFICATIONS = True
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = True
+
+    # Read replica for GET/HEAD requests (second bind); a client that wrote less than
+    # REPLICA_STICKY_SECONDS ago keeps reading from the primary
+    DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+    SQLALCHEMY_BINDS = {"replica": DATABASE_REPLICA_URL} if DATABASE_REPLICA_URL else {}
+    REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", 5))
+    # Lets the browser client read X-Last-Write to send it back
+    CORS_EXPOSE_HEADERS = ["X-Last-Write"]
+
+    # Game shards (app/shards.py): comma-separated URLs of the databases after the
+    # main one, bound as shard1, shard2... Ids up to SHARD_ID_BASE predate sharding
+    # and stay in the main database: set it above the highest game/player id first
+    SHARD_URLS = [url.strip() for url in os.getenv("SHARD_URLS", "").split(",") if url.strip()]
+    SQLALCHEMY_BINDS.update({f"shard{i}": url for i, url in enumerate(SHARD_URLS, start=1)})
+    SHARD_ID_BASE = int(os.getenv("SHARD_ID_BASE", 0))
+
+    # Time budget (milliseconds) for each decision of the 'hard' AI
+    AI_ROLLOUT_BUDGET_MS = int(os.getenv("AI_ROLLOUT_BUDGET_MS", 50))
+    # Search depth (player turns) of the 'expert' AI
+    AI_SEARCH_DEPTH = int(os.getenv("AI_SEARCH_DEPTH", 3))
+
+    # Background jobs: SQLite file for the queue, threads per `flask jobs worker`,
+    # worker threads started inside the web process (0 = none), autoplay turn limit.
+    # A running job is re-queued once its worker misses JOB_LEASE_SECONDS of heartbeats
+    JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "jobs.sqlite3")
+    JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", 2))
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", 0))
+    JOB_MAX_TURNS = int(os.getenv("JOB_MAX_TURNS", 1000))
+    JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 60))
+
+    # Changes to a game that /undo and /redo can step through (0 = no history)
+    HISTORY_SIZE = int(os.getenv("HISTORY_SIZE", 20))
+
+    # Comma-separated emails of users allowed to use the /admin routes
+    ADMIN_EMAILS = {e.strip() for e in os.getenv("ADMIN_EMAILS", "").split(",") if e.strip()}
+
+    # Archival: finished games untouched for ARCHIVE_FINISHED_HOURS and games
+    # idle for ARCHIVE_IDLE_DAYS move to game_archive, ARCHIVE_BATCH_SIZE per batch
+    ARCHIVE_FINISHED_HOURS = float(os.getenv("ARCHIVE_FINISHED_HOURS", 24))
+    ARCHIVE_IDLE_DAYS = float(os.getenv("ARCHIVE_IDLE_DAYS", 30))
+    ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 200))
+    # Orphaned players/game_player links deleted per sweeper batch
+    SWEEP_BATCH_SIZE = int(os.getenv("SWEEP_BATCH_SIZE", 1000))
+
+    # Cross-worker cache invalidation: 'local' (one process), 'sqlite' (change log
+    # in the INVALIDATION_URL file, polled every INVALIDATION_POLL_MS) or 'redis'
+    # (INVALIDATION_URL is the server URL)
+    INVALIDATION_BACKEND = os.getenv("INVALIDATION_BACKEND", "local")
+    INVALIDATION_URL = os.getenv("INVALIDATION_URL", "invalidation.sqlite3")
+    INVALIDATION_POLL_MS = float(os.getenv("INVALIDATION_POLL_MS", 200))
+
+    # Admission control on mutating game routes: token buckets per user and per game
+    # (requests/second and burst), shared through the ADMISSION_URL SQLite file when
+    # ADMISSION_BACKEND is 'sqlite', and at most ADMISSION_GAME_IN_FLIGHT requests per
+    # game at once, waiting up to ADMISSION_QUEUE_MS for a slot
+    ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_BACKEND = os.getenv("ADMISSION_BACKEND", "local")
+    ADMISSION_URL = os.getenv("ADMISSION_URL", "admission.sqlite3")
+    ADMISSION_USER_RATE = float(os.getenv("ADMISSION_USER_RATE", 20))
+    ADMISSION_USER_BURST = float(os.getenv("ADMISSION_USER_BURST", 40))
+    ADMISSION_GAME_RATE = float(os.getenv("ADMISSION_GAME_RATE", 10))
+    ADMISSION_GAME_BURST = float(os.getenv("ADMISSION_GAME_BURST", 20))
+    ADMISSION_GAME_IN_FLIGHT = int(os.getenv("ADMISSION_GAME_IN_FLIGHT", 1))
+    ADMISSION_QUEUE_MS = float(os.getenv("ADMISSION_QUEUE_MS", 2000))
+
+    # Idempotency-Key support on mutating routes: responses are kept IDEMPOTENCY_TTL
+    # seconds in this process, or in the IDEMPOTENCY_URL SQLite file when
+    # IDEMPOTENCY_BACKEND is 'sqlite'; a retry waits up to IDEMPOTENCY_WAIT_MS for
+    # the original request to finish, which loses its claim after IDEMPOTENCY_LEASE_MS
+    IDEMPOTENCY_BACKEND = os.getenv("IDEMPOTENCY_BACKEND", "local")
+    IDEMPOTENCY_URL = os.getenv("IDEMPOTENCY_URL", "idempotency.sqlite3")
+    IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", 24 * 3600))
+    IDEMPOTENCY_WAIT_MS = float(os.getenv("IDEMPOTENCY_WAIT_MS", 5000))
+    IDEMPOTENCY_LEASE_MS = float(os.getenv("IDEMPOTENCY_LEASE_MS", 6 * IDEMPOTENCY_WAIT_MS))
+
+    # JSON responses of at least COMPRESSION_MIN_BYTES are compressed (zstd/br when
+    # installed, gzip, deflate); the last COMPRESSION_CACHE_SIZE bodies are cached
+    COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", 1024))
+    COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", 6))
+    COMPRESSION_CACHE_SIZE = int(os.getenv("COMPRESSION_CACHE_SIZE", 256))
+
+    # /metrics is served only to scrapers sending `Authorization: Bearer <METRICS_TOKEN>`;
+    # without a token it is switched off
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+    # Per-request profiling (wall/DB/serialisation time, query counts) feeding /metrics.
+    # Requests slower than PROFILING_SLOW_MS are logged at the given sample rate,
+    # with the SQL statements that took longer than PROFILING_SLOW_QUERY_MS
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILING_SLOW_MS = float(os.getenv("PROFILING_SLOW_MS", 500))
+    PROFILING_SLOW_SAMPLE_RATE = float(os.getenv("PROFILING_SLOW_SAMPLE_RATE", 1.0))
+    PROFILING_SLOW_QUERY_MS = float(os.getenv("PROFILING_SLOW_QUERY_MS", 20))
+
+    # Counters/timers around game_logic and AI calls, exported at /metrics.
+    # With a sample rate of N only one call in N is timed (all are counted)
+    ENGINE_INSTRUMENTATION = os.getenv("ENGINE_INSTRUMENTATION", "false").lower() == "true"
+    ENGINE_INSTRUMENTATION_SAMPLE = int(os.getenv("ENGINE_INSTRUMENTATION_SAMPLE", 1))
+
+    # Claims of up to JWT_DECODE_CACHE_SIZE verified tokens are kept so known tokens
+    # skip decoding (0 = off)
+    JWT_DECODE_CACHE_SIZE = int(os.getenv("JWT_DECODE_CACHE_SIZE", 1024))
+
+    # Social login routes are only registered when a provider is configured
+    SOCIAL_AUTH_ENABLED = bool(os.getenv("GOOGLE_CLIENT_ID") or os.getenv("GITHUB_CLIENT_ID"))
\ No newline at end of file
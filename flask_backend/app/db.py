@@ -1,5 +1,25 @@
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from sqlalchemy import event
 
-db = SQLAlchemy()
-migrate = Migrate()
\ No newline at end of file
+from app.routing import REPLICA_BIND, RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+def _enable_foreign_keys(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def init_foreign_keys(app):
+    """
+    SQLite only enforces foreign keys (and their ON DELETE CASCADE) on
+    connections that ask for it. Game shards are left out: their
+    game.owner_id points at users kept on the main database.
+    """
+    with app.app_context():
+        engines = [engine for bind, engine in db.engines.items() if bind in (None, REPLICA_BIND)]
+    for engine in engines:
+        if engine.dialect.name == 'sqlite':
+            event.listen(engine, 'connect', _enable_foreign_keys)
@@ -0,0 +1,236 @@
+"""
+NDJSON export/import of games
+One JSON object per line and per game: the game row, its state and its
+player rows. Rows are streamed from the database in chunks (yield_per) and
+written out as they come, so memory stays flat however many games there
+are. The import reads the same format line by line and inserts in batches.
+Both go through every shard; imported games land on the shard of their id.
+Only the current state of a game is stored, so there is no per-move history
+to export.
+"""
+import gzip
+import json
+import zlib
+from datetime import datetime
+
+from sqlalchemy import func, insert, select, text
+
+from app.db import db
+from app.game.board import to_slots
+from app.invalidation import invalidate
+from app.model import Game, GameArchive, GamePlayer, Player
+from app.shards import router
+
+PLAYER_COLUMNS = ('id', 'name', 'color', 'position', 'money', 'properties', 'is_computer')
+CHUNK_SIZE = 500
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _datetime(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def _state(state):
+    """Exports made before the positional board have a name-keyed one"""
+    if 'board' in state:
+        state = dict(state, board=to_slots(state['board']))
+    return state
+
+
+def parse_filters(owner_id=None, status=None, since=None, until=None):
+    """Filter arguments as strings (query string / CLI) -> export_games keyword arguments"""
+    return {
+        'owner_id': int(owner_id) if owner_id else None,
+        'status': status or None,
+        'since': _datetime(since),
+        'until': _datetime(until),
+    }
+
+
+def _filtered(model, owner_id, status, since, until):
+    query = select(model).order_by(model.id)
+    if owner_id is not None:
+        query = query.where(model.owner_id == owner_id)
+    if status:
+        query = query.where(model.status == status)
+    # Date range applies to the last activity
+    if since:
+        query = query.where(model.updated_at >= since)
+    if until:
+        query = query.where(model.updated_at < until)
+    return query
+
+
+def _players_by_game(game_ids):
+    """Player rows of a chunk of games, in one query"""
+    rows = db.session.execute(
+        select(GamePlayer.game_id, Player)
+        .join(Player, Player.id == GamePlayer.player_id)
+        .where(GamePlayer.game_id.in_(game_ids))
+        .order_by(Player.id)
+    )
+    players = {game_id: [] for game_id in game_ids}
+    for game_id, player in rows:
+        row = {column: getattr(player, column) for column in PLAYER_COLUMNS}
+        row['created_at'] = _iso(player.created_at)
+        players[game_id].append(row)
+    return players
+
+
+def _record(game, players, archived):
+    return {
+        'type': 'game',
+        'id': game.id,
+        'owner_id': game.owner_id,
+        'status': game.status,
+        'created_at': _iso(game.created_at),
+        'updated_at': _iso(game.updated_at),
+        'archived': archived,
+        'state': game.state,
+        'players': players,
+    }
+
+
+def export_games(owner_id=None, status=None, since=None, until=None,
+                 include_archived=False, chunk_size=CHUNK_SIZE):
+    """Yields one NDJSON line (str, with newline) per game matching the filters"""
+    filters = (owner_id, status, since, until)
+    for shard in router.shards():
+        with router.pinned(shard):
+            yield from _export_shard(filters, include_archived, chunk_size)
+
+
+def _export_shard(filters, include_archived, chunk_size):
+    result = db.session.execute(
+        _filtered(Game, *filters).execution_options(yield_per=chunk_size))
+    for chunk in result.scalars().partitions():
+        players = _players_by_game([game.id for game in chunk])
+        for game in chunk:
+            yield json.dumps(_record(game, players[game.id], False)) + '\n'
+        # Loaded games are not needed once written
+        db.session.expunge_all()
+
+    if include_archived:
+        result = db.session.execute(
+            _filtered(GameArchive, *filters).execution_options(yield_per=chunk_size))
+        for chunk in result.scalars().partitions():
+            for archived in chunk:
+                yield json.dumps(_record(archived, archived.players, True)) + '\n'
+            db.session.expunge_all()
+
+
+def gzip_stream(lines, level=6):
+    """Compresses an iterable of str into gzip bytes as it goes"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for line in lines:
+        data = compressor.compress(line.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def open_ndjson(path):
+    """Opens an export for reading, gzip or plain"""
+    with open(path, 'rb') as f:
+        magic = f.read(2)
+    if magic == b'\x1f\x8b':
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def _insert_batch(batch, owner_id):
+    """Inserts a batch of game records, one transaction per shard"""
+    imported = skipped = 0
+    groups = router.group(record['id'] for record in batch)
+    records = {record['id']: record for record in batch}
+    for shard, ids in groups.items():
+        with router.pinned(shard):
+            counts = _insert_shard_batch([records[game_id] for game_id in ids], owner_id)
+        imported += counts[0]
+        skipped += counts[1]
+    return imported, skipped
+
+
+def _insert_shard_batch(batch, owner_id):
+    """Inserts game records of the pinned shard; games whose id already exists are skipped"""
+    ids = [record['id'] for record in batch]
+    existing = set(db.session.scalars(select(Game.id).where(Game.id.in_(ids))))
+    existing |= set(db.session.scalars(select(GameArchive.id).where(GameArchive.id.in_(ids))))
+    batch = [record for record in batch if record['id'] not in existing]
+    if not batch:
+        return 0, len(existing)
+
+    player_ids = [p['id'] for record in batch for p in record['players']]
+    known_players = set(db.session.scalars(select(Player.id).where(Player.id.in_(player_ids))))
+    players, games, links = [], [], []
+    for record in batch:
+        for p in record['players']:
+            if p['id'] not in known_players:
+                known_players.add(p['id'])
+                players.append(dict({c: p.get(c) for c in PLAYER_COLUMNS},
+                                    created_at=_datetime(p.get('created_at'))))
+            links.append({'game_id': record['id'], 'player_id': p['id']})
+        games.append({
+            'id': record['id'],
+            'owner_id': owner_id or record['owner_id'],
+            'status': record.get('status'),
+            'state': _state(record['state']),
+            'created_at': _datetime(record.get('created_at')),
+            'updated_at': _datetime(record.get('updated_at')),
+        })
+
+    if players:
+        db.session.execute(insert(Player), players)
+    db.session.execute(insert(Game), games)
+    if links:
+        db.session.execute(insert(GamePlayer), links)
+    invalidate(db.session, *(f"game:{game['id']}" for game in games))
+    db.session.commit()
+    return len(games), len(existing)
+
+
+def import_games(lines, owner_id=None, batch_size=CHUNK_SIZE):
+    """
+    Inserts games from NDJSON lines, batch_size games per transaction.
+    Imported games keep their ids (archived ones come back as hot games);
+    owner_id reassigns all of them, e.g. to a load-test user.
+    Yields running totals {'imported', 'skipped'} after each batch.
+    """
+    totals = {'imported': 0, 'skipped': 0}
+    batch = []
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if record.get('type') != 'game':
+            continue
+        batch.append(record)
+        if len(batch) >= batch_size:
+            imported, skipped = _insert_batch(batch, owner_id)
+            totals['imported'] += imported
+            totals['skipped'] += skipped
+            batch = []
+            yield dict(totals)
+    if batch:
+        imported, skipped = _insert_batch(batch, owner_id)
+        totals['imported'] += imported
+        totals['skipped'] += skipped
+        yield dict(totals)
+    _sync_sequences()
+
+
+def _sync_sequences():
+    """Explicit ids don't advance Postgres sequences; move them past the imported rows"""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for table, column in ((Game.__table__, Game.id), (Player.__table__, Player.id)):
+        highest = db.session.scalar(select(func.max(column)))
+        if highest:
+            db.session.execute(
+                text(f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), :value)"),
+                {'value': highest},
+            )
+    db.session.commit()
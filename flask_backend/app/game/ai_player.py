@@ -1,13 +1,15 @@
 import random
 
+from app.game.board import NAMES, PRICES, SIZE, owned_by, property_slot
+from app.game.instrumentation import instrumented
+
 class MonopolyAI:
     """Simple AI logic for computer players in Monopoly"""
     
     @staticmethod
-    def should_buy_property(player, property_data):
-        """Decide if AI should buy a property"""
-        price = property_data.get('price', 0)
-        
+    @instrumented('MonopolyAI.should_buy_property')
+    def should_buy_property(player, price):
+        """Decide if AI should buy a property costing `price`"""
         # Don't buy if can't afford it with buffer
         if player['money'] < price + 500:
             return False
@@ -20,6 +22,7 @@ class MonopolyAI:
         return random.random() < 0.7
     
     @staticmethod
+    @instrumented('MonopolyAI.should_build')
     def should_build(player, property_data, board):
         """Decide if AI should build on a property"""
         current_houses = property_data.get('houses', 0)
@@ -36,8 +39,7 @@ class MonopolyAI:
             return False
         
         # Count owned properties
-        owned_count = sum(1 for prop in board.values() 
-                         if prop.get('owner') == player['id'])
+        owned_count = len(owned_by(board, player['id']))
         
         # More likely to build if owns multiple properties
         if owned_count >= 3:
@@ -46,22 +48,113 @@ class MonopolyAI:
         return random.random() < 0.3
     
     @staticmethod
+    @instrumented('MonopolyAI.choose_property_to_build')
     def choose_property_to_build(player, board):
-        """Choose which property to build on"""
+        """Choose which property to build on; returns its name"""
         owned_properties = [
-            (name, prop) for name, prop in board.items()
-            if prop.get('owner') == player['id'] and prop.get('houses', 0) < 5
+            pos for pos in owned_by(board, player['id'])
+            if board[pos]['houses'] < 5
         ]
-        
+
         if not owned_properties:
             return None
-        
-        # Prefer properties with fewer houses (build evenly)
-        property_with_fewest_houses = owned_properties[0]
-        for prop_name, prop_data in owned_properties:
-            current_houses = prop_data.get('houses', 0)
-            fewest_houses = property_with_fewest_houses[1].get('houses', 0)
-            if current_houses < fewest_houses:
-                property_with_fewest_houses = (prop_name, prop_data)
-        
-        return property_with_fewest_houses[0]
+
+        # Prefer properties with fewer houses (build evenly), first on the board wins ties
+        fewest = min(owned_properties, key=lambda pos: board[pos]['houses'])
+        return NAMES[fewest]
+
+    @staticmethod
+    @instrumented('MonopolyAI.decide_buy')
+    def decide_buy(player, property_name, game_state):
+        """Strategy hook used by /ai-move: should the AI buy this property?"""
+        pos, prop = property_slot(game_state['board'], property_name)
+        return prop is not None and MonopolyAI.should_buy_property(player, PRICES[pos])
+
+    @staticmethod
+    @instrumented('MonopolyAI.decide_build')
+    def decide_build(player, game_state):
+        """Strategy hook used by /ai-move: which property to build on, if any"""
+        board = game_state['board']
+        property_name = MonopolyAI.choose_property_to_build(player, board)
+        if property_name and MonopolyAI.should_build(player, property_slot(board, property_name)[1], board):
+            return property_name
+        return None
+
+    @staticmethod
+    @instrumented('MonopolyAI.decide_batch')
+    def decide_batch(states):
+        """
+        Buy/build decisions for many (game, player) pairs in one pass
+        Each item has 'player', 'game_state', 'action' ('buy' or 'build') and,
+        for buys, 'property'. Applies the same rules as should_buy_property,
+        should_build and choose_property_to_build, evaluated on stacked arrays.
+        Returns one {'action', 'property'} dict per item.
+        """
+        # Only batch callers pay for importing numpy
+        import numpy as np
+
+        n = len(states)
+        cash = np.zeros(n)
+        price = np.zeros(n)
+        for_sale = np.zeros(n, dtype=bool)
+        owned = np.zeros((n, SIZE), dtype=bool)
+        houses = np.zeros((n, SIZE), dtype=np.int64)
+
+        for i, item in enumerate(states):
+            player = item['player']
+            board = item['game_state']['board']
+            cash[i] = player['money']
+            if item['action'] == 'buy':
+                pos, prop = property_slot(board, item.get('property'))
+                if prop is not None and prop['owner'] is None:
+                    price[i] = PRICES[pos]
+                    for_sale[i] = True
+            else:
+                for pos in owned_by(board, player['id']):
+                    owned[i, pos] = True
+                    houses[i, pos] = board[pos]['houses']
+
+        rng = np.random.default_rng()
+        coin = rng.random(n)
+
+        # should_buy_property
+        buy = (for_sale & (cash >= price + 500)
+               & ((price < cash * 0.4) | (coin < 0.7)))
+
+        # choose_property_to_build: fewest houses, first on the board wins ties
+        buildable = owned & (houses < 5)
+        target = np.where(buildable, houses, 99).argmin(axis=1)
+        target_houses = houses[np.arange(n), target]
+        # should_build
+        cost = np.where(target_houses < 4, 100, 500)
+        chance = np.where(owned.sum(axis=1) >= 3, 0.6, 0.3)
+        build = (buildable.any(axis=1) & (cash >= cost + 800)
+                 & (coin < chance))
+
+        decisions = []
+        for i, item in enumerate(states):
+            if item['action'] == 'buy' and buy[i]:
+                decisions.append({'action': 'buy', 'property': item['property']})
+            elif item['action'] == 'build' and build[i]:
+                decisions.append({'action': 'build', 'property': NAMES[int(target[i])]})
+            else:
+                decisions.append({'action': 'pass'})
+        return decisions
+
+
+AI_DIFFICULTIES = ('easy', 'hard', 'expert')
+
+
+def get_ai(difficulty='easy', budget_ms=50, depth=3):
+    """
+    Returns the AI strategy for a difficulty level
+    'easy' is the heuristic MonopolyAI, 'hard' runs Monte Carlo rollouts,
+    'expert' runs an expectimax search over dice outcomes
+    """
+    if difficulty == 'hard':
+        from app.game.rollout_ai import RolloutAI
+        return RolloutAI(budget_ms=budget_ms)
+    if difficulty == 'expert':
+        from app.game.expectimax_ai import ExpectimaxAI
+        return ExpectimaxAI(depth=depth)
+    return MonopolyAI
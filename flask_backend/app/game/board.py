@@ -0,0 +1,165 @@
+"""
+The Monopoly board
+The only definition of the 40 spaces. It is compiled at import into
+immutable tables indexed by position, plus a name -> position index that
+also knows the other spellings clients and older saves use.
+In a game state the board is a list of 40 slots: {'owner', 'houses'} for
+a space that can be bought, None for the others. Everything static (name,
+price, rent...) comes from the tables here; clients get them from
+GET /board, cached by VERSION.
+"""
+import hashlib
+import json
+from collections import namedtuple
+from types import MappingProxyType
+
+Space = namedtuple('Space', 'position name type price rent color amount',
+                   defaults=(0, 0, None, 0))
+
+SPACES = (
+    Space(0, "Go", "go"),
+    Space(1, "Mediterranean Avenue", "property", 60, 6, "brown"),
+    Space(2, "Community Chest", "community_chest"),
+    Space(3, "Baltic Avenue", "property", 60, 6, "brown"),
+    Space(4, "Income Tax", "tax", amount=200),
+    Space(5, "Reading Railroad", "railroad", 200, 25),
+    Space(6, "Oriental Avenue", "property", 100, 10, "light_blue"),
+    Space(7, "Chance", "chance"),
+    Space(8, "Vermont Avenue", "property", 100, 10, "light_blue"),
+    Space(9, "Connecticut Avenue", "property", 120, 12, "light_blue"),
+    Space(10, "Jail", "jail"),
+    Space(11, "St. Charles Place", "property", 140, 14, "pink"),
+    Space(12, "Electric Company", "utility", 150),
+    Space(13, "States Avenue", "property", 140, 14, "pink"),
+    Space(14, "Virginia Avenue", "property", 160, 16, "pink"),
+    Space(15, "Pennsylvania Railroad", "railroad", 200, 25),
+    Space(16, "St. James Place", "property", 180, 18, "orange"),
+    Space(17, "Community Chest", "community_chest"),
+    Space(18, "Tennessee Avenue", "property", 180, 18, "orange"),
+    Space(19, "New York Avenue", "property", 200, 20, "orange"),
+    Space(20, "Free Parking", "free_parking"),
+    Space(21, "Kentucky Avenue", "property", 220, 22, "red"),
+    Space(22, "Chance", "chance"),
+    Space(23, "Indiana Avenue", "property", 220, 22, "red"),
+    Space(24, "Illinois Avenue", "property", 240, 24, "red"),
+    Space(25, "B&O Railroad", "railroad", 200, 25),
+    Space(26, "Atlantic Avenue", "property", 260, 26, "yellow"),
+    Space(27, "Ventnor Avenue", "property", 260, 26, "yellow"),
+    Space(28, "Water Works", "utility", 150),
+    Space(29, "Marvin Gardens", "property", 280, 28, "yellow"),
+    Space(30, "Go to Jail", "go_to_jail"),
+    Space(31, "Pacific Avenue", "property", 300, 30, "green"),
+    Space(32, "North Carolina Avenue", "property", 300, 30, "green"),
+    Space(33, "Community Chest", "community_chest"),
+    Space(34, "Pennsylvania Avenue", "property", 320, 32, "green"),
+    Space(35, "Short Line", "railroad", 200, 25),
+    Space(36, "Chance", "chance"),
+    Space(37, "Park Place", "property", 350, 35, "dark_blue"),
+    Space(38, "Luxury Tax", "tax", amount=100),
+    Space(39, "Boardwalk", "property", 400, 50, "dark_blue"),
+)
+
+SIZE = len(SPACES)
+JAIL = 10
+PURCHASABLE_TYPES = frozenset(('property', 'railroad', 'utility'))
+
+NAMES = tuple(space.name for space in SPACES)
+TYPES = tuple(space.type for space in SPACES)
+PRICES = tuple(space.price for space in SPACES)
+RENTS = tuple(space.rent for space in SPACES)
+TAXES = tuple(space.amount for space in SPACES)
+COLORS = tuple(space.color for space in SPACES)
+PURCHASABLE = tuple(kind in PURCHASABLE_TYPES for kind in TYPES)
+PURCHASABLE_POSITIONS = tuple(pos for pos in range(SIZE) if PURCHASABLE[pos])
+
+# Spellings used by the old routes.py board and the frontend
+ALIASES = {
+    "B. & O. Railroad": 25,
+    "Community Chest 1": 2, "Community Chest 2": 17, "Community Chest 3": 33,
+    "Chance 1": 7, "Chance 2": 22, "Chance 3": 36,
+}
+
+
+def _index():
+    index = {}
+    for pos, name in enumerate(NAMES):
+        # Chance and Community Chest appear three times: the name means the first
+        index.setdefault(name, pos)
+        if name.endswith(" Avenue"):
+            index.setdefault(name.replace(" Avenue", " Ave"), pos)
+    index.update(ALIASES)
+    return MappingProxyType(index)
+
+
+POSITIONS = _index()
+
+
+def describe():
+    """The static board as JSON-ready data, for clients"""
+    return {
+        'size': SIZE,
+        'jail': JAIL,
+        'spaces': [dict(space._asdict(), purchasable=PURCHASABLE[space.position]) for space in SPACES],
+        'aliases': ALIASES,
+    }
+
+
+# Digest of the definition: changes only when the board does
+VERSION = hashlib.blake2b(
+    json.dumps(describe(), sort_keys=True).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def position_of(key):
+    """Board position for a space name (or alias) or a position; None if unknown"""
+    if type(key) is int:
+        return key if 0 <= key < SIZE else None
+    if not isinstance(key, str):
+        return None
+    return POSITIONS.get(key)
+
+
+def new_board():
+    """Board of a new game: every purchasable space unowned and unbuilt"""
+    return [{'owner': None, 'houses': 0} if purchasable else None for purchasable in PURCHASABLE]
+
+
+def property_slot(board, key):
+    """(position, slot) of a purchasable space by name or position, else (None, None)"""
+    pos = position_of(key)
+    if pos is None or not PURCHASABLE[pos]:
+        return None, None
+    return pos, board[pos]
+
+
+def owned_by(board, player_id):
+    """Positions of the spaces `player_id` owns, in board order"""
+    return [pos for pos in PURCHASABLE_POSITIONS if board[pos]['owner'] == player_id]
+
+
+def to_slots(board):
+    """
+    Converts a name-keyed board (saves before the positional board) to
+    slots; a slot list is returned unchanged
+    """
+    if not isinstance(board, dict):
+        return board
+    slots = new_board()
+    for name, entry in board.items():
+        pos = entry.get('position', position_of(name))
+        if pos is None or not PURCHASABLE[pos]:
+            continue
+        slots[pos] = {'owner': entry.get('owner'), 'houses': entry.get('houses', 0)}
+    return slots
+
+
+def to_named(board):
+    """Slots back to the name-keyed board, exactly as games used to store it"""
+    named = {}
+    for pos, space in enumerate(SPACES):
+        if PURCHASABLE[pos]:
+            slot = board[pos]
+            named[space.name] = {'position': pos, 'price': space.price, 'owner': slot['owner'],
+                                 'houses': slot['houses'], 'type': space.type}
+        else:
+            named[space.name] = {'position': pos, 'type': space.type}
+    return named
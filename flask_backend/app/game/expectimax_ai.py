@@ -0,0 +1,277 @@
+"""
+Expectimax AI
+Depth-limited search over dice outcomes. States are packed into small
+immutable tuples/bytes so that repeated positions can be looked up in a
+shared transposition table instead of being searched again.
+"""
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from app.game.instrumentation import instrumented
+from app.game.board import (
+    JAIL, NAMES, PRICES, PURCHASABLE, PURCHASABLE_POSITIONS, RENTS, SIZE, TAXES, owned_by,
+    property_slot,
+)
+from app.game.board import TYPES as SPACE_TYPES
+
+# 36 dice rolls collapse into 11 sums
+DICE_SUMS = tuple((total, (6 - abs(total - 7)) / 36) for total in range(2, 13))
+# Rolls that get a player out of jail (doubles)
+DOUBLES = tuple((2 * die, 1 / 36) for die in range(1, 7))
+STAY_IN_JAIL = 5 / 6
+
+# Same multipliers as calculate_rent: 0..4 houses, then the hotel
+HOUSE_MULTIPLIER = (1, 2, 4, 6, 8, 10)
+HOUSE_COST = 100
+HOTEL_COST = 500
+
+# Cash is bucketed in state keys, so near-identical states share entries
+CASH_BUCKET = 20
+# How many turns of rent income the evaluator credits to an owned property
+RENT_HORIZON = 10
+OUT = -1  # cash value of a bankrupt player
+
+
+def _put(data, index, value):
+    """Returns a copy of a bytes object with one byte replaced"""
+    return data[:index] + bytes((value,)) + data[index + 1:]
+
+
+def _with(values, index, value):
+    """Returns a copy of a tuple with one item replaced"""
+    return values[:index] + (value,) + values[index + 1:]
+
+
+class TranspositionTable:
+    """Bounded LRU map of packed state -> searched value, shared between requests"""
+
+    def __init__(self, max_size=200_000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+
+_table = TranspositionTable()
+
+
+@lru_cache(maxsize=100_000)
+def evaluate(root, cash_buckets, owner, houses):
+    """
+    Static evaluation from the point of view of player `root`:
+    net worth plus expected rent income, minus the opponents' average
+    """
+    players = len(cash_buckets)
+    alive = sum(1 for c in cash_buckets if c != OUT)
+    worth = [0.0 if c == OUT else c * CASH_BUCKET for c in cash_buckets]
+
+    for pos in PURCHASABLE_POSITIONS:
+        j = owner[pos] - 1
+        if j < 0 or cash_buckets[j] == OUT:
+            continue
+        level = houses[pos]
+        rent = RENTS[pos] * HOUSE_MULTIPLIER[level]
+        # Each opponent lands on a given square about once every 40 moves
+        income = RENT_HORIZON * rent * (alive - 1) / SIZE
+        worth[j] += PRICES[pos] + level * HOUSE_COST + income
+
+    mine = worth[root]
+    if players < 2:
+        return mine
+    return mine - (sum(worth) - mine) / (players - 1)
+
+
+def pack(game_state):
+    """
+    Packs a game state into (ids, positions, cash, jailed, owner, houses)
+    Player indexes follow the order of game_state['players']
+    """
+    players = game_state['players']
+    ids = tuple(p['id'] for p in players)
+    index_of = {pid: i for i, pid in enumerate(ids)}
+    positions = bytes(p['position'] for p in players)
+    cash = tuple(max(p['money'], 0) for p in players)
+    jailed = bytes(1 if p.get('in_jail') else 0 for p in players)
+
+    owner = bytearray(SIZE)
+    houses = bytearray(SIZE)
+    board = game_state['board']
+    for pos in PURCHASABLE_POSITIONS:
+        entry = board[pos]
+        j = index_of.get(entry['owner'])
+        if j is not None:
+            owner[pos] = j + 1
+        houses[pos] = min(entry['houses'], 5)
+
+    return ids, (positions, cash, jailed, bytes(owner), bytes(houses))
+
+
+class _Search:
+    """One decision's search, from the point of view of player `root`"""
+
+    def __init__(self, root, table):
+        self.root = root
+        self.table = table
+
+    def value(self, state, to_move, depth):
+        positions, cash, jailed, owner, houses = state
+        buckets = tuple(OUT if c == OUT else c // CASH_BUCKET for c in cash)
+        if depth == 0 or sum(1 for c in cash if c != OUT) < 2:
+            return evaluate(self.root, buckets, owner, houses)
+
+        key = (self.root, to_move, depth, positions, buckets, jailed, owner, houses)
+        cached = self.table.get(key)
+        if cached is not None:
+            return cached
+
+        value = self.turn(state, to_move, depth)
+        self.table.put(key, value)
+        return value
+
+    def turn(self, state, i, depth):
+        """Chance node: expected value over the dice of player i"""
+        positions, cash, jailed, owner, houses = state
+        if not jailed[i]:
+            return sum(p * self.land(state, i, total, depth) for total, p in DICE_SUMS)
+
+        stay = STAY_IN_JAIL * self.value(state, self.next_player(cash, i), depth - 1)
+        freed = (positions, cash, _put(jailed, i, 0), owner, houses)
+        return stay + sum(p * self.land(freed, i, total, depth) for total, p in DOUBLES)
+
+    def land(self, state, i, steps, depth):
+        """Moves player i and applies the same landing rules as handle_landing"""
+        positions, cash, jailed, owner, houses = state
+        old = positions[i]
+        pos = (old + steps) % SIZE
+        money = cash[i] + (200 if pos < old else 0)
+        kind = SPACE_TYPES[pos]
+
+        if PURCHASABLE[pos]:
+            j = owner[pos] - 1
+            if j < 0:
+                if money >= PRICES[pos]:
+                    return self.offer(state, i, pos, money, depth)
+            elif j != i and cash[j] != OUT:
+                rent = RENTS[pos] * HOUSE_MULTIPLIER[houses[pos]]
+                if money < rent:
+                    money = OUT
+                else:
+                    money -= rent
+                    cash = _with(cash, j, cash[j] + rent)
+        elif kind == 'go':
+            money += 200
+        elif kind == 'tax':
+            money = OUT if money < TAXES[pos] else money - TAXES[pos]
+        elif kind == 'go_to_jail':
+            pos = JAIL
+            jailed = _put(jailed, i, 1)
+        elif kind in ('chance', 'community_chest'):
+            money += 50
+
+        state = (_put(positions, i, pos), _with(cash, i, money), jailed, owner, houses)
+        return self.value(state, self.next_player(state[1], i), depth - 1)
+
+    def offer(self, state, i, pos, money, depth):
+        """Decision node: the root maximises, opponents follow a simple buy rule"""
+        positions, cash, jailed, owner, houses = state
+        positions = _put(positions, i, pos)
+        skip = (positions, _with(cash, i, money), jailed, owner, houses)
+        bought = (positions, _with(cash, i, money - PRICES[pos]), jailed,
+                  _put(owner, pos, i + 1), houses)
+        next_player = self.next_player(cash, i)
+
+        if i == self.root:
+            return max(self.value(skip, next_player, depth - 1),
+                       self.value(bought, next_player, depth - 1))
+        if money >= PRICES[pos] + 200:
+            return self.value(bought, next_player, depth - 1)
+        return self.value(skip, next_player, depth - 1)
+
+    @staticmethod
+    def next_player(cash, i):
+        count = len(cash)
+        for step in range(1, count + 1):
+            j = (i + step) % count
+            if cash[j] != OUT:
+                return j
+        return i
+
+
+class ExpectimaxAI:
+    """
+    Search-based computer player. Same decide_buy/decide_build hooks as
+    MonopolyAI, so /ai-move can use it as another difficulty level.
+    """
+
+    def __init__(self, depth=3, table=None):
+        self.depth = depth
+        self.table = table or _table
+
+    @instrumented('ExpectimaxAI.decide_buy')
+    def decide_buy(self, player, property_name, game_state):
+        """Returns True if buying scores better than passing"""
+        pos, prop = property_slot(game_state['board'], property_name)
+        if prop is None or prop['owner'] is not None:
+            return False
+        price = PRICES[pos]
+        if player['money'] < price:
+            return False
+
+        root, search, state, to_move = self._prepare(player, game_state)
+        positions, cash, jailed, owner, houses = state
+        bought = (positions, _with(cash, root, cash[root] - price), jailed,
+                  _put(owner, pos, root + 1), houses)
+        return search.value(bought, to_move, self.depth) > search.value(state, to_move, self.depth)
+
+    @instrumented('ExpectimaxAI.decide_build')
+    def decide_build(self, player, game_state):
+        """Returns the property whose next house scores best, or None to pass"""
+        root, search, state, to_move = self._prepare(player, game_state)
+        positions, cash, jailed, owner, houses = state
+
+        best_name = None
+        best_value = search.value(state, to_move, self.depth)
+        board = game_state['board']
+        for pos in owned_by(board, player['id']):
+            level = board[pos]['houses']
+            if level >= 5:
+                continue
+            cost = HOUSE_COST if level < 4 else HOTEL_COST
+            if player['money'] < cost:
+                continue
+            built = (positions, _with(cash, root, cash[root] - cost), jailed,
+                     owner, _put(houses, pos, houses[pos] + 1))
+            value = search.value(built, to_move, self.depth)
+            if value > best_value:
+                best_name, best_value = NAMES[pos], value
+        return best_name
+
+    def _prepare(self, player, game_state):
+        ids, state = pack(game_state)
+        root = ids.index(player['id'])
+        to_move = game_state.get('currentPlayer', 0) % len(ids)
+        return root, _Search(root, self.table), state, to_move
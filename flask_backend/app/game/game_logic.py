@@ -2,52 +2,17 @@
 Simple Monopoly Game Logic
 This file contains all the rules for how the game works
 """
+from app.game.board import (
+    JAIL, NAMES, PRICES, PURCHASABLE, RENTS, SIZE, TAXES, TYPES, property_slot,
+)
+from app.game.instrumentation import instrumented
 
-# Board space definitions - what happens when you land on each space
-BOARD_SPACES = {
-    0: {"name": "Go", "type": "go"},
-    1: {"name": "Mediterranean Avenue", "type": "property", "price": 60, "rent": 6, "color": "brown"},
-    2: {"name": "Community Chest", "type": "community_chest"},
-    3: {"name": "Baltic Avenue", "type": "property", "price": 60, "rent": 6, "color": "brown"},
-    4: {"name": "Income Tax", "type": "tax", "amount": 200},
-    5: {"name": "Reading Railroad", "type": "railroad", "price": 200, "rent": 25},
-    6: {"name": "Oriental Avenue", "type": "property", "price": 100, "rent": 10, "color": "light_blue"},
-    7: {"name": "Chance", "type": "chance"},
-    8: {"name": "Vermont Avenue", "type": "property", "price": 100, "rent": 10, "color": "light_blue"},
-    9: {"name": "Connecticut Avenue", "type": "property", "price": 120, "rent": 12, "color": "light_blue"},
-    10: {"name": "Jail", "type": "jail"},
-    11: {"name": "St. Charles Place", "type": "property", "price": 140, "rent": 14, "color": "pink"},
-    12: {"name": "Electric Company", "type": "utility", "price": 150},
-    13: {"name": "States Avenue", "type": "property", "price": 140, "rent": 14, "color": "pink"},
-    14: {"name": "Virginia Avenue", "type": "property", "price": 160, "rent": 16, "color": "pink"},
-    15: {"name": "Pennsylvania Railroad", "type": "railroad", "price": 200, "rent": 25},
-    16: {"name": "St. James Place", "type": "property", "price": 180, "rent": 18, "color": "orange"},
-    17: {"name": "Community Chest", "type": "community_chest"},
-    18: {"name": "Tennessee Avenue", "type": "property", "price": 180, "rent": 18, "color": "orange"},
-    19: {"name": "New York Avenue", "type": "property", "price": 200, "rent": 20, "color": "orange"},
-    20: {"name": "Free Parking", "type": "free_parking"},
-    21: {"name": "Kentucky Avenue", "type": "property", "price": 220, "rent": 22, "color": "red"},
-    22: {"name": "Chance", "type": "chance"},
-    23: {"name": "Indiana Avenue", "type": "property", "price": 220, "rent": 22, "color": "red"},
-    24: {"name": "Illinois Avenue", "type": "property", "price": 240, "rent": 24, "color": "red"},
-    25: {"name": "B&O Railroad", "type": "railroad", "price": 200, "rent": 25},
-    26: {"name": "Atlantic Avenue", "type": "property", "price": 260, "rent": 26, "color": "yellow"},
-    27: {"name": "Ventnor Avenue", "type": "property", "price": 260, "rent": 26, "color": "yellow"},
-    28: {"name": "Water Works", "type": "utility", "price": 150},
-    29: {"name": "Marvin Gardens", "type": "property", "price": 280, "rent": 28, "color": "yellow"},
-    30: {"name": "Go to Jail", "type": "go_to_jail"},
-    31: {"name": "Pacific Avenue", "type": "property", "price": 300, "rent": 30, "color": "green"},
-    32: {"name": "North Carolina Avenue", "type": "property", "price": 300, "rent": 30, "color": "green"},
-    33: {"name": "Community Chest", "type": "community_chest"},
-    34: {"name": "Pennsylvania Avenue", "type": "property", "price": 320, "rent": 32, "color": "green"},
-    35: {"name": "Short Line", "type": "railroad", "price": 200, "rent": 25},
-    36: {"name": "Chance", "type": "chance"},
-    37: {"name": "Park Place", "type": "property", "price": 350, "rent": 35, "color": "dark_blue"},
-    38: {"name": "Luxury Tax", "type": "tax", "amount": 100},
-    39: {"name": "Boardwalk", "type": "property", "price": 400, "rent": 50, "color": "dark_blue"}
-}
 
+def _space_type(player, position, game_state):
+    return TYPES[position] if 0 <= position < SIZE else 'unknown'
 
+
+@instrumented('handle_landing', label=_space_type)
 def handle_landing(player, position, game_state):
     """
     Handles what happens when a player lands on a space.
@@ -55,40 +20,30 @@ def handle_landing(player, position, game_state):
     - messages: list of strings describing what happened
     - actions: dict with actions the player can take (e.g., can_buy, bankrupt)
     """
-    space = BOARD_SPACES.get(position)
-    if not space:
+    if not 0 <= position < SIZE:
         return (["Landed on unknown space"], {})
 
-    messages = [f"{player['name']} landed on {space['name']}"]
+    name = NAMES[position]
+    messages = [f"{player['name']} landed on {name}"]
     actions = {}
 
-    space_type = space.get('type')
-
-    # Ensure board entry exists
-    board = game_state['board']
-    if space_type in ['property', 'railroad', 'utility']:
-        property_data = board.get(space['name'])
-        if not property_data:
-            property_data = {
-                'position': position,
-                'price': space['price'],
-                'owner': None,
-                'houses': 0,
-                'type': space_type
-            }
-            board[space['name']] = property_data
+    space_type = TYPES[position]
+
+    if PURCHASABLE[position]:
+        property_data = game_state['board'][position]
+        price = PRICES[position]
 
         if property_data['owner'] is None:
-            if player['money'] >= space['price']:
+            if player['money'] >= price:
                 actions['can_buy'] = {
-                    'property': space['name'],
-                    'price': space['price']
+                    'property': name,
+                    'price': price
                 }
-                messages.append(f"You can buy {space['name']} for ${space['price']}")
+                messages.append(f"You can buy {name} for ${price}")
             else:
-                messages.append(f"{space['name']} costs ${space['price']} but you only have ${player['money']}")
+                messages.append(f"{name} costs ${price} but you only have ${player['money']}")
         elif property_data['owner'] != player['id']:
-            rent = calculate_rent(space, property_data, game_state)
+            rent = calculate_rent(position, property_data, game_state)
             owner = next((p for p in game_state['players'] if p['id'] == property_data['owner']), None)
             if owner:
                 if player['money'] >= rent:
@@ -104,7 +59,7 @@ def handle_landing(player, position, game_state):
         messages.append("Collect $200 for landing on Go!")
 
     elif space_type == 'tax':
-        tax_amount = space['amount']
+        tax_amount = TAXES[position]
         if player['money'] >= tax_amount:
             player['money'] -= tax_amount
             messages.append(f"Paid ${tax_amount} in taxes")
@@ -113,7 +68,7 @@ def handle_landing(player, position, game_state):
             actions['bankrupt'] = True
 
     elif space_type == 'go_to_jail':
-        player['position'] = 10  # Jail position
+        player['position'] = JAIL
         player['in_jail'] = True
         player['jail_turns'] = 0
         messages.append("Go directly to Jail! Do not pass Go, do not collect $200")
@@ -131,12 +86,13 @@ def handle_landing(player, position, game_state):
 
     return messages, actions
 
-def calculate_rent(space, property_data, game_state):
+@instrumented('calculate_rent', label=lambda position, property_data, game_state: str(property_data.get('houses', 0)))
+def calculate_rent(position, property_data, game_state):
     """
-    Calculates how much rent to charge
+    Calculates how much rent to charge for the space at `position`
     Rent increases with houses/hotels
     """
-    base_rent = space.get('rent', 0)
+    base_rent = RENTS[position]
     houses = property_data.get('houses', 0)
     
     # Each house doubles the rent
@@ -156,10 +112,10 @@ def calculate_rent(space, property_data, game_state):
 
 def can_build_house(player, property_name, game_state):
     """
-    Checks if a player can build a house on a property
+    Checks if a player can build a house on a property (name or position)
     Returns: (can_build, reason)
     """
-    property_data = game_state['board'].get(property_name)
+    _, property_data = property_slot(game_state['board'], property_name)
     
     if not property_data:
         return (False, "Property doesn't exist")
@@ -177,6 +133,7 @@ def can_build_house(player, property_name, game_state):
     return (True, "Can build")
 
 
+@instrumented('handle_jail')
 def handle_jail(player, dice_roll):
     """
     Handles jail logic
@@ -213,6 +170,7 @@ def handle_jail(player, dice_roll):
     return (False, messages)
 
 
+@instrumented('check_winner')
 def check_winner(game_state):
     """
     Checks if there's a winner (only one player left with money)
@@ -224,3 +182,52 @@ def check_winner(game_state):
         return active_players[0]
     
     return None
+
+
+def play_turn(player, dice_roll, game_state):
+    """
+    Plays one roll for a player: jail, moving, passing Go, landing,
+    bankruptcy and passing the turn to the next player
+    Returns: (messages, actions)
+    """
+    messages = []
+
+    # Jail check
+    can_move, jail_messages = handle_jail(player, dice_roll)
+    messages.extend(jail_messages)
+
+    if not can_move:
+        game_state['currentPlayer'] = (game_state['currentPlayer'] + 1) % len(game_state['players'])
+        game_state['turn'] += 1
+        return messages, {}
+
+    # Move player
+    old_position = player['position']
+    move_spaces = sum(dice_roll)
+    new_position = (old_position + move_spaces) % SIZE
+    player['position'] = new_position
+
+    if new_position < old_position:
+        player['money'] += 200
+        messages.append(f"{player['name']} passed Go! Collected $200")
+
+    # Handle landing
+    landing_messages, actions = handle_landing(player, new_position, game_state)
+    messages.extend(landing_messages)
+
+    # Bankrupt check
+    if actions.get('bankrupt'):
+        game_state['players'] = [p for p in game_state['players'] if p['id'] != player['id']]
+        messages.append(f"{player['name']} is out of the game!")
+
+        winner = check_winner(game_state)
+        if winner:
+            messages.append(f"🎉 {winner['name']} wins the game!")
+            game_state['winner'] = winner['id']
+
+    # Advance turn
+    if len(game_state['players']) > 1:
+        game_state['currentPlayer'] = (game_state['currentPlayer'] + 1) % len(game_state['players'])
+        game_state['turn'] += 1
+
+    return messages, actions
@@ -0,0 +1,66 @@
+"""
+Engine instrumentation
+Counters and timers around the game_logic and AI hot paths. Disabled by
+default: a wrapped call then costs one flag check. When enabled, every call
+is counted and one call in `sample_every` is timed.
+"""
+import functools
+import itertools
+import time
+
+from app.metrics import metrics
+
+_enabled = False
+_sample_every = 1
+_ticks = itertools.count()
+
+calls_total = metrics.counter(
+    'engine_calls_total', "Calls into game_logic and AI functions", ('function', 'label'))
+call_seconds = metrics.histogram(
+    'engine_call_seconds', "Sampled duration of game_logic and AI calls", ('function', 'label'))
+
+
+def configure(enabled=False, sample_every=1):
+    """Turns instrumentation on/off; sample_every=10 times one call in ten"""
+    global _enabled, _sample_every
+    _sample_every = max(int(sample_every), 1)
+    _enabled = bool(enabled)
+
+
+def is_enabled():
+    return _enabled
+
+
+def instrumented(name, label=None):
+    """
+    Wraps a function with a counter and a sampled timer
+    `label` is an optional function of the call's arguments that splits the
+    stats, e.g. by space type; it is only called when instrumentation is on.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+
+            tag = label(*args, **kwargs) if label else ''
+            calls_total(name, tag)
+            if next(_ticks) % _sample_every:
+                return fn(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                call_seconds(name, tag).record(time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def report():
+    """Call counts and sampled timings collected so far"""
+    snapshot = metrics.snapshot()
+    return {
+        'calls': snapshot.get('engine_calls_total', []),
+        'timings': snapshot.get('engine_call_seconds', []),
+    }
@@ -0,0 +1,240 @@
+"""
+Monte Carlo rollout AI
+Scores buy/build/pass by playing short random games from the current state
+through game_logic, within a fixed time budget per decision
+"""
+import math
+import random
+import threading
+import time
+
+from app.game import instrumentation
+from app.game.instrumentation import instrumented
+from app.game.board import NAMES, PRICES, PURCHASABLE_POSITIONS, SIZE, owned_by, property_slot
+from app.game.game_logic import handle_jail, handle_landing
+
+HOUSE_COST = 100
+HOTEL_COST = 500
+
+# z-score for the confidence bound used to stop early (~95%)
+CONFIDENCE_Z = 1.96
+
+_local = threading.local()
+
+
+def build_cost(houses):
+    """Same pricing MonopolyAI uses: houses cost 100, the hotel costs 500"""
+    return HOUSE_COST if houses < 4 else HOTEL_COST
+
+
+class RolloutSimulator:
+    """
+    Plays random turns on a private copy of a game state.
+    One simulator lives per thread so its RNG is never shared between requests.
+    """
+
+    def __init__(self):
+        self.rng = random.Random()
+        self.seeds = random.Random()
+        self.rollouts = 0
+
+    @staticmethod
+    def clone(game_state):
+        """Copies the parts of the state that a rollout mutates"""
+        players = []
+        for p in game_state['players']:
+            copy = dict(p)
+            copy['properties'] = list(p.get('properties', []))
+            players.append(copy)
+        board = [entry and dict(entry) for entry in game_state['board']]
+        return {
+            'players': players,
+            'board': board,
+            'currentPlayer': game_state.get('currentPlayer', 0),
+        }
+
+    def rollout(self, state, player_id, seed, horizon):
+        """
+        Plays `horizon` rounds from `state` (modified in place) and
+        returns the score of `player_id` at the end
+        """
+        self.rollouts += 1
+        rng = self.rng
+        rng.seed(seed)
+        players = state['players']
+        board = state['board']
+        index = state['currentPlayer']
+
+        for _ in range(horizon * len(players)):
+            if len(players) < 2:
+                break
+            index %= len(players)
+            player = players[index]
+            dice = (rng.randint(1, 6), rng.randint(1, 6))
+
+            can_move, _ = handle_jail(player, dice)
+            if not can_move:
+                index += 1
+                continue
+
+            old_position = player['position']
+            new_position = (old_position + dice[0] + dice[1]) % SIZE
+            player['position'] = new_position
+            if new_position < old_position:
+                player['money'] += 200
+
+            _, actions = handle_landing(player, new_position, state)
+            if actions.get('bankrupt'):
+                players.pop(index)
+                continue
+
+            offer = actions.get('can_buy')
+            # Rollout policy: buy whenever it leaves a small cushion
+            if offer and player['money'] >= offer['price'] + 200:
+                player['money'] -= offer['price']
+                board[new_position]['owner'] = player['id']
+                player['properties'].append(offer['property'])
+            index += 1
+
+        return score(state, player_id)
+
+    def report(self):
+        """Rollouts played on this thread plus the engine instrumentation stats"""
+        return {'rollouts': self.rollouts, 'engine': instrumentation.report()}
+
+
+def score(state, player_id):
+    """Net worth of the player minus the average net worth of the others"""
+    worth = {p['id']: p['money'] for p in state['players']}
+    board = state['board']
+    for pos in PURCHASABLE_POSITIONS:
+        entry = board[pos]
+        if entry['owner'] in worth:
+            worth[entry['owner']] += PRICES[pos] + entry['houses'] * HOUSE_COST
+
+    mine = worth.pop(player_id, 0)
+    if not worth:
+        return float(mine)
+    return mine - sum(worth.values()) / len(worth)
+
+
+def get_simulator():
+    """Returns this thread's simulator, creating it on first use"""
+    simulator = getattr(_local, 'simulator', None)
+    if simulator is None:
+        simulator = _local.simulator = RolloutSimulator()
+    return simulator
+
+
+class _OptionStats:
+    """Running mean/variance (Welford) of the rollout scores of one option"""
+
+    __slots__ = ('count', 'mean', 'm2')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def half_width(self):
+        if self.count < 2:
+            return math.inf
+        variance = self.m2 / (self.count - 1)
+        return CONFIDENCE_Z * math.sqrt(variance / self.count)
+
+
+class RolloutAI:
+    """
+    Stronger computer player. Each option (buy, build on X, pass) is applied to a
+    copy of the state and scored by random playouts. Options share the same
+    seeds each round so they are compared on identical dice.
+    """
+
+    def __init__(self, budget_ms=50, horizon=12, min_rounds=8, max_rounds=500):
+        self.budget_ms = budget_ms
+        self.horizon = horizon
+        self.min_rounds = min_rounds
+        self.max_rounds = max_rounds
+
+    @instrumented('RolloutAI.decide_buy')
+    def decide_buy(self, player, property_name, game_state):
+        """Returns True if buying beats passing"""
+        pos, prop = property_slot(game_state['board'], property_name)
+        if prop is None or prop['owner'] is not None:
+            return False
+        price = PRICES[pos]
+        if player['money'] < price:
+            return False
+
+        def buy(state, me):
+            me['money'] -= price
+            state['board'][pos]['owner'] = me['id']
+            me['properties'].append(NAMES[pos])
+
+        options = {'pass': None, 'buy': buy}
+        return self._choose(player, game_state, options) == 'buy'
+
+    @instrumented('RolloutAI.decide_build')
+    def decide_build(self, player, game_state):
+        """Returns the property to build on, or None to pass"""
+        options = {'pass': None}
+        board = game_state['board']
+        for pos in owned_by(board, player['id']):
+            houses = board[pos]['houses']
+            if houses >= 5 or player['money'] < build_cost(houses):
+                continue
+            options[NAMES[pos]] = self._build_option(pos, houses)
+
+        if len(options) == 1:
+            return None
+        choice = self._choose(player, game_state, options)
+        return None if choice == 'pass' else choice
+
+    @staticmethod
+    def _build_option(position, houses):
+        cost = build_cost(houses)
+
+        def build(state, me):
+            me['money'] -= cost
+            state['board'][position]['houses'] = houses + 1
+        return build
+
+    def _choose(self, player, game_state, options):
+        """Runs rounds of rollouts until the best option is separated or time is up"""
+        simulator = get_simulator()
+        deadline = time.perf_counter() + self.budget_ms / 1000.0
+        stats = {name: _OptionStats() for name in options}
+        player_id = player['id']
+
+        for rounds in range(1, self.max_rounds + 1):
+            seed = simulator.seeds.getrandbits(32)
+            for name, apply in options.items():
+                state = simulator.clone(game_state)
+                if apply:
+                    me = next(p for p in state['players'] if p['id'] == player_id)
+                    apply(state, me)
+                stats[name].add(simulator.rollout(state, player_id, seed, self.horizon))
+
+            if rounds >= self.min_rounds and _separated(stats):
+                break
+            if time.perf_counter() >= deadline:
+                break
+
+        return max(stats, key=lambda name: stats[name].mean)
+
+
+def _separated(stats):
+    """True when the best option's lower bound clears every other upper bound"""
+    best = max(stats.values(), key=lambda s: s.mean)
+    lower = best.mean - best.half_width()
+    return all(
+        s.mean + s.half_width() < lower
+        for s in stats.values() if s is not best
+    )
+
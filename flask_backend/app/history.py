@@ -0,0 +1,179 @@
+"""
+Undo/redo
+Every change to a game's state is recorded as a delta: the values it
+replaced and the values it wrote, for just the board slots, players and
+top-level keys that changed. The last HISTORY_SIZE deltas per game are
+kept in a ring buffer in Game.history, written in the same commit as the
+state. Undo applies the newest delta in reverse and redo applies it again,
+so neither copies or rewrites the whole state. Changes already counted in
+the user stats (a bankruptcy, see app/stats.py) are sealed: nothing before
+them can be undone, as with finished games.
+
+Ops in a delta:
+  ['s', path, before, after]   value replaced
+  ['a', path, after]           key added
+  ['r', path, before]          key removed
+where path is a top-level key, or [key, index] for one board slot or player.
+"""
+from collections import deque
+from contextlib import contextmanager
+
+from flask import current_app
+from sqlalchemy.orm.attributes import flag_modified
+
+from app.db import db
+
+# Lists diffed item by item when their length is unchanged
+ITEMIZED = ('board', 'players')
+
+
+class Conflict(Exception):
+    """The state no longer holds what the delta expects"""
+
+
+def _copy(value):
+    """Copy of a JSON value, faster than deepcopy"""
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    return value
+
+
+def diff(before, after):
+    """Delta turning state `before` into state `after`"""
+    ops = []
+    for key, old in before.items():
+        if key not in after:
+            ops.append(['r', key, old])
+            continue
+        new = after[key]
+        if old == new:
+            continue
+        if key in ITEMIZED and isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+            ops.extend(['s', [key, i], a, b] for i, (a, b) in enumerate(zip(old, new)) if a != b)
+        else:
+            ops.append(['s', key, old, new])
+    for key, new in after.items():
+        if key not in before:
+            ops.append(['a', key, new])
+    return ops
+
+
+def _get(state, path):
+    if isinstance(path, list):
+        return state[path[0]][path[1]]
+    return state[path]
+
+
+def _set(state, path, value):
+    if isinstance(path, list):
+        state[path[0]][path[1]] = _copy(value)
+    else:
+        state[path] = _copy(value)
+
+
+def apply(state, delta, reverse=False):
+    """
+    Applies a delta to `state` in place, or its reverse. Raises Conflict,
+    leaving the state untouched, if a value it replaces has changed since.
+    """
+    missing = object()
+    steps = []
+    for op in (reversed(delta) if reverse else delta):
+        kind, path = op[0], op[1]
+        if kind == 's':
+            expected, value = (op[3], op[2]) if reverse else (op[2], op[3])
+        elif kind == 'a':
+            expected, value = (op[2], missing) if reverse else (missing, op[2])
+        else:
+            expected, value = (missing, op[2]) if reverse else (op[2], missing)
+
+        try:
+            current = _get(state, path)
+        except (KeyError, IndexError, TypeError):
+            current = missing
+        if current != expected:
+            raise Conflict(path)
+        steps.append((path, value))
+
+    for path, value in steps:
+        if value is missing:
+            del state[path]
+        else:
+            _set(state, path, value)
+
+
+class History:
+    """The two rings of a game, loaded from and saved to Game.history"""
+
+    def __init__(self, stored, size):
+        stored = stored or {}
+        self.undo = deque(stored.get('u', ()), maxlen=size)
+        self.redo = deque(stored.get('r', ()), maxlen=size)
+
+    def dump(self):
+        return {'u': list(self.undo), 'r': list(self.redo)}
+
+
+def load(game):
+    return History(game.history, current_app.config['HISTORY_SIZE'])
+
+
+def save(game, history):
+    game.history = history.dump()
+
+
+def record(game, before):
+    """Records the change from `before` to the game's current state; caller commits"""
+    delta = diff(before, game.state)
+    if not delta:
+        return
+    # Loading the deferred column must not flush the new state in an UPDATE of its own
+    with db.session.no_autoflush:
+        history = load(game)
+    history.undo.append(delta)
+    # A new change ends the redo chain, as in any editor
+    history.redo.clear()
+    save(game, history)
+
+
+def seal(game):
+    """Makes the recorded changes final: they can no longer be undone; caller commits"""
+    if not current_app.config['HISTORY_SIZE']:
+        return
+    with db.session.no_autoflush:
+        history = load(game)
+    history.undo.clear()
+    history.redo.clear()
+    save(game, history)
+
+
+@contextmanager
+def tracked(*games):
+    """Records whatever the body changes in the games' states (nothing if it raises)"""
+    if not current_app.config['HISTORY_SIZE']:
+        yield
+        return
+    before = [_copy(game.state) for game in games]
+    yield
+    for game, state in zip(games, before):
+        record(game, state)
+
+
+def step(game, undo):
+    """
+    Undoes (or redoes) the last change. Returns False when there is nothing
+    to undo; raises Conflict when the state has moved on. Caller commits.
+    """
+    history = load(game)
+    source, target = (history.undo, history.redo) if undo else (history.redo, history.undo)
+    if not source:
+        return False
+    delta = source[-1]
+    apply(game.state, delta, reverse=undo)
+    flag_modified(game, 'state')
+    source.pop()
+    target.append(delta)
+    save(game, history)
+    return True
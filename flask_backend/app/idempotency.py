@@ -0,0 +1,239 @@
+"""
+Idempotency keys for mutating game routes
+A request with an `Idempotency-Key` header runs once per (user, key); a
+retry gets the stored response back without touching the database or the
+engine. A retry that arrives while the first request is still running
+waits for its response. Reusing a key for a different request is a 422.
+A claim is a lease: if the first request has not finished after
+IDEMPOTENCY_LEASE_MS (its worker died), the next request with the key runs.
+Responses are kept IDEMPOTENCY_TTL seconds, in this process or in a SQLite
+file shared by the workers (IDEMPOTENCY_BACKEND=sqlite).
+"""
+import functools
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, current_app, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+
+from app.metrics import metrics
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+replays_total = metrics.counter(
+    'idempotency_replays_total', "Retries answered from the idempotency store", ('endpoint',))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    status INTEGER,
+    body BLOB,
+    content_type TEXT,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class _Entry:
+    __slots__ = ('fingerprint', 'response', 'created_at', 'done')
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.response = None
+        self.created_at = time.monotonic()
+        self.done = threading.Event()
+
+
+class LocalStore:
+    """Bounded LRU of key -> stored response, entries expire after `ttl` seconds"""
+
+    def __init__(self, ttl, lease, max_entries=50_000):
+        self.ttl = ttl
+        self.lease = lease
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def begin(self, key, fingerprint, wait):
+        """
+        Claims `key` for a new request, or returns what a previous one left:
+        ('run', None), ('replay', (status, body, content_type)),
+        ('conflict', None) for a different request, ('busy', None)
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            age = time.monotonic() - entry.created_at if entry else None
+            if entry is None or age > self.ttl or (not entry.done.is_set() and age > self.lease):
+                self.entries[key] = _Entry(fingerprint)
+                self.entries.move_to_end(key)
+                if len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+                return 'run', None
+        if entry.fingerprint != fingerprint:
+            return 'conflict', None
+        if not entry.done.wait(wait) or entry.response is None:
+            return 'busy', None
+        return 'replay', entry.response
+
+    def finish(self, key, status, body, content_type):
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry:
+            entry.response = (status, body, content_type)
+            entry.done.set()
+
+    def abandon(self, key):
+        """Forgets a claim whose request failed, so a retry runs again"""
+        with self.lock:
+            entry = self.entries.pop(key, None)
+        if entry:
+            entry.done.set()
+
+
+class SQLiteStore:
+    """Same interface as LocalStore, in a SQLite file shared by all workers on the host"""
+
+    poll_interval = 0.05
+
+    def __init__(self, path, ttl, lease):
+        self.path = path
+        self.ttl = ttl
+        self.lease = lease
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def begin(self, key, fingerprint, wait):
+        deadline = time.time() + wait
+        conn = self._connect()
+        try:
+            while True:
+                now = time.time()
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+                row = conn.execute(
+                    "SELECT fingerprint, status, body, content_type, created_at FROM responses "
+                    "WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                if row is not None and row[1] is None and row[4] < now - self.lease:
+                    # The claim's lease ran out: its request died without finishing
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    row = None
+                if row is None:
+                    # created_at is the claim time until the response is stored
+                    conn.execute(
+                        "INSERT INTO responses (key, fingerprint, created_at) VALUES (?, ?, ?)",
+                        (key, fingerprint, now),
+                    )
+                conn.execute("COMMIT")
+
+                if row is None:
+                    return 'run', None
+                if row[0] != fingerprint:
+                    return 'conflict', None
+                if row[1] is not None:
+                    return 'replay', (row[1], row[2], row[3])
+                if time.time() >= deadline:
+                    return 'busy', None
+                time.sleep(self.poll_interval)
+        finally:
+            conn.close()
+
+    def finish(self, key, status, body, content_type):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE responses SET status = ?, body = ?, content_type = ? WHERE key = ?",
+                (status, body, content_type, key),
+            )
+        finally:
+            conn.close()
+
+    def abandon(self, key):
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        finally:
+            conn.close()
+
+
+class Idempotency:
+    """Initialised like the other extensions"""
+
+    def __init__(self):
+        self.store = None
+
+    def init_app(self, app):
+        config = app.config
+        lease = config['IDEMPOTENCY_LEASE_MS'] / 1000
+        if config['IDEMPOTENCY_BACKEND'] == 'sqlite':
+            self.store = SQLiteStore(config['IDEMPOTENCY_URL'], config['IDEMPOTENCY_TTL'], lease)
+        else:
+            self.store = LocalStore(config['IDEMPOTENCY_TTL'], lease)
+        app.extensions['idempotency'] = self
+
+
+idempotency = Idempotency()
+
+
+def _fingerprint():
+    """Same key must mean same request: method, path and body"""
+    digest = hashlib.sha256(f'{request.method} {request.path}\n'.encode())
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+def idempotent(fn):
+    """
+    Honours the Idempotency-Key header on a mutating route
+    Goes below @jwt_required() and above @admitted, so replays skip admission.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return fn(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({'error': f'{HEADER} is too long'}), 400
+
+        store = idempotency.store
+        scoped_key = f'{get_jwt_identity()}\n{key}'
+        outcome, stored = store.begin(scoped_key, _fingerprint(),
+                                      current_app.config['IDEMPOTENCY_WAIT_MS'] / 1000)
+        if outcome == 'conflict':
+            return jsonify({'error': f'{HEADER} was already used for a different request'}), 422
+        if outcome == 'busy':
+            response = jsonify({'error': 'The original request is still in progress'})
+            response.status_code = 409
+            response.headers['Retry-After'] = '1'
+            return response
+        if outcome == 'replay':
+            replays_total(request.endpoint)
+            status, body, content_type = stored
+            response = Response(body, status=status, content_type=content_type)
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+
+        try:
+            response = make_response(fn(*args, **kwargs))
+        except Exception:
+            store.abandon(scoped_key)
+            raise
+        # Server errors and throttling are not results: let the retry run again
+        if response.status_code >= 500 or response.status_code == 429:
+            store.abandon(scoped_key)
+        else:
+            store.finish(scoped_key, response.status_code, response.get_data(), response.content_type)
+        return response
+    return wrapper
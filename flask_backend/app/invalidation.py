@@ -0,0 +1,320 @@
+"""
+Cache invalidation bus
+Every committed change to a game or user bumps the version of its key
+(`game:<id>`, `user:<id>`; `leaderboard` for stats and buckets) and the
+bump is broadcast to every worker process, so in-process caches
+(VersionedCache) drop exactly the entries that changed. Transports:
+  local   in-process only (single worker, tests)
+  sqlite  change log in a shared SQLite file, polled by each process
+  redis   INCR + PUBLISH on a Redis-compatible server
+
+Keys are collected from the ORM objects a flush writes. Core statements
+(insert/update/delete) are not seen: code that changes keyed rows with
+them calls invalidate() before committing (stats buckets and rebuild,
+import). Players and game_player links have no key of their own, so the
+bulk player deletes of delete_game and the sweeper publish nothing.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS changes (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class LocalTransport:
+    """Bumps are only seen by this process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = 0
+
+    def start(self, deliver):
+        self.deliver = deliver
+
+    def publish(self, keys):
+        with self.lock:
+            self.version += 1
+            version = self.version
+        for key in keys:
+            self.deliver(key, version)
+
+    def stop(self):
+        pass
+
+
+class SQLiteTransport:
+    """
+    Change log table in a SQLite file shared by all workers on the host.
+    The row id is the new version; each process polls for rows past the
+    last one it has seen, and old rows are pruned after `retention` seconds.
+    """
+
+    def __init__(self, path, poll_interval=0.2, retention=3600):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def start(self, deliver):
+        self.deliver = deliver
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+            # Only changes from now on matter to a fresh process
+            self.last_seen = conn.execute("SELECT COALESCE(MAX(version), 0) FROM changes").fetchone()[0]
+        finally:
+            conn.close()
+        self.thread = threading.Thread(target=self._poll, name="invalidation-poll", daemon=True)
+        self.thread.start()
+
+    def publish(self, keys):
+        conn = self._connect()
+        try:
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            versions = [
+                conn.execute("INSERT INTO changes (key, created_at) VALUES (?, ?)", (key, now)).lastrowid
+                for key in keys
+            ]
+            conn.execute("DELETE FROM changes WHERE created_at < ?", (now - self.retention,))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        # The publishing process doesn't wait for its own poll
+        for key, version in zip(keys, versions):
+            self.deliver(key, version)
+
+    def _poll(self):
+        conn = self._connect()
+        try:
+            while not self.stopping.wait(self.poll_interval):
+                try:
+                    rows = conn.execute(
+                        "SELECT version, key FROM changes WHERE version > ? ORDER BY version",
+                        (self.last_seen,),
+                    ).fetchall()
+                except sqlite3.Error:
+                    logger.exception("Polling the invalidation log failed")
+                    continue
+                for version, key in rows:
+                    self.deliver(key, version)
+                    self.last_seen = version
+        finally:
+            conn.close()
+
+    def stop(self):
+        self.stopping.set()
+        if self.thread:
+            self.thread.join()
+
+
+class RedisTransport:
+    """
+    Versions are Redis counters (INCR version:<key>) and bumps go out on a
+    pub/sub channel. Needs the `redis` package, or any client object with
+    the same incr/publish/pubsub methods (e.g. a local stand-in).
+    """
+
+    def __init__(self, url=None, channel='invalidation', client=None):
+        if client is None:
+            try:
+                import redis
+            except ImportError as exc:
+                raise RuntimeError("INVALIDATION_BACKEND=redis needs the 'redis' package") from exc
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.channel = channel
+        self.listener = None
+
+    def start(self, deliver):
+        self.deliver = deliver
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self.channel: self._on_message})
+        self.listener = pubsub.run_in_thread(sleep_time=0.1, daemon=True)
+
+    def _on_message(self, message):
+        data = message['data']
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        key, _, version = data.rpartition(' ')
+        self.deliver(key, int(version))
+
+    def publish(self, keys):
+        for key in keys:
+            version = self.client.incr(f'version:{key}')
+            self.client.publish(self.channel, f'{key} {version}')
+
+    def stop(self):
+        if self.listener:
+            self.listener.stop()
+
+
+class InvalidationBus:
+    """
+    Latest known version per key, kept current by the transport, plus
+    callbacks that run on every bump, initialised like the other extensions
+    """
+
+    def __init__(self):
+        self.transport = None
+        self.versions = {}
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.pid = None
+
+    def init_app(self, app):
+        config = app.config
+        backend = config['INVALIDATION_BACKEND']
+        if backend == 'sqlite':
+            self.transport = SQLiteTransport(config['INVALIDATION_URL'],
+                                             poll_interval=config['INVALIDATION_POLL_MS'] / 1000)
+        elif backend == 'redis':
+            self.transport = RedisTransport(config['INVALIDATION_URL'])
+        elif backend == 'local':
+            self.transport = LocalTransport()
+        else:
+            raise ValueError(f"Unknown INVALIDATION_BACKEND {backend!r}")
+        self.pid = None
+        app.extensions['invalidation'] = self
+
+    def _ensure_started(self):
+        # Started on first use, so forked workers each get their own poller
+        if self.pid == os.getpid() or self.transport is None:
+            return
+        with self.lock:
+            if self.pid != os.getpid():
+                self.transport.start(self._deliver)
+                self.pid = os.getpid()
+
+    def _deliver(self, key, version):
+        with self.lock:
+            if version <= self.versions.get(key, 0):
+                return
+            self.versions[key] = version
+            subscribers = list(self.subscribers)
+        for callback in subscribers:
+            try:
+                callback(key, version)
+            except Exception:
+                logger.exception("Invalidation subscriber failed for %s", key)
+
+    def subscribe(self, callback):
+        """callback(key, version) runs on every bump, on the transport's thread"""
+        with self.lock:
+            self.subscribers.append(callback)
+        self._ensure_started()
+
+    def version(self, key):
+        """Latest version of `key` this process knows about (0 = never changed)"""
+        self._ensure_started()
+        return self.versions.get(key, 0)
+
+    def publish(self, *keys):
+        """Bumps the given keys everywhere"""
+        if not keys or self.transport is None:
+            return
+        self._ensure_started()
+        self.transport.publish(list(dict.fromkeys(keys)))
+
+
+bus = InvalidationBus()
+
+
+class VersionedCache:
+    """
+    Bounded LRU whose entries are dropped when their key's version moves on.
+    Fill with the version read *before* loading the value, so a change that
+    lands during the load makes the entry stale instead of hiding it.
+    """
+
+    def __init__(self, max_size=1000, source=None):
+        self.max_size = max_size
+        self.bus = source or bus
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.bus.subscribe(self._evict)
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            version, value = entry
+            if version != self.bus.version(key):
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value, version):
+        with self.lock:
+            self.entries[key] = (version, value)
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def _evict(self, key, version):
+        with self.lock:
+            self.entries.pop(key, None)
+
+
+def invalidate(session, *keys):
+    """Bumps `keys` when the session commits, for changes made with Core statements"""
+    session.info.setdefault('invalidate', set()).update(keys)
+
+
+def _keys_for(obj):
+    """Invalidation keys touched by a changed ORM object"""
+    from app.model import Game, GameArchive, LeaderboardBucket, User, UserStats
+
+    if isinstance(obj, (Game, GameArchive)):
+        return (f'game:{obj.id}',)
+    if isinstance(obj, User):
+        # The leaderboard shows usernames
+        return (f'user:{obj.id}', 'leaderboard')
+    if isinstance(obj, UserStats):
+        return (f'user:{obj.user_id}', 'leaderboard')
+    if isinstance(obj, LeaderboardBucket):
+        return ('leaderboard',)
+    return ()
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect(session, flush_context):
+    keys = session.info.setdefault('invalidate', set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        keys.update(_keys_for(obj))
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish(session):
+    keys = session.info.pop('invalidate', None)
+    if keys:
+        try:
+            bus.publish(*sorted(keys))
+        except Exception:
+            # The data is committed; a lost bump only means a stale cache entry
+            logger.exception("Publishing invalidations failed")
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard(session):
+    session.info.pop('invalidate', None)
@@ -0,0 +1,4 @@
+from .queue import JobQueue
+from .worker import WorkerPool
+
+job_queue = JobQueue()
@@ -0,0 +1,35 @@
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.jobs import job_queue, WorkerPool
+
+jobs_cli = AppGroup('jobs', help="Background job queue")
+
+
+@jobs_cli.command('worker')
+@click.option('--concurrency', type=int, default=None, help="Worker threads (default: JOB_CONCURRENCY)")
+def worker(concurrency):
+    """Runs a worker pool until interrupted"""
+    concurrency = concurrency or current_app.config['JOB_CONCURRENCY']
+    recovered = job_queue.requeue_expired()
+    if recovered:
+        click.echo(f"Re-queued {recovered} job(s) whose worker stopped renewing its lease")
+
+    pool = WorkerPool(current_app._get_current_object(), job_queue, concurrency)
+    pool.start()
+    click.echo(f"Worker pool running with {concurrency} thread(s), Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pool.stop()
+
+
+@jobs_cli.command('status')
+def status():
+    """Prints the number of jobs per status"""
+    for name, count in job_queue.stats().items():
+        click.echo(f"{name}: {count}")
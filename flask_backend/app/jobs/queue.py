@@ -0,0 +1,166 @@
+"""
+Persistent job queue
+Jobs are stored in a local SQLite file so they survive restarts and can be
+shared between the web process and separate worker processes.
+Jobs for the same game always run one at a time, in the order they were queued.
+A worker claims a job with a lease that it renews while the job runs; a
+job whose lease ran out (its worker died) goes back in the queue.
+"""
+import json
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    game_id INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    worker_id TEXT,
+    lease_until REAL
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_status_game ON jobs (status, game_id);
+"""
+
+# Columns added after the first release, for queue files that predate them
+ADDED_COLUMNS = {'worker_id': 'TEXT', 'lease_until': 'REAL'}
+
+# Oldest queued job whose game has nothing running. Any older job of the same
+# game would also qualify and sort first, so per-game order is preserved.
+CLAIM_SQL = """
+SELECT id FROM jobs
+WHERE status = 'queued'
+  AND game_id NOT IN (SELECT game_id FROM jobs WHERE status = 'running')
+ORDER BY id
+LIMIT 1
+"""
+
+
+class JobQueue:
+    """SQLite-backed FIFO of jobs, initialised like the other extensions"""
+
+    def __init__(self, path=None, lease_seconds=60):
+        self.path = path
+        self.lease_seconds = lease_seconds
+
+    def init_app(self, app):
+        self.path = app.config['JOB_QUEUE_PATH']
+        self.lease_seconds = app.config['JOB_LEASE_SECONDS']
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for name, kind in ADDED_COLUMNS.items():
+                if name not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {kind}")
+        app.extensions['job_queue'] = self
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return _Connection(conn)
+
+    def enqueue(self, kind, game_id, payload=None):
+        """Adds a job and returns its id"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (kind, game_id, payload, created_at) VALUES (?, ?, ?, ?)",
+                (kind, game_id, json.dumps(payload or {}), time.time()),
+            )
+            return cursor.lastrowid
+
+    def claim(self, worker_id=None):
+        """Marks the next runnable job as running under `worker_id`'s lease and returns it, or None"""
+        with self._connect() as conn:
+            # IMMEDIATE takes the write lock up front so two workers can't claim the same job
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(CLAIM_SQL).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, worker_id = ?, lease_until = ? "
+                "WHERE id = ?",
+                (now, worker_id, now + self.lease_seconds, row['id']),
+            )
+            job = conn.execute("SELECT * FROM jobs WHERE id = ?", (row['id'],)).fetchone()
+            conn.execute("COMMIT")
+            return _to_dict(job)
+
+    def complete(self, job_id, result=None, worker_id=None):
+        self._finish(job_id, worker_id, status='done', result=json.dumps(result))
+
+    def fail(self, job_id, error, worker_id=None):
+        self._finish(job_id, worker_id, status='failed', error=error)
+
+    def _finish(self, job_id, worker_id, **values):
+        # A worker whose lease expired no longer owns the job: it may be re-queued or rerun
+        values['finished_at'] = time.time()
+        assignments = ', '.join(f"{name} = ?" for name in values)
+        sql = f"UPDATE jobs SET {assignments} WHERE id = ? AND status = 'running'"
+        params = [*values.values(), job_id]
+        if worker_id is not None:
+            sql += " AND worker_id = ?"
+            params.append(worker_id)
+        with self._connect() as conn:
+            conn.execute(sql, params)
+
+    def heartbeat(self, worker_id):
+        """Renews the lease of every job `worker_id` is running; returns how many"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE status = 'running' AND worker_id = ?",
+                (time.time() + self.lease_seconds, worker_id),
+            )
+            return cursor.rowcount
+
+    def requeue_expired(self):
+        """Puts running jobs whose lease ran out (their worker died) back in the queue"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'queued', started_at = NULL, worker_id = NULL, "
+                "lease_until = NULL WHERE status = 'running' AND COALESCE(lease_until, 0) < ?",
+                (time.time(),),
+            )
+            return cursor.rowcount
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return _to_dict(row) if row else None
+
+    def stats(self):
+        """Number of jobs per status"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+            counts = {'queued': 0, 'running': 0, 'done': 0, 'failed': 0}
+            counts.update({row['status']: row['n'] for row in rows})
+            return counts
+
+
+class _Connection:
+    """Closes the sqlite connection when the with-block ends"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self.conn.in_transaction:
+            self.conn.execute("ROLLBACK")
+        self.conn.close()
+
+
+def _to_dict(row):
+    job = dict(row)
+    job['payload'] = json.loads(job['payload'])
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    return job
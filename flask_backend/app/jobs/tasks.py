@@ -0,0 +1,155 @@
+"""
+Background tasks for computer players
+Each task runs inside an app context on a worker thread.
+"""
+import random
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy.orm.attributes import flag_modified
+
+from app.archive import archive_batch, archive_settings, load_game
+from app.db import db
+from app.history import tracked
+from app.shards import router
+from app.stats import record_turn
+from app.sweeper import sweep_batch
+from app.game.ai_player import get_ai
+from app.game.board import PRICES, property_slot
+from app.game.game_logic import play_turn
+
+
+def computer_turn(game, ai):
+    """
+    Plays the current player's turn if it is a computer: roll, move,
+    then let the AI decide whether to buy and build
+    Returns: messages
+    """
+    state = game.state
+    player = state['players'][state['currentPlayer']]
+    if not player.get('is_computer'):
+        return []
+
+    with tracked(game):
+        dice_roll = [random.randint(1, 6), random.randint(1, 6)]
+        messages, actions = play_turn(player, dice_roll, state)
+
+        offer = actions.get('can_buy')
+        if offer and ai.decide_buy(player, offer['property'], state):
+            position, prop = property_slot(state['board'], offer['property'])
+            player['money'] -= PRICES[position]
+            prop['owner'] = player['id']
+            player['properties'] = player.get('properties', []) + [offer['property']]
+            messages.append(f"{player['name']} bought {offer['property']} for ${PRICES[position]}")
+
+        # Bankrupt players have already been removed from the game
+        if not actions.get('bankrupt'):
+            property_name = ai.decide_build(player, state)
+            if property_name:
+                _, prop = property_slot(state['board'], property_name)
+                build_cost = 100 if prop.get('houses', 0) < 4 else 500
+                if player['money'] >= build_cost:
+                    player['money'] -= build_cost
+                    prop['houses'] = prop.get('houses', 0) + 1
+                    messages.append(f"{player['name']} built on {property_name}")
+
+    record_turn(game, player, actions)
+    flag_modified(game, 'state')
+    game.updated_at = datetime.utcnow()
+    return messages
+
+
+def _load(game_id):
+    router.pin_game(game_id)
+    game = load_game(game_id)
+    if not game:
+        raise LookupError(f"Game {game_id} not found")
+    return game
+
+
+def _ai_for(game):
+    config = current_app.config
+    return get_ai(
+        game.state.get('aiDifficulty', 'easy'),
+        budget_ms=config['AI_ROLLOUT_BUDGET_MS'],
+        depth=config['AI_SEARCH_DEPTH'],
+    )
+
+
+def run_computer_turn(queue, job):
+    """Plays a single computer turn"""
+    game = _load(job['game_id'])
+    messages = computer_turn(game, _ai_for(game))
+    db.session.commit()
+    return {'messages': messages, 'turn': game.state['turn']}
+
+
+def run_autoplay(queue, job):
+    """
+    Plays computer turns until a human is up, someone wins or the turn limit
+    is hit. Each job plays one turn and queues the next one, so long games
+    never hold a worker and other games get their turns in between.
+    """
+    game = _load(job['game_id'])
+    state = game.state
+    max_turns = job['payload'].get('max_turns', current_app.config['JOB_MAX_TURNS'])
+
+    if state.get('winner') or len(state['players']) < 2:
+        return {'finished': True, 'winner': state.get('winner')}
+    if state['turn'] > max_turns:
+        return {'finished': False, 'reason': 'turn limit reached'}
+    if not state['players'][state['currentPlayer']].get('is_computer'):
+        return {'finished': False, 'reason': 'waiting for a human player'}
+
+    messages = computer_turn(game, _ai_for(game))
+    db.session.commit()
+
+    next_job = queue.enqueue('autoplay', game.id, job['payload'])
+    return {'messages': messages, 'turn': state['turn'], 'next_job': next_job}
+
+
+# Jobs that are not about one game share this id
+MAINTENANCE_GAME_ID = 0
+
+
+def run_archive(queue, job):
+    """
+    Archives one batch of finished/idle games per shard and queues the next
+    batch while there may be more. Queued with game_id MAINTENANCE_GAME_ID,
+    so archive batches never run concurrently.
+    """
+    settings = archive_settings(current_app.config)
+    counts = {'finished': 0, 'idle': 0}
+    more = False
+    for shard in router.shards():
+        with router.pinned(shard):
+            batch = archive_batch(**settings)
+        more = more or sum(batch.values()) == settings['batch_size']
+        for reason, count in batch.items():
+            counts[reason] += count
+    if more:
+        counts['next_job'] = queue.enqueue('archive', MAINTENANCE_GAME_ID)
+    return counts
+
+
+def run_sweep(queue, job):
+    """Deletes one batch of orphaned players/links per shard and queues the next batch if needed"""
+    counts = {'links': 0, 'players': 0}
+    more = False
+    for shard in router.shards():
+        with router.pinned(shard):
+            batch = sweep_batch(current_app.config['SWEEP_BATCH_SIZE'])
+        more = batch.pop('more') or more
+        for name, count in batch.items():
+            counts[name] += count
+    if more:
+        counts['next_job'] = queue.enqueue('sweep', MAINTENANCE_GAME_ID)
+    return counts
+
+
+HANDLERS = {
+    'computer_turn': run_computer_turn,
+    'autoplay': run_autoplay,
+    'archive': run_archive,
+    'sweep': run_sweep,
+}
@@ -0,0 +1,80 @@
+"""
+Worker pool
+Threads that claim jobs from the queue and run them inside an app context.
+Run it in its own process with `flask jobs worker` so AI work never ties up
+the web workers, or in-process by setting JOB_WORKERS.
+Each pool has a worker id; a heartbeat thread renews the leases of the jobs
+it runs and re-queues jobs whose lease expired (their pool died).
+"""
+import logging
+import os
+import socket
+import threading
+import uuid
+
+from app.db import db
+from app.jobs.tasks import HANDLERS
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPool:
+    def __init__(self, app, queue, concurrency=2, poll_interval=0.5):
+        self.app = app
+        self.queue = queue
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.stopping = threading.Event()
+        self.threads = []
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def start(self):
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        thread = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        thread.start()
+        self.threads.append(thread)
+
+    def stop(self, timeout=None):
+        self.stopping.set()
+        for thread in self.threads:
+            thread.join(timeout)
+
+    def _run(self):
+        while not self.stopping.is_set():
+            job = self.queue.claim(self.worker_id)
+            if job is None:
+                self.stopping.wait(self.poll_interval)
+                continue
+            self.run_job(job)
+
+    def _heartbeat(self):
+        # Renewing at a third of the lease leaves room for two missed beats
+        while True:
+            try:
+                self.queue.heartbeat(self.worker_id)
+                recovered = self.queue.requeue_expired()
+                if recovered:
+                    logger.warning("Re-queued %s job(s) whose lease expired", recovered)
+            except Exception:
+                logger.exception("Job heartbeat failed")
+            if self.stopping.wait(self.queue.lease_seconds / 3):
+                return
+
+    def run_job(self, job):
+        handler = HANDLERS.get(job['kind'])
+        with self.app.app_context():
+            try:
+                if handler is None:
+                    raise ValueError(f"Unknown job kind {job['kind']!r}")
+                result = handler(self.queue, job)
+            except Exception as exc:
+                db.session.rollback()
+                logger.exception("Job %s (%s) failed", job['id'], job['kind'])
+                self.queue.fail(job['id'], str(exc), self.worker_id)
+            else:
+                self.queue.complete(job['id'], result, self.worker_id)
+            finally:
+                db.session.remove()
@@ -0,0 +1,83 @@
+"""
+Verified-JWT cache
+A client sends the same token with every request, and decoding it (two
+base64/JSON passes plus the signature check) is a fixed cost per request.
+CachingJWTManager keeps the claims of tokens it has already verified in a
+bounded LRU keyed by a digest of the token, so a known token is only
+re-checked against its `exp` (with the configured leeway). Only tokens
+that verified are cached. The blocklist check and the user loader run
+after decoding, on every request, cached or not.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask_jwt_extended import JWTManager
+from flask_jwt_extended.config import config
+
+from app.metrics import metrics
+
+decodes_total = metrics.counter(
+    'jwt_decode_cache_total', "JWT decodes by cache result", ('result',))
+
+
+class ClaimsCache:
+    """Bounded LRU of token digest -> verified claims"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+
+class CachingJWTManager(JWTManager):
+    """JWTManager that skips decoding tokens it has already verified"""
+
+    cache = None
+
+    def init_app(self, app):
+        super().init_app(app)
+        size = app.config['JWT_DECODE_CACHE_SIZE']
+        self.cache = ClaimsCache(size) if size > 0 else None
+
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        # CSRF double-submit and expired-token checks take the normal path
+        if self.cache is None or csrf_value or allow_expired:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+
+        key = hashlib.blake2b(encoded_token.encode('utf-8'), digest_size=16).digest()
+        claims = self.cache.get(key)
+        if claims is not None:
+            exp = claims.get('exp')
+            if exp is None or exp > time.time() - config.leeway:
+                decodes_total('hit')
+                # Callers keep the claims in g and may add to them
+                return dict(claims)
+            # Let the normal path raise ExpiredSignatureError with its details
+            self.cache.discard(key)
+            decodes_total('expired')
+        else:
+            decodes_total('miss')
+
+        claims = super()._decode_jwt_from_config(encoded_token)
+        self.cache.put(key, dict(claims))
+        return claims
@@ -0,0 +1,186 @@
+"""
+In-memory metrics
+Counters and HDR-style histograms, rendered in the Prometheus text format at /metrics.
+The endpoint is off unless METRICS_TOKEN is set, and then needs it as a
+bearer token (Prometheus: `authorization: {credentials: ...}`).
+"""
+import hmac
+import math
+import threading
+
+from flask import Blueprint, Response, current_app, request
+
+# Histogram buckets keep 5 significant bits (~3% relative error) at any magnitude
+SUB_BUCKET_BITS = 5
+
+# Bucket boundaries reported to Prometheus (in the metric's own unit)
+SECONDS_BOUNDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BYTES_BOUNDS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BOUNDS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """
+    Log-linear histogram in the style of HdrHistogram. Values are scaled to
+    integers (e.g. seconds -> microseconds) and bucketed by their top bits,
+    so memory stays small while percentiles keep a bounded relative error.
+    """
+
+    def __init__(self, scale=1):
+        self.scale = scale
+        self.counts = {}
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _bucket(units):
+        shift = max(units.bit_length() - SUB_BUCKET_BITS, 0)
+        return shift, units >> shift
+
+    def record(self, value):
+        units = max(int(value * self.scale), 0)
+        key = self._bucket(units)
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+            self.total += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def _upper_bounds(self):
+        """(upper bound in the metric's unit, count) for each bucket, ascending"""
+        with self.lock:
+            items = sorted(self.counts.items())
+        return [(((sub + 1) << shift) / self.scale, count) for (shift, sub), count in items]
+
+    def percentile(self, p):
+        if not self.total:
+            return 0.0
+        target = math.ceil(self.total * p / 100)
+        seen = 0
+        for upper, count in self._upper_bounds():
+            seen += count
+            if seen >= target:
+                return min(upper, self.max)
+        return self.max
+
+    def cumulative(self, bounds):
+        """Number of values at or below each bound, Prometheus-style"""
+        buckets = self._upper_bounds()
+        result = []
+        for bound in bounds:
+            result.append(sum(count for upper, count in buckets if upper <= bound))
+        return result
+
+
+class Registry:
+    """Named metric families, each keyed by a tuple of label values"""
+
+    def __init__(self):
+        self.families = {}
+        self.lock = threading.Lock()
+
+    def _family(self, name, kind, help_text, labels, **options):
+        with self.lock:
+            family = self.families.get(name)
+            if family is None:
+                family = self.families[name] = {
+                    'kind': kind, 'help': help_text, 'labels': labels,
+                    'series': {}, **options,
+                }
+            return family
+
+    def histogram(self, name, help_text, labels=(), scale=1_000_000, bounds=SECONDS_BOUNDS):
+        family = self._family(name, 'histogram', help_text, labels, scale=scale, bounds=bounds)
+
+        def series(*values):
+            key = tuple(values)
+            hist = family['series'].get(key)
+            if hist is None:
+                with self.lock:
+                    hist = family['series'].setdefault(key, Histogram(scale))
+            return hist
+        return series
+
+    def counter(self, name, help_text, labels=()):
+        family = self._family(name, 'counter', help_text, labels)
+        lock = self.lock
+
+        def inc(*values, amount=1):
+            key = tuple(values)
+            with lock:
+                family['series'][key] = family['series'].get(key, 0) + amount
+        return inc
+
+    def _series(self, family):
+        with self.lock:
+            return sorted(family['series'].items())
+
+    def snapshot(self):
+        """Plain dict of every series, with p50/p90/p99 for histograms"""
+        result = {}
+        for name, family in sorted(list(self.families.items())):
+            rows = []
+            for key, value in self._series(family):
+                labels = dict(zip(family['labels'], key))
+                if family['kind'] == 'counter':
+                    rows.append({'labels': labels, 'value': value})
+                else:
+                    rows.append({
+                        'labels': labels, 'count': value.total, 'sum': value.sum,
+                        'p50': value.percentile(50), 'p90': value.percentile(90),
+                        'p99': value.percentile(99), 'max': value.max,
+                    })
+            result[name] = rows
+        return result
+
+    def render(self):
+        lines = []
+        for name, family in sorted(list(self.families.items())):
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['kind']}")
+            for key, value in self._series(family):
+                labels = list(zip(family['labels'], key))
+                if family['kind'] == 'counter':
+                    lines.append(f"{name}{_labels(labels)} {value}")
+                    continue
+                bounds = family['bounds']
+                for bound, count in zip(bounds, value.cumulative(bounds)):
+                    lines.append(f"{name}_bucket{_labels(labels + [('le', _number(bound))])} {count}")
+                lines.append(f"{name}_bucket{_labels(labels + [('le', '+Inf')])} {value.total}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(value.sum)}")
+                lines.append(f"{name}_count{_labels(labels)} {value.total}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+metrics = Registry()
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    token = current_app.config['METRICS_TOKEN']
+    if not token:
+        return Response(status=404)
+    scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not hmac.compare_digest(credentials.encode(), token.encode()):
+        return Response(status=401, headers={'WWW-Authenticate': 'Bearer realm="metrics"'})
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
@@ -1,4 +1,7 @@
 from .game import Game
 from .gameplayer import GamePlayer
 from .player import Player
-from .user import User
\ No newline at end of file
+from .user import User
+from .game_archive import GameArchive
+from .user_stats import UserStats, LeaderboardBucket
+from .game_id_allocator import GameIdAllocator
\ No newline at end of file
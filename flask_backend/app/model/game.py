@@ -1,15 +1,20 @@
 from app.db import db
+from app.model.types import CompactJSON, CompactState
 from sqlalchemy_serializer import SerializerMixin
 from datetime import datetime
 
 class Game(db.Model, SerializerMixin):
     __tablename__ = 'game'
-    serialize_rules = ('-owner.games', '-players.games')
+    serialize_rules = ('-owner.games', '-players.games', '-history')
+    # Ids are never reused: archived games keep theirs (see app/archive.py)
+    __table_args__ = {'sqlite_autoincrement': True}
     
     id = db.Column(db.Integer, primary_key=True)
-    state = db.Column(db.JSON, nullable=False)
+    state = db.Column(CompactState, nullable=False)
+    # Undo/redo deltas (see app/history.py), only loaded when used
+    history = db.orm.deferred(db.Column(CompactJSON))
     status = db.Column(db.String(20), default='active')
-    owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
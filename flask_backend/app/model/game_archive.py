@@ -0,0 +1,21 @@
+from app.db import db
+from app.model.types import CompactState
+from sqlalchemy_serializer import SerializerMixin
+from datetime import datetime
+
+class GameArchive(db.Model, SerializerMixin):
+    """Finished or abandoned game moved out of the `game` table (see app/archive.py)"""
+    __tablename__ = 'game_archive'
+    serialize_rules = ('-players',)
+
+    # Same id the game had, so /game/<id> keeps working
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    state = db.Column(CompactState, nullable=False)
+    # Rows of the game's players, to recreate them on rehydration
+    players = db.Column(db.JSON, nullable=False, default=list)
+    status = db.Column(db.String(20))
+    reason = db.Column(db.String(20), nullable=False)
+    owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -0,0 +1,12 @@
+from app.db import db
+
+
+class GameIdAllocator(db.Model):
+    """
+    One row per id handed out on this shard (see app/shards.py); only the
+    newest row is kept, AUTOINCREMENT makes sure ids are never reused
+    """
+    __tablename__ = 'game_id_allocator'
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    id = db.Column(db.Integer, primary_key=True)
@@ -5,8 +5,8 @@ from datetime import datetime
 class GamePlayer(db.Model, SerializerMixin):
     __tablename__ = 'game_player'
     
-    game_id = db.Column(db.Integer, db.ForeignKey('game.id'), primary_key=True)
-    player_id = db.Column(db.Integer, db.ForeignKey('player.id'), primary_key=True)
+    game_id = db.Column(db.Integer, db.ForeignKey('game.id', ondelete='CASCADE'), primary_key=True)
+    player_id = db.Column(db.Integer, db.ForeignKey('player.id', ondelete='CASCADE'), primary_key=True)
 
     # Relationships
     game = db.relationship('Game')
@@ -5,6 +5,8 @@ from datetime import datetime
 class Player(db.Model, SerializerMixin):
     __tablename__ = 'player'
     serialize_rules = ('-games.players',)
+    # Ids are never reused: archived games refer to their players by id
+    __table_args__ = {'sqlite_autoincrement': True}
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False)
@@ -0,0 +1,176 @@
+"""
+Column types
+CompactState stores a game state as a version byte followed by a
+zlib-compressed body. Board slots are reduced to [owner, houses] and owned
+property names to board positions, so the repeated names and field names
+never reach the database.
+"""
+import json
+import zlib
+
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+from app.game.board import NAMES, POSITIONS, SPACES
+
+PURCHASABLE_TYPES = ('property', 'railroad', 'utility')
+
+# Format 1: zlib(compact JSON) of a name-keyed board packed against
+# BOARD_TEMPLATE. Only read now; the migration to the positional board
+# rewrote every row in format 2.
+FORMAT_V1 = 1
+# Format 2: zlib(compact JSON) of a positional board, slots packed as
+# 0 (not purchasable) or [owner, houses], property names as positions
+FORMAT_V2 = 2
+COMPRESS_LEVEL = 6
+
+
+def _board_template():
+    """Format 1 template: board entries as create_game wrote them, in board order"""
+    template = {}
+    for space in SPACES:
+        if space.type in PURCHASABLE_TYPES:
+            template[space.name] = {'position': space.position, 'price': space.price,
+                                    'type': space.type}
+        else:
+            template[space.name] = {'position': space.position, 'type': space.type}
+    return template
+
+
+BOARD_TEMPLATE = _board_template()
+TEMPLATE_NAMES = tuple(BOARD_TEMPLATE)
+# (name, position, price, type or None when not purchasable) per template slot
+_SLOTS = tuple(
+    (name, static['position'], static.get('price'),
+     static['type'] if static['type'] in PURCHASABLE_TYPES else None)
+    for name, static in BOARD_TEMPLATE.items()
+)
+
+
+def _unpack_board_v1(packed):
+    # Dict displays in create_game's key order; this loop is most of decode time
+    board = {}
+    for (name, position, price, kind), slot in zip(_SLOTS, packed['s']):
+        if not slot:
+            continue
+        if kind is None:
+            board[name] = {'position': position, 'type': BOARD_TEMPLATE[name]['type']}
+        else:
+            board[name] = {'position': position, 'price': price, 'owner': slot[0],
+                           'houses': slot[1], 'type': kind}
+    board.update(packed['x'])
+    return board
+
+
+def _pack_board(board):
+    """Slot -> 0 when empty, [owner, houses] when it has just those, else kept as is"""
+    packed = []
+    for slot in board:
+        if slot is None:
+            packed.append(0)
+        elif slot.keys() == {'owner', 'houses'}:
+            packed.append([slot['owner'], slot['houses']])
+        else:
+            packed.append(slot)
+    return packed
+
+
+def _unpack_board(packed):
+    return [
+        None if slot == 0 else {'owner': slot[0], 'houses': slot[1]} if type(slot) is list else slot
+        for slot in packed
+    ]
+
+
+def _pack_players(players):
+    """Property names a player owns become board positions"""
+    packed = []
+    for player in players:
+        owned = player.get('properties')
+        if isinstance(owned, list):
+            player = dict(player, properties=[POSITIONS.get(name, name) for name in owned])
+        packed.append(player)
+    return packed
+
+
+def _unpack_players(players, names):
+    for player in players:
+        owned = player.get('properties')
+        if isinstance(owned, list):
+            player['properties'] = [names[n] if type(n) is int else n for n in owned]
+    return players
+
+
+def encode_state(state):
+    """Game state dict -> bytes"""
+    body = dict(state)
+    if isinstance(state.get('board'), list):
+        body['board'] = _pack_board(state['board'])
+    if isinstance(state.get('players'), list):
+        body['players'] = _pack_players(state['players'])
+    text = json.dumps(body, separators=(',', ':'), ensure_ascii=False)
+    return bytes((FORMAT_V2,)) + zlib.compress(text.encode('utf-8'), COMPRESS_LEVEL)
+
+
+def decode_state(data):
+    """
+    Bytes -> game state dict. Plain JSON (rows written before the column
+    was converted) and format 1 are accepted too; their board stays name-keyed.
+    """
+    if isinstance(data, dict):
+        return data
+    if isinstance(data, str):
+        return json.loads(data)
+    data = bytes(data)
+    if data[:1] == b'{':
+        return json.loads(data)
+    if data[0] not in (FORMAT_V1, FORMAT_V2):
+        raise ValueError(f"Unknown game state format {data[0]}")
+
+    state = json.loads(zlib.decompress(data[1:]))
+    board = state.get('board')
+    if data[0] == FORMAT_V1:
+        if isinstance(board, dict):
+            state['board'] = _unpack_board_v1(board)
+        names = TEMPLATE_NAMES
+    else:
+        if isinstance(board, list):
+            state['board'] = _unpack_board(board)
+        names = NAMES
+    if isinstance(state.get('players'), list):
+        state['players'] = _unpack_players(state['players'], names)
+    return state
+
+
+class CompactState(TypeDecorator):
+    """Game state column: a dict in Python, compact binary in the database"""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return encode_state(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decode_state(value)
+
+
+class CompactJSON(TypeDecorator):
+    """Any JSON value, stored as zlib(compact JSON)"""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        text = json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+        return zlib.compress(text.encode('utf-8'), COMPRESS_LEVEL)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return json.loads(zlib.decompress(value))
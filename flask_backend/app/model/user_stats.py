@@ -0,0 +1,33 @@
+from app.db import db
+from sqlalchemy_serializer import SerializerMixin
+from datetime import datetime
+
+class UserStats(db.Model, SerializerMixin):
+    """Per-user totals over finished games, kept up to date by app/stats.py"""
+    __tablename__ = 'user_stats'
+    __table_args__ = (
+        # Top-N reads this index in order
+        db.Index('ix_user_stats_wins_user', 'wins', 'user_id'),
+    )
+    serialize_rules = ('-user',)
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    games_played = db.Column(db.Integer, nullable=False, default=0)
+    wins = db.Column(db.Integer, nullable=False, default=0)
+    losses = db.Column(db.Integer, nullable=False, default=0)
+    bankruptcies = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    user = db.relationship('User')
+
+
+class LeaderboardBucket(db.Model, SerializerMixin):
+    """
+    How many users have exactly `wins` wins. A user's rank only needs the
+    buckets above theirs, so it costs one index range over distinct win
+    counts instead of a count over all users.
+    """
+    __tablename__ = 'leaderboard_bucket'
+
+    wins = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    users = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,130 @@
+"""
+Request profiling (opt-in with PROFILING_ENABLED)
+Records wall time, DB time, query count, JSON serialisation time and
+response size per endpoint, and logs a sample of slow requests with their
+slowest SQL statements.
+"""
+import logging
+import random
+import time
+
+from flask import current_app, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+
+from app.db import db
+from app.metrics import metrics, BYTES_BOUNDS, COUNT_BOUNDS
+
+slow_log = logging.getLogger('app.profiling.slow')
+
+request_seconds = metrics.histogram(
+    'http_request_duration_seconds', "Wall time per request", ('endpoint', 'method'))
+db_seconds = metrics.histogram(
+    'http_request_db_seconds', "Time spent in SQL per request", ('endpoint', 'method'))
+query_count = metrics.histogram(
+    'http_request_queries', "SQL statements per request", ('endpoint', 'method'),
+    scale=1, bounds=COUNT_BOUNDS)
+serialize_seconds = metrics.histogram(
+    'http_request_serialize_seconds', "JSON encoding time per request", ('endpoint', 'method'))
+response_bytes = metrics.histogram(
+    'http_response_size_bytes', "Response body size", ('endpoint', 'method'),
+    scale=1, bounds=BYTES_BOUNDS)
+
+
+class _Profile:
+    __slots__ = ('start', 'db_time', 'queries', 'serialize_time')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_time = 0.0
+        self.queries = []
+        self.serialize_time = 0.0
+
+
+def _current():
+    if not has_request_context():
+        return None
+    return g.get('_profile')
+
+
+class ProfilingJSONProvider(DefaultJSONProvider):
+    """Times every jsonify() call made while handling a request"""
+
+    def dumps(self, obj, **kwargs):
+        profile = _current()
+        if profile is None:
+            return super().dumps(obj, **kwargs)
+        start = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            profile.serialize_time += time.perf_counter() - start
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['_query_start'].pop()
+    profile = _current()
+    if profile is not None:
+        elapsed = time.perf_counter() - started
+        profile.db_time += elapsed
+        profile.queries.append((elapsed, statement))
+
+
+def _start_request():
+    g._profile = _Profile()
+
+
+def _finish_request(response):
+    profile = g.pop('_profile', None)
+    if profile is None:
+        return response
+
+    elapsed = time.perf_counter() - profile.start
+    labels = (request.endpoint or 'unmatched', request.method)
+    size = response.calculate_content_length() or 0
+
+    request_seconds(*labels).record(elapsed)
+    db_seconds(*labels).record(profile.db_time)
+    query_count(*labels).record(len(profile.queries))
+    serialize_seconds(*labels).record(profile.serialize_time)
+    response_bytes(*labels).record(size)
+
+    config = current_app.config
+    if elapsed * 1000 >= config['PROFILING_SLOW_MS'] and random.random() < config['PROFILING_SLOW_SAMPLE_RATE']:
+        _log_slow(labels, elapsed, profile, size, config['PROFILING_SLOW_QUERY_MS'])
+    return response
+
+
+def _log_slow(labels, elapsed, profile, size, slow_query_ms):
+    lines = [
+        f"Slow request {labels[1]} {request.path} ({labels[0]}): "
+        f"{elapsed * 1000:.1f}ms total, {profile.db_time * 1000:.1f}ms in "
+        f"{len(profile.queries)} queries, {profile.serialize_time * 1000:.1f}ms serializing, "
+        f"{size} bytes"
+    ]
+    for duration, statement in sorted(profile.queries, reverse=True):
+        if duration * 1000 < slow_query_ms:
+            break
+        lines.append(f"  {duration * 1000:.1f}ms  {' '.join(statement.split())}")
+    slow_log.warning("\n".join(lines))
+
+
+def init_profiling(app):
+    """Installs the profiling hooks if PROFILING_ENABLED is set"""
+    if not app.config['PROFILING_ENABLED']:
+        return
+
+    # The primary and, when configured, the read replica
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    app.json = ProfilingJSONProvider(app)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
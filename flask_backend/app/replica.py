@@ -0,0 +1,60 @@
+"""
+Read replica routing
+With DATABASE_REPLICA_URL set, the replica is the 'replica' bind and
+plain SELECTs made while handling a GET/HEAD request run there; writes,
+SELECT ... FOR UPDATE and everything after the request's first flush stay
+on the primary (the session side is in app/routing.py).
+Read-your-writes: a successful mutating request answers with the time of
+the write (X-Last-Write header and last_write cookie). A client sending it
+back within REPLICA_STICKY_SECONDS reads from the primary, so it never
+sees a replica that hasn't caught up with its own change yet.
+"""
+import time
+
+from flask import g, request
+
+from app.metrics import metrics
+from app.routing import REPLICA_BIND
+
+HEADER = 'X-Last-Write'
+COOKIE = 'last_write'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+sticky_total = metrics.counter(
+    'db_sticky_requests_total', "Safe requests kept on the primary after the client's own write")
+
+
+def _last_write():
+    value = request.headers.get(HEADER) or request.cookies.get(COOKIE)
+    try:
+        return int(value) / 1000
+    except (TypeError, ValueError):
+        return None
+
+
+def init_replica(app):
+    """Routes safe requests to the replica bind, if there is one"""
+    if REPLICA_BIND not in app.config.get('SQLALCHEMY_BINDS', {}):
+        return
+
+    sticky_seconds = app.config['REPLICA_STICKY_SECONDS']
+
+    @app.before_request
+    def choose_database():
+        if request.method not in SAFE_METHODS:
+            return
+        last_write = _last_write()
+        if last_write is not None and time.time() - last_write < sticky_seconds:
+            sticky_total()
+            return
+        g.read_replica = True
+
+    @app.after_request
+    def remember_write(response):
+        if request.method in SAFE_METHODS or not 200 <= response.status_code < 300:
+            return response
+        stamp = str(int(time.time() * 1000))
+        response.headers[HEADER] = stamp
+        response.set_cookie(COOKIE, stamp, max_age=max(1, int(sticky_seconds)),
+                            httponly=True, samesite='Lax')
+        return response
@@ -1,4 +1,9 @@
 from .user import user_bp
 from .game import game_bp
 from .move import move_bp
-from .houses import house_bp
\ No newline at end of file
+from .houses import house_bp
+from .ai import ai_bp
+from .jobs import jobs_bp
+from .admin import admin_bp
+from .leaderboard import leaderboard_bp
+from .board import board_bp
\ No newline at end of file
@@ -0,0 +1,40 @@
+from functools import wraps
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.export import export_games, gzip_stream, parse_filters
+
+admin_bp = Blueprint("admin", __name__)
+
+
+def admin_required(fn):
+    """jwt_required, and the user's email must be listed in ADMIN_EMAILS"""
+    @wraps(fn)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        if get_jwt_identity() not in current_app.config['ADMIN_EMAILS']:
+            return jsonify({'error': 'Unauthorized'}), 403
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+@admin_bp.route('/export/games', methods=['GET'])
+@admin_required
+def export_games_route():
+    """
+    Streams games as NDJSON, one line per game
+    Query: owner_id, status, since, until (ISO dates, on updated_at),
+    archived=1 to include archived games. Gzipped when the client accepts it.
+    """
+    args = request.args
+    try:
+        filters = parse_filters(args.get('owner_id'), args.get('status'),
+                                args.get('since'), args.get('until'))
+    except ValueError:
+        return jsonify({'error': 'Invalid filter'}), 400
+
+    lines = export_games(include_archived=args.get('archived') == '1', **filters)
+    headers = {'Content-Disposition': 'attachment; filename=games.ndjson'}
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        headers['Content-Encoding'] = 'gzip'
+        lines = gzip_stream(lines)
+    return Response(stream_with_context(lines), mimetype='application/x-ndjson', headers=headers)
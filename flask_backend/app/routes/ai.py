@@ -0,0 +1,145 @@
+from collections import defaultdict
+from flask import Blueprint, jsonify, request
+from app.model import Game
+from app.archive import rehydrate
+from app.db import db
+from datetime import datetime
+from flask_jwt_extended import jwt_required
+from app.admission import admitted
+from app.idempotency import idempotent
+from app.game.ai_player import MonopolyAI
+from app.game.board import NAMES, PRICES, position_of, property_slot
+from app.history import tracked
+from app.shards import router
+from sqlalchemy.orm import undefer
+from sqlalchemy.orm.attributes import flag_modified
+
+ai_bp = Blueprint("ai", __name__)
+
+
+@ai_bp.route('/decide-batch', methods=['POST'])
+@jwt_required()
+@idempotent
+@admitted
+def decide_batch():
+    """
+    Buy/build decisions for many computer players at once (bot leagues)
+    Body: {'decisions': [{'game_id', 'player_id', 'action', 'property'}], 'apply': true}
+    The games of each shard are loaded in one query; all are saved in one commit.
+    """
+    data = request.get_json()
+    items = data.get('decisions', [])
+    apply = data.get('apply', True)
+
+    game_ids = {item.get('game_id') for item in items if isinstance(item.get('game_id'), int)}
+    games = _load_games(game_ids)
+    # Archived games are moved back, then everything is loaded again: each
+    # rehydrate commits, which expires the games already loaded
+    restored = False
+    for game_id in game_ids - games.keys():
+        with router.pinned(router.shard_for(game_id)):
+            restored = rehydrate(game_id) is not None or restored
+    if restored:
+        games = _load_games(game_ids)
+
+    results = [None] * len(items)
+    batch = []
+    for i, item in enumerate(items):
+        game = games.get(item.get('game_id'))
+        if not game:
+            results[i] = {'error': 'Game not found'}
+            continue
+        player = next((p for p in game.state['players'] if p['id'] == item.get('player_id')), None)
+        if not player or not player.get('is_computer'):
+            results[i] = {'error': 'Invalid AI player'}
+            continue
+        if item.get('action') not in ('buy', 'build'):
+            results[i] = {'error': 'Invalid action'}
+            continue
+        if item['action'] == 'buy' and not _standing_on(player, item.get('property')):
+            results[i] = {'error': 'Player is not on that property'}
+            continue
+        batch.append((i, game, player, {
+            'player': player,
+            'game_state': game.state,
+            'action': item['action'],
+            'property': item.get('property'),
+        }))
+
+    decisions = MonopolyAI.decide_batch([entry[3] for entry in batch])
+
+    by_shard = defaultdict(list)
+    for entry, decision in zip(batch, decisions):
+        by_shard[router.shard_for(entry[1].id)].append((entry, decision))
+    changed = False
+    for shard, decided in by_shard.items():
+        with router.pinned(shard):
+            changed = _apply_shard(decided, apply, results) or changed
+    if changed:
+        db.session.commit()
+
+    return jsonify({'results': results}), 200
+
+
+def _load_games(game_ids):
+    """{id: Game}, one query per shard"""
+    games = {}
+    for shard, ids in router.group(game_ids).items():
+        with router.pinned(shard):
+            # With their history, which would otherwise be loaded (and flushed) game by game
+            games.update((g.id, g) for g in Game.query.options(undefer(Game.history))
+                         .filter(Game.id.in_(ids)).all())
+    return games
+
+
+def _apply_shard(decided, apply, results):
+    """
+    Applies the decisions for the games of the pinned shard and flushes
+    them there (committing would expire the other shards' games, whose
+    states are still being changed). Returns whether any game changed.
+    """
+    changed = set()
+    affected = {entry[1] for entry, _ in decided} if apply else ()
+    with tracked(*affected):
+        for (i, game, player, _), decision in decided:
+            if apply and decision['action'] != 'pass':
+                if not _apply(game, player, decision):
+                    decision = {'action': 'pass'}
+                else:
+                    changed.add(game)
+            results[i] = {'game_id': game.id, 'player_id': player['id'], **decision}
+
+    for game in changed:
+        flag_modified(game, 'state')
+        game.updated_at = datetime.utcnow()
+    db.session.flush()
+    return bool(changed)
+
+
+def _standing_on(player, property_name):
+    """A computer player can only buy the property it landed on"""
+    return isinstance(property_name, str) and position_of(property_name) == player['position']
+
+
+def _apply(game, player, decision):
+    """Applies one decision to the game state, re-checking it is still allowed and affordable"""
+    position, prop = property_slot(game.state['board'], decision['property'])
+    if prop is None:
+        return False
+
+    if decision['action'] == 'buy':
+        if position != player['position']:
+            return False
+        if prop['owner'] is not None or player['money'] < PRICES[position]:
+            return False
+        player['money'] -= PRICES[position]
+        prop['owner'] = player['id']
+        player['properties'] = player.get('properties', []) + [NAMES[position]]
+        return True
+
+    build_cost = 100 if prop.get('houses', 0) < 4 else 500
+    if player['money'] < build_cost:
+        return False
+    player['money'] -= build_cost
+    prop['houses'] = prop.get('houses', 0) + 1
+    return True
@@ -1,41 +1,60 @@
-from flask import Blueprint, redirect, jsonify
-from authlib.integrations.flask_client import OAuth
+from flask import Blueprint, current_app, redirect, jsonify
 from flask_jwt_extended import create_access_token, create_refresh_token
-# from models import db, User
+from app.model import User
+from app.db import db
 import os
+import threading
 
 auth_social_bp = Blueprint('auth_social', __name__)
-oauth = OAuth()
-
-# Google OAuth config
-oauth.register(
-    name='google',
-    client_id=os.environ.get('GOOGLE_CLIENT_ID'),
-    client_secret=os.environ.get('GOOGLE_CLIENT_SECRET'),
-    server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
-    client_kwargs={'scope': 'openid email profile'}
-)
-
-# GitHub OAuth config
-oauth.register(
-    name='github',
-    client_id=os.environ.get('GITHUB_CLIENT_ID'),
-    client_secret=os.environ.get('GITHUB_CLIENT_SECRET'),
-    access_token_url='https://github.com/login/oauth/access_token',
-    authorize_url='https://github.com/login/oauth/authorize',
-    api_base_url='https://api.github.com/',
-    client_kwargs={'scope': 'user:email'}
-)
+_oauth_lock = threading.Lock()
+
+
+def get_oauth():
+    """
+    OAuth clients are created on the first social login, not at startup,
+    so worker spawns never import Authlib or register the providers
+    """
+    oauth = current_app.extensions.get('social_oauth')
+    if oauth is not None:
+        return oauth
+
+    with _oauth_lock:
+        oauth = current_app.extensions.get('social_oauth')
+        if oauth is None:
+            from authlib.integrations.flask_client import OAuth
+            oauth = OAuth(current_app)
+
+            # Google OAuth config
+            oauth.register(
+                name='google',
+                client_id=os.environ.get('GOOGLE_CLIENT_ID'),
+                client_secret=os.environ.get('GOOGLE_CLIENT_SECRET'),
+                server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
+                client_kwargs={'scope': 'openid email profile'}
+            )
+
+            # GitHub OAuth config
+            oauth.register(
+                name='github',
+                client_id=os.environ.get('GITHUB_CLIENT_ID'),
+                client_secret=os.environ.get('GITHUB_CLIENT_SECRET'),
+                access_token_url='https://github.com/login/oauth/access_token',
+                authorize_url='https://github.com/login/oauth/authorize',
+                api_base_url='https://api.github.com/',
+                client_kwargs={'scope': 'user:email'}
+            )
+            current_app.extensions['social_oauth'] = oauth
+    return oauth
 
 # -------------------- Google --------------------
 @auth_social_bp.route('/api/auth/google')
 def google_login():
     redirect_uri = os.environ.get('GOOGLE_REDIRECT_URI')
-    return oauth.google.authorize_redirect(redirect_uri)
+    return get_oauth().google.authorize_redirect(redirect_uri)
 
 @auth_social_bp.route('/api/auth/google/callback')
 def google_callback():
-    token = oauth.google.authorize_access_token()
+    token = get_oauth().google.authorize_access_token()
     user_info = token.get('userinfo')
     if not user_info:
         return jsonify({'error': 'Failed to get user info'}), 400
@@ -58,18 +77,18 @@ def google_callback():
 @auth_social_bp.route('/api/auth/github')
 def github_login():
     redirect_uri = os.environ.get('GITHUB_REDIRECT_URI')
-    return oauth.github.authorize_redirect(redirect_uri)
+    return get_oauth().github.authorize_redirect(redirect_uri)
 
 @auth_social_bp.route('/api/auth/github/callback')
 def github_callback():
-    token = oauth.github.authorize_access_token()
-    resp = oauth.github.get('user', token=token)
+    token = get_oauth().github.authorize_access_token()
+    resp = get_oauth().github.get('user', token=token)
     user_info = resp.json()
     email = user_info.get('email')
 
     # Get primary email if not public
     if not email:
-        emails_resp = oauth.github.get('user/emails', token=token)
+        emails_resp = get_oauth().github.get('user/emails', token=token)
         emails = emails_resp.json()
         email = next((e['email'] for e in emails if e['primary']), None)
 
@@ -0,0 +1,30 @@
+import json
+
+from flask import Blueprint, Response, request
+
+from app.game.board import VERSION, describe
+
+board_bp = Blueprint("board", __name__)
+
+BODY = json.dumps(dict(describe(), version=VERSION), separators=(',', ':')).encode('utf-8')
+# /board?v=<version> never changes; plain /board is revalidated daily by ETag,
+# a weak one since the body is compressed differently per encoding
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=86400'
+
+
+@board_bp.route('', methods=['GET'])
+def get_board():
+    """
+    Serves the static board definition: names, types, prices, rents and
+    colours of the 40 spaces. Slim game states (see app/slim.py) leave
+    all of this out and carry the version of the board they refer to.
+    """
+    versioned = request.args.get('v') == VERSION
+    if request.if_none_match.contains_weak(VERSION):
+        response = Response(status=304)
+    else:
+        response = Response(BODY, mimetype='application/json')
+    response.set_etag(VERSION, weak=True)
+    response.headers['Cache-Control'] = IMMUTABLE if versioned else REVALIDATE
+    return response
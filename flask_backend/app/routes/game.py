@@ -1,30 +1,25 @@
 from flask import Blueprint, jsonify, request
-from app.model import User,Player,Game
+from app.model import User,Player,Game,GameArchive
+from app.archive import load_game
 from app.db import db
 from flask_bcrypt import Bcrypt
 from datetime import datetime
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.admission import admitted
+from app.idempotency import idempotent
+from app.game.board import new_board, to_slots
+from app.history import Conflict, step, tracked
+from app.shards import router
+from app.slim import game_payload, state_payload, wants_slim
+from sqlalchemy.orm import selectinload
 
 bcrypt = Bcrypt()
 
-BOARD_POSITIONS = {
-    0: "Go", 1: "Mediterranean Avenue", 2: "Community Chest 1", 3: "Baltic Avenue", 4: "Income Tax",
-    5: "Reading Railroad", 6: "Oriental Avenue", 7: "Chance 1", 8: "Vermont Avenue", 9: "Connecticut Avenue",
-    10: "Jail", 11: "St. Charles Place", 12: "Electric Company", 13: "States Avenue", 14: "Virginia Avenue",
-    15: "Pennsylvania Railroad", 16: "St. James Place", 17: "Community Chest 2", 18: "Tennessee Avenue",
-    19: "New York Avenue", 20: "Free Parking", 21: "Kentucky Avenue", 22: "Chance 2", 23: "Indiana Avenue",
-    24: "Illinois Avenue", 25: "B. & O. Railroad", 26: "Atlantic Avenue", 27: "Ventnor Avenue", 28: "Water Works",
-    29: "Marvin Gardens", 30: "Go to Jail", 31: "Pacific Avenue", 32: "North Carolina Avenue", 33: "Community Chest 3",
-    34: "Pennsylvania Avenue", 35: "Short Line", 36: "Chance 3", 37: "Park Place", 38: "Luxury Tax", 39: "Boardwalk"
-}
-
-
-
-
 game_bp = Blueprint("game",__name__)
 
 @game_bp.route('/create', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_game():
     email = get_jwt_identity()
     user = User.query.filter_by(email=email).first()
@@ -35,11 +30,15 @@ def create_game():
     player_names = data.get('playerNames', [user.username])
     player_colors = data.get('playerColors', ['red', 'blue', 'green', 'yellow'])
 
+    # The game and its players go to one shard; their ids say which
+    router.pin(router.pick())
+
     players_list = []
     for i in range(num_human_players):
         player_name = player_names[i] if i < len(player_names) else f"Player {i+1}"
         player_color = player_colors[i] if i < len(player_colors) else 'red'
-        player = Player(name=player_name, color=player_color, is_computer=False)
+        player = Player(id=router.allocate_id(), name=player_name, color=player_color,
+                        is_computer=False)
         db.session.add(player)
         db.session.flush()
         players_list.append(player)
@@ -48,6 +47,7 @@ def create_game():
     for i in range(min(num_computer_players, 3)):
         color_index = (num_human_players + i) % len(computer_colors)
         computer_player = Player(
+            id=router.allocate_id(),
             name=f"Computer {i+1}",
             color=computer_colors[color_index],
             is_computer=True
@@ -56,33 +56,15 @@ def create_game():
         db.session.flush()
         players_list.append(computer_player)
 
-    board = {}
-    from app.game.game_logic import BOARD_SPACES
-    for position, space_info in BOARD_SPACES.items():
-        space_name = space_info['name']
-        space_type = space_info.get('type')
-        if space_type in ['property', 'railroad', 'utility']:
-            board[space_name] = {
-                'position': position,
-                'price': space_info.get('price', 0),
-                'owner': None,
-                'houses': 0,
-                'type': space_type
-            }
-        else:
-            board[space_name] = {
-                'position': position,
-                'type': space_type
-            }
-
     initial_state = {
         'currentPlayer': 0,
         'players': [p.to_dict() for p in players_list],  # ✅ Now includes is_computer
         'turn': 1,
-        'board': board
+        'board': new_board(),
+        'aiDifficulty': data.get('aiDifficulty', 'easy')
     }
 
-    game = Game(state=initial_state, owner=user)
+    game = Game(id=router.allocate_id(), state=initial_state, owner=user)
     for p in players_list:
         game.players.append(p)
     db.session.add(game)
@@ -97,45 +79,101 @@ def get_game(game_id):
     """
     Loads a saved game from the database
     This is how players resume their games - all progress is preserved
+    Archived games are moved back into the game table first
     """
-    game = Game.query.get(game_id)
+    game = load_game(game_id)
     if not game:
         return jsonify({'error': 'Game not found'}), 404
-    return jsonify(game.to_dict()), 200
+    return jsonify(game_payload(game)), 200
 
 
 @game_bp.route('<int:game_id>/state', methods=['PUT', 'PATCH'])
 @jwt_required()
+@idempotent
+@admitted
 def update_game(game_id):
     """
     Updates and saves the game state
     This is called after every move, purchase, or action to preserve progress
     """
-    game = Game.query.get(game_id)
+    game = load_game(game_id)
     if not game:
         return jsonify({'error': 'Game not found'}), 404
 
     data = request.get_json()
-    game.state = data.get('state', game.state)
+    state = data.get('state', game.state)
+    # Clients may still send the old name-keyed board
+    if isinstance(state, dict) and 'board' in state:
+        state = dict(state, board=to_slots(state['board']))
+    with tracked(game):
+        game.state = state
     game.updated_at = datetime.utcnow()  # Track when the game was last played
     db.session.commit()  # Save to database - this is what allows resuming later
-    return jsonify({'message': 'Game updated', 'game': game.to_dict()}), 200
+    return jsonify({'message': 'Game updated', 'game': game_payload(game)}), 200
+
+
+@game_bp.route('/<int:game_id>/undo', methods=['POST'])
+@jwt_required()
+@idempotent
+@admitted
+def undo_move(game_id):
+    """Reverts the last change to the game state (owner only)"""
+    return _step(game_id, undo=True)
+
+
+@game_bp.route('/<int:game_id>/redo', methods=['POST'])
+@jwt_required()
+@idempotent
+@admitted
+def redo_move(game_id):
+    """Re-applies the last undone change (owner only)"""
+    return _step(game_id, undo=False)
+
+
+def _step(game_id, undo):
+    email = get_jwt_identity()
+    user = User.query.filter_by(email=email).first()
+    game = load_game(game_id)
+
+    if not game:
+        return jsonify({'error': 'Game not found'}), 404
+    if game.owner_id != user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
+    # Results of finished games are already in the stats
+    if game.status == 'finished':
+        return jsonify({'error': 'Game is finished'}), 409
+
+    try:
+        done = step(game, undo)
+    except Conflict:
+        return jsonify({'error': 'The game changed since; nothing to ' + ('undo' if undo else 'redo')}), 409
+    if not done:
+        return jsonify({'error': 'Nothing to ' + ('undo' if undo else 'redo')}), 409
+
+    game.updated_at = datetime.utcnow()
+    db.session.commit()
+    return jsonify({'message': 'Undone' if undo else 'Redone', 'state': state_payload(game.state)}), 200
 
 
 @game_bp.route('/<int:game_id>', methods=['DELETE'])
 @jwt_required()
+@idempotent
 def delete_game(game_id):
     """Deletes a game from the database"""
     email = get_jwt_identity()
     user = User.query.filter_by(email=email).first()
-    game = Game.query.get(game_id)
+    game = load_game(game_id)
     
     if not game:
         return jsonify({'error': 'Game not found'}), 404
     if game.owner_id != user.id:
         return jsonify({'error': 'Unauthorized'}), 403
-    
-    db.session.delete(game)
+
+    # Players belong to a single game: remove them with it
+    player_ids = [p.id for p in game.players]
+    db.session.delete(game)  # also deletes its game_player rows
+    # Players have no invalidation key: the game's own delete bumps game:<id>
+    Player.query.filter(Player.id.in_(player_ids)).delete(synchronize_session=False)
     db.session.commit()
     return jsonify({'message': 'Game deleted'}), 200
 
@@ -145,9 +183,17 @@ def delete_game(game_id):
 def my_games():
     """
     Gets all games owned by the current user
-    Shows both active games (can be resumed) and finished games
+    Shows both active games (can be resumed) and finished games,
+    including archived ones (they come back when loaded), from every shard
     """
     email = get_jwt_identity()
     user = User.query.filter_by(email=email).first()
-    user_games = Game.query.filter_by(owner=user).all()
-    return jsonify({'games': [g.to_dict() for g in user_games]}), 200
\ No newline at end of file
+    query = Game.query.filter_by(owner_id=user.id)
+    if not wants_slim():
+        # Full games list their players: one query for all of them, not one per game
+        query = query.options(selectinload(Game.players))
+    # Serialised per shard: the players are loaded from the game's shard
+    user_games = router.fan_out(lambda: [game_payload(g) for g in query])
+    archived = router.fan_out(lambda: [
+        game_payload(a) for a in GameArchive.query.filter_by(owner_id=user.id).order_by(GameArchive.id)])
+    return jsonify({'games': user_games + archived}), 200
\ No newline at end of file
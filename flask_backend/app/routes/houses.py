@@ -1,20 +1,28 @@
-from flask import Blueprint, jsonify, request
-from app.model import Game
+from flask import Blueprint, current_app, jsonify, request
+from app.archive import load_game
 from app.db import db
 from datetime import datetime
 from flask_jwt_extended import jwt_required
+from app.admission import admitted
+from app.idempotency import idempotent
+from app.game.board import NAMES, PRICES, property_slot
 from app.game.game_logic import can_build_house
-from app.game.ai_player import MonopolyAI
+from app.game.ai_player import AI_DIFFICULTIES, get_ai
+from app.history import tracked
+from app.slim import state_payload
+from sqlalchemy.orm.attributes import flag_modified
 
 
 house_bp=Blueprint("houses",__name__)
 @house_bp.route('/<int:game_id>/build', methods=['POST'])
 @jwt_required()
+@idempotent
+@admitted
 def build_property(game_id):
     """
     Builds a house or hotel on a property
     """
-    game = Game.query.get(game_id)
+    game = load_game(game_id)
     if not game:
         return jsonify({'error': 'Game not found'}), 404
 
@@ -30,28 +38,33 @@ def build_property(game_id):
     if not can_build:
         return jsonify({'error': reason}), 400
 
-    property_data = game.state['board'][property_name]
+    position, property_data = property_slot(game.state['board'], property_name)
+    property_name = NAMES[position]
     house_cost = 100
     
     # Build the house
-    player['money'] -= house_cost
-    property_data['houses'] = property_data.get('houses', 0) + 1
+    with tracked(game):
+        player['money'] -= house_cost
+        property_data['houses'] = property_data.get('houses', 0) + 1
     
     building_type = "house" if property_data['houses'] < 5 else "hotel"
     
+    flag_modified(game, 'state')
     game.updated_at = datetime.utcnow()
     db.session.commit()
     
     return jsonify({
         'message': f"{player['name']} built a {building_type} on {property_name}",
-        'state': game.state
+        'state': state_payload(game.state)
     }), 200
 
 @house_bp.route('/<int:game_id>/ai-move', methods=['POST'])
 @jwt_required()
+@idempotent
+@admitted
 def ai_action(game_id):
     """Handle AI player actions"""
-    game = Game.query.get(game_id)
+    game = load_game(game_id)
     if not game:
         return jsonify({'error': 'Game not found'}), 404
     
@@ -63,32 +76,49 @@ def ai_action(game_id):
     if not player or not player.get('is_computer'):
         return jsonify({'error': 'Invalid AI player'}), 400
     
+    # 'easy', 'hard' or 'expert'; defaults to the game's setting
+    difficulty = data.get('difficulty', game.state.get('aiDifficulty', 'easy'))
+    if difficulty not in AI_DIFFICULTIES:
+        return jsonify({'error': 'Invalid difficulty'}), 400
+    ai = get_ai(
+        difficulty,
+        budget_ms=current_app.config['AI_ROLLOUT_BUDGET_MS'],
+        depth=current_app.config['AI_SEARCH_DEPTH'],
+    )
+
     result = {'action': 'pass'}
     
     if action_type == 'buy':
         property_name = data.get('property')
-        prop = game.state['board'].get(property_name)
-        if prop and MonopolyAI.should_buy_property(player, prop):
+        position, prop = property_slot(game.state['board'], property_name)
+        # Only the property the computer player landed on can be bought
+        if prop is not None and position != player['position']:
+            return jsonify({'error': 'Player is not on that property'}), 400
+        if prop is not None and ai.decide_buy(player, property_name, game.state):
             # Buy property
-            if player['money'] >= prop['price']:
-                player['money'] -= prop['price']
-                prop['owner'] = player_id
-                player['properties'] = player.get('properties', []) + [property_name]
+            property_name = NAMES[position]
+            if player['money'] >= PRICES[position]:
+                with tracked(game):
+                    player['money'] -= PRICES[position]
+                    prop['owner'] = player_id
+                    player['properties'] = player.get('properties', []) + [property_name]
                 result = {'action': 'buy', 'property': property_name}
+                flag_modified(game, 'state')
                 game.updated_at = datetime.utcnow()
                 db.session.commit()
     
     elif action_type == 'build':
-        property_name = MonopolyAI.choose_property_to_build(player, game.state['board'])
+        property_name = ai.decide_build(player, game.state)
         if property_name:
-            prop = game.state['board'][property_name]
-            if MonopolyAI.should_build(player, prop, game.state['board']):
-                build_cost = 100 if prop.get('houses', 0) < 4 else 500
-                if player['money'] >= build_cost:
+            _, prop = property_slot(game.state['board'], property_name)
+            build_cost = 100 if prop.get('houses', 0) < 4 else 500
+            if player['money'] >= build_cost:
+                with tracked(game):
                     player['money'] -= build_cost
                     prop['houses'] = prop.get('houses', 0) + 1
-                    result = {'action': 'build', 'property': property_name}
-                    game.updated_at = datetime.utcnow()
-                    db.session.commit()
+                result = {'action': 'build', 'property': property_name}
+                flag_modified(game, 'state')
+                game.updated_at = datetime.utcnow()
+                db.session.commit()
     
     return jsonify(result), 200
\ No newline at end of file
@@ -0,0 +1,61 @@
+from flask import Blueprint, current_app, jsonify, request
+from app.archive import load_game
+from flask_jwt_extended import jwt_required
+from app.admission import admitted
+from app.idempotency import idempotent
+from app.jobs import job_queue
+
+jobs_bp = Blueprint("jobs", __name__)
+
+
+@jobs_bp.route('/game/<int:game_id>/computer-turn', methods=['POST'])
+@jwt_required()
+@idempotent
+@admitted
+def queue_computer_turn(game_id):
+    """Queues the current computer player's turn instead of playing it in the request"""
+    if not load_game(game_id):
+        return jsonify({'error': 'Game not found'}), 404
+    job_id = job_queue.enqueue('computer_turn', game_id)
+    return jsonify({'job_id': job_id}), 202
+
+
+@jobs_bp.route('/game/<int:game_id>/autoplay', methods=['POST'])
+@jwt_required()
+@idempotent
+@admitted
+def queue_autoplay(game_id):
+    """
+    Plays computer turns in the background until a human is up or the game ends
+    An all-computer game runs to completion without a browser attached
+    """
+    if not load_game(game_id):
+        return jsonify({'error': 'Game not found'}), 404
+    data = request.get_json(silent=True) or {}
+    payload = {}
+    if 'max_turns' in data:
+        try:
+            payload['max_turns'] = int(data['max_turns'])
+        except (TypeError, ValueError):
+            return jsonify({'error': 'max_turns must be an integer'}), 400
+    job_id = job_queue.enqueue('autoplay', game_id, payload)
+    return jsonify({'job_id': job_id}), 202
+
+
+@jobs_bp.route('/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job), 200
+
+
+@jobs_bp.route('/status', methods=['GET'])
+@jwt_required()
+def queue_status():
+    """Queue depth per status and the in-process worker count"""
+    return jsonify({
+        'jobs': job_queue.stats(),
+        'workers': current_app.config['JOB_WORKERS'],
+    }), 200
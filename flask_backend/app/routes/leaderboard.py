@@ -0,0 +1,36 @@
+from flask import Blueprint, jsonify, request
+from app.model import User
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.stats import TOP_SIZE, rank_of, top
+
+leaderboard_bp = Blueprint("leaderboard", __name__)
+
+MAX_LIMIT = TOP_SIZE
+
+
+@leaderboard_bp.route('', methods=['GET'])
+@jwt_required()
+def leaderboard():
+    """Top players by wins: ?limit=N (default 10, at most 100)"""
+    limit = min(max(request.args.get('limit', 10, type=int), 1), MAX_LIMIT)
+    return jsonify({'leaderboard': top(limit)}), 200
+
+
+@leaderboard_bp.route('/me', methods=['GET'])
+@jwt_required()
+def my_rank():
+    """The current user's stats and rank"""
+    user = User.query.filter_by(email=get_jwt_identity()).first()
+    entry = rank_of(user.id) if user else None
+    if not entry:
+        return jsonify({'error': 'No finished games yet'}), 404
+    return jsonify(entry), 200
+
+
+@leaderboard_bp.route('/user/<int:user_id>', methods=['GET'])
+@jwt_required()
+def user_rank(user_id):
+    entry = rank_of(user_id)
+    if not entry:
+        return jsonify({'error': 'No stats for this user'}), 404
+    return jsonify(entry), 200
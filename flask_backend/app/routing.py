@@ -0,0 +1,70 @@
+"""
+Session routing
+Picks the engine each statement runs on:
+- game-scoped tables go to the shard pinned on the session (app/shards.py)
+- plain SELECTs of safe requests go to the read replica (app/replica.py)
+- everything else goes to the main database
+"""
+from flask import g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, inspect
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.util import find_tables
+
+from app.metrics import metrics
+
+REPLICA_BIND = 'replica'
+# Tables that live on every shard and hold one shard's games
+SHARDED_TABLES = frozenset(('game', 'player', 'game_player', 'game_archive', 'game_id_allocator'))
+
+routed_total = metrics.counter(
+    'db_routed_statements_total', "Statements run by safe requests, by database", ('target', 'reason'))
+
+
+def shard_bind(shard):
+    """Bind key of a shard; shard 0 is the main database"""
+    return f'shard{shard}' if shard else None
+
+
+def _sharded(mapper, clause):
+    if mapper is not None:
+        return inspect(mapper).local_table.name in SHARDED_TABLES
+    if clause is None:
+        return False
+    return any(table.name in SHARDED_TABLES for table in find_tables(clause, include_crud=True))
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that routes statements to shards and the replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is not None:
+            return bind
+        shard = self.info.get('shard', 0)
+        if shard and _sharded(mapper, clause):
+            return self._db.engines[shard_bind(shard)]
+        if has_request_context() and g.get('read_replica'):
+            reason = self._primary_reason(clause)
+            replica = self._db.engines.get(REPLICA_BIND)
+            if reason is None and replica is not None:
+                routed_total('replica', 'read')
+                return replica
+            if reason is not None:
+                routed_total('primary', reason)
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+    def _primary_reason(self, clause):
+        """Why this statement must run on the primary, or None"""
+        if self._flushing or self.info.get('wrote'):
+            return 'wrote'
+        if not isinstance(clause, Select):
+            return 'not_select'
+        if clause._for_update_arg is not None:
+            return 'for_update'
+        return None
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _wrote(session, flush_context):
+    # The rest of the request must see what it just wrote
+    session.info['wrote'] = True
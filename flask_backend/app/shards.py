@@ -0,0 +1,147 @@
+"""
+Game shards
+With SHARD_URLS set, games are spread over several databases so that they
+don't all wait on one writer. Shard 0 is the main database: it also holds
+users, stats and the leaderboard. Shards 1..N-1 are the 'shardK' binds.
+Every shard has the game-scoped tables (game, player, game_player,
+game_archive), and a game and its players always live on the same shard.
+
+Ids name their shard. Each shard hands out
+SHARD_ID_BASE + n * N + shard, where n comes from its game_id_allocator
+table, so ids never collide across shards and any id is routed without
+a lookup. Ids up to SHARD_ID_BASE were allocated before sharding and stay
+on shard 0. The number of shards can't change once sharded ids exist.
+The app refuses to start when shard 0 holds ids above SHARD_ID_BASE that
+the router did not hand out: SHARD_ID_BASE was set too low, and those
+games would be routed to another shard.
+
+The session sends the game-scoped tables to the shard pinned on it:
+- requests with a game_id in the URL pin that game's shard
+- jobs pin the shard of their game
+- fan_out() and pinned() cover code that needs several shards
+A transaction spanning shards commits on each database in turn, which is
+not atomic, so commit before moving to another shard.
+Schema: `flask shards upgrade` runs the migrations on every shard.
+"""
+import random
+from collections import defaultdict
+from contextlib import contextmanager
+
+from flask import request
+from sqlalchemy import delete, func, insert, inspect, or_, select
+
+from app.db import db
+from app.model import Game, GameArchive, GameIdAllocator, Player
+
+
+class ShardRouter:
+    """Maps game ids to shards and pins the session to one of them"""
+
+    def __init__(self):
+        self.count = 1
+        self.id_base = 0
+
+    def init_app(self, app):
+        self.count = 1 + len(app.config['SHARD_URLS'])
+        self.id_base = app.config['SHARD_ID_BASE']
+        app.extensions['shards'] = self
+        if self.enabled:
+            app.before_request(self._pin_request)
+            with app.app_context():
+                self.check_id_base()
+
+    @property
+    def enabled(self):
+        return self.count > 1
+
+    def shards(self):
+        return range(self.count)
+
+    def shard_for(self, game_id):
+        """Shard a game (or player) id lives on"""
+        if game_id <= self.id_base:
+            return 0
+        return (game_id - self.id_base) % self.count
+
+    def group(self, game_ids):
+        """{shard: [ids]} for a collection of ids"""
+        groups = defaultdict(list)
+        for game_id in game_ids:
+            groups[self.shard_for(game_id)].append(game_id)
+        return groups
+
+    def pick(self):
+        """Shard for a new game"""
+        return random.randrange(self.count)
+
+    def current(self):
+        return db.session.info.get('shard', 0)
+
+    def pin(self, shard):
+        db.session.info['shard'] = shard
+
+    def pin_game(self, game_id):
+        self.pin(self.shard_for(game_id))
+
+    @contextmanager
+    def pinned(self, shard):
+        previous = self.current()
+        self.pin(shard)
+        try:
+            yield
+        finally:
+            self.pin(previous)
+
+    def fan_out(self, query):
+        """
+        Runs `query()` on every shard and concatenates the lists it returns.
+        Anything lazy-loaded from the results must be read inside `query`.
+        """
+        results = []
+        for shard in self.shards():
+            with self.pinned(shard):
+                results.extend(query())
+        return results
+
+    def allocate_id(self):
+        """
+        New game/player id on the pinned shard, in the current transaction.
+        None when sharding is off: the table's own autoincrement is used.
+        """
+        if not self.enabled:
+            return None
+        row_id = db.session.execute(insert(GameIdAllocator)).inserted_primary_key[0]
+        db.session.execute(delete(GameIdAllocator).where(GameIdAllocator.id < row_id))
+        return self.id_base + row_id * self.count + self.current()
+
+    def check_id_base(self):
+        """
+        Raises RuntimeError if shard 0 has a game or player id above
+        SHARD_ID_BASE that allocate_id() did not return. Skipped until
+        the main database is migrated.
+        """
+        with db.engine.connect() as connection:
+            if not inspect(connection).has_table(GameIdAllocator.__tablename__):
+                return
+            issued = connection.scalar(select(func.max(GameIdAllocator.id))) or 0
+            # Ids shard 0 hands out: id_base + n * count for n up to `issued`
+            ceiling = self.id_base + issued * self.count
+            for model in (Game, GameArchive, Player):
+                stray = connection.scalar(
+                    select(func.max(model.id))
+                    .where(model.id > self.id_base)
+                    .where(or_(model.id > ceiling, (model.id - self.id_base) % self.count != 0))
+                )
+                if stray is not None:
+                    raise RuntimeError(
+                        f"{model.__tablename__} id {stray} in the main database is above "
+                        f"SHARD_ID_BASE={self.id_base} but was not allocated for shard 0: "
+                        f"set SHARD_ID_BASE to at least the highest game/player id")
+
+    def _pin_request(self):
+        game_id = (request.view_args or {}).get('game_id')
+        if game_id is not None:
+            self.pin_game(game_id)
+
+
+router = ShardRouter()
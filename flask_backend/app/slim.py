@@ -0,0 +1,61 @@
+"""
+Slim game states
+Opt-in response format (?format=slim or X-State-Format: slim) for clients
+that keep the static part of a game themselves: the board from GET /board
+and each player's name, colour and seat from a full state. A slim state
+- lists only the spaces that are owned or built on, as [position, owner, houses]
+- keeps only the changing fields of each player (money, position, jail...)
+- keeps every other top-level key, and adds boardVersion, the GET /board
+  version the positions refer to
+A response that depends on the header says so with Vary: X-State-Format,
+so shared caches keep the two formats apart.
+"""
+from flask import after_this_request, request
+
+from app.game.board import VERSION
+
+# Player fields that don't change during a game, or follow from the board
+STATIC_PLAYER_KEYS = frozenset(('name', 'color', 'is_computer', 'properties'))
+GAME_COLUMNS = ('id', 'status', 'owner_id', 'created_at', 'updated_at')
+
+
+def wants_slim():
+    if request.args.get('format') == 'slim':
+        return True
+    # Once per request: game lists ask for every game
+    if not request.environ.get('slim.vary'):
+        request.environ['slim.vary'] = True
+        after_this_request(_vary_on_format)
+    return request.headers.get('X-State-Format') == 'slim'
+
+
+def _vary_on_format(response):
+    response.vary.add('X-State-Format')
+    return response
+
+
+def slim_state(state):
+    slim = {key: value for key, value in state.items() if key not in ('board', 'players')}
+    slim['board'] = [
+        [pos, slot['owner'], slot['houses']]
+        for pos, slot in enumerate(state.get('board') or ())
+        if slot and (slot['owner'] is not None or slot['houses'])
+    ]
+    slim['players'] = [
+        {key: value for key, value in player.items() if key not in STATIC_PLAYER_KEYS}
+        for player in state.get('players', ())
+    ]
+    slim['boardVersion'] = VERSION
+    return slim
+
+
+def state_payload(state):
+    """The state in the format the client asked for"""
+    return slim_state(state) if wants_slim() else state
+
+
+def game_payload(game):
+    """A Game (or GameArchive) in the format the client asked for"""
+    if not wants_slim():
+        return game.to_dict()
+    return dict(game.to_dict(only=GAME_COLUMNS), state=slim_state(game.state))
@@ -0,0 +1,220 @@
+"""
+User stats and leaderboard
+The owner of a game plays its human seats. Their totals are updated as
+turns end in a bankruptcy or a win, so stats and ranks never need a scan
+over games. LeaderboardBucket counts users per number of wins, which is
+all a rank lookup needs.
+"""
+from collections import defaultdict
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.db import db
+from app.history import seal
+from app.invalidation import VersionedCache, bus, invalidate
+from app.model import (
+    Game, GameArchive, GamePlayer, LeaderboardBucket, Player, User, UserStats,
+)
+from app.shards import router
+
+COUNTERS = ('games_played', 'wins', 'losses', 'bankruptcies')
+# Longest leaderboard served; shorter ones are a prefix of it
+TOP_SIZE = 100
+
+# The leaderboard is read far more often than results come in
+_top_cache = VersionedCache(max_size=1)
+
+
+def _move_bucket(old_wins, new_wins):
+    invalidate(db.session, 'leaderboard')
+    if old_wins is not None:
+        db.session.execute(
+            update(LeaderboardBucket).where(LeaderboardBucket.wins == old_wins)
+            .values(users=LeaderboardBucket.users - 1))
+    if _add_to_bucket(new_wins):
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(LeaderboardBucket(wins=new_wins, users=1))
+    except IntegrityError:
+        # Created by a concurrent request: count the user in it
+        _add_to_bucket(new_wins)
+
+
+def _add_to_bucket(wins):
+    """Counts one more user in an existing bucket; False if there is no such bucket"""
+    return bool(db.session.execute(
+        update(LeaderboardBucket).where(LeaderboardBucket.wins == wins)
+        .values(users=LeaderboardBucket.users + 1)).rowcount)
+
+
+def _user_stats(user_id):
+    """The user's stats row, locked for update, created (with 0 wins) if missing"""
+    stats = db.session.query(UserStats).filter_by(user_id=user_id).with_for_update().first()
+    if stats:
+        return stats
+    try:
+        with db.session.begin_nested():
+            stats = UserStats(user_id=user_id, **dict.fromkeys(COUNTERS, 0))
+            db.session.add(stats)
+    except IntegrityError:
+        # Created by a concurrent request, which also counted it in the 0-wins bucket
+        return db.session.query(UserStats).filter_by(user_id=user_id).with_for_update().one()
+    # Outside the savepoint: a race on the bucket row must not look like one on the stats row
+    _move_bucket(None, 0)
+    return stats
+
+
+def add_to_stats(user_id, **deltas):
+    """Adds to a user's counters and keeps the leaderboard buckets in step; caller commits"""
+    stats = _user_stats(user_id)
+    old_wins = stats.wins
+    for name, amount in deltas.items():
+        setattr(stats, name, getattr(stats, name) + amount)
+    if stats.wins != old_wins:
+        _move_bucket(old_wins, stats.wins)
+
+
+def record_turn(game, player, actions):
+    """
+    Call after play_turn: counts a human seat going bankrupt, and once
+    the game has a winner marks it finished and records the result
+    """
+    state = game.state
+    if actions.get('bankrupt') and not player.get('is_computer'):
+        add_to_stats(game.owner_id, bankruptcies=1)
+        # Undoing the turn would leave the bankruptcy counted
+        seal(game)
+
+    if not state.get('winner') or game.status == 'finished':
+        return
+    game.status = 'finished'
+    humans = {p.id for p in game.players if not p.is_computer}
+    # All-computer games have no one to credit
+    if humans:
+        won = state['winner'] in humans
+        add_to_stats(game.owner_id, games_played=1, wins=int(won), losses=int(not won))
+
+
+def top(limit):
+    """The `limit` (at most TOP_SIZE) users with the most wins, with their ranks"""
+    board = _top_cache.get('leaderboard')
+    if board is None:
+        # Read before loading, so a result recorded meanwhile makes the entry stale
+        version = bus.version('leaderboard')
+        board = _load_top(TOP_SIZE)
+        _top_cache.put('leaderboard', board, version)
+    return board[:limit]
+
+
+def _load_top(limit):
+    rows = db.session.execute(
+        select(UserStats, User.username)
+        .join(User, User.id == UserStats.user_id)
+        .order_by(UserStats.wins.desc(), UserStats.user_id.desc())
+        .limit(limit)
+    ).all()
+
+    board = []
+    for position, (stats, username) in enumerate(rows, start=1):
+        # Ties share the rank of the first user with that many wins
+        rank = board[-1]['rank'] if board and board[-1]['wins'] == stats.wins else position
+        board.append(_entry(stats, username, rank))
+    return board
+
+
+def rank_of(user_id):
+    """A user's stats and rank (1 + users with more wins), or None without stats"""
+    row = db.session.execute(
+        select(UserStats, User.username)
+        .join(User, User.id == UserStats.user_id)
+        .where(UserStats.user_id == user_id)
+    ).first()
+    if row is None:
+        return None
+    stats, username = row
+    above = db.session.scalar(
+        select(func.coalesce(func.sum(LeaderboardBucket.users), 0))
+        .where(LeaderboardBucket.wins > stats.wins))
+    return _entry(stats, username, above + 1)
+
+
+def _entry(stats, username, rank):
+    return {
+        'rank': rank,
+        'user_id': stats.user_id,
+        'username': username,
+        **{name: getattr(stats, name) for name in COUNTERS},
+    }
+
+
+def _tally(totals, owner_id, state, humans):
+    """Adds one game's results for its owner; `humans` are the ids of its human seats"""
+    if not humans:
+        return
+    survivors = {p['id'] for p in state.get('players', [])}
+    # Bankrupt players are removed from the state
+    totals[owner_id]['bankruptcies'] += len(humans - survivors)
+    winner = state.get('winner')
+    if winner:
+        totals[owner_id]['games_played'] += 1
+        totals[owner_id]['wins' if winner in humans else 'losses'] += 1
+
+
+def _tally_shard(totals, chunk_size):
+    """Adds the games (hot and archived) of the pinned shard; yields the size of each chunk"""
+    games = db.session.execute(
+        select(Game.id, Game.owner_id, Game.state).execution_options(yield_per=chunk_size))
+    for chunk in games.partitions():
+        humans = defaultdict(set)
+        for game_id, player_id in db.session.execute(
+            select(GamePlayer.game_id, Player.id)
+            .join(Player, Player.id == GamePlayer.player_id)
+            .where(GamePlayer.game_id.in_([row.id for row in chunk]), Player.is_computer.is_(False))
+        ):
+            humans[game_id].add(player_id)
+        for row in chunk:
+            _tally(totals, row.owner_id, row.state, humans[row.id])
+        yield len(chunk)
+
+    archived = db.session.execute(
+        select(GameArchive.owner_id, GameArchive.state, GameArchive.players)
+        .execution_options(yield_per=chunk_size))
+    for chunk in archived.partitions():
+        for row in chunk:
+            humans = {p['id'] for p in row.players if not p.get('is_computer')}
+            _tally(totals, row.owner_id, row.state, humans)
+        yield len(chunk)
+
+
+def rebuild(chunk_size=500):
+    """
+    Recomputes all stats from the games (hot and archived) of every shard,
+    streaming them in chunks. Yields the number of games read so far after
+    each chunk. Results that are recorded while it runs are overwritten at
+    the end.
+    """
+    totals = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    seen = 0
+    for shard in router.shards():
+        with router.pinned(shard):
+            for count in _tally_shard(totals, chunk_size):
+                seen += count
+                yield seen
+
+    buckets = defaultdict(int)
+    for counters in totals.values():
+        buckets[counters['wins']] += 1
+
+    previous = db.session.scalars(select(UserStats.user_id)).all()
+    invalidate(db.session, 'leaderboard',
+               *(f'user:{user_id}' for user_id in {*previous, *totals}))
+    db.session.execute(delete(UserStats))
+    db.session.execute(delete(LeaderboardBucket))
+    if totals:
+        db.session.execute(insert(UserStats), [
+            {'user_id': user_id, **counters} for user_id, counters in totals.items()])
+        db.session.execute(insert(LeaderboardBucket), [
+            {'wins': wins, 'users': users} for wins, users in buckets.items()])
+    db.session.commit()
@@ -0,0 +1,71 @@
+"""
+Orphan sweeper
+Removes game_player links whose game is gone and players that no game
+links to any more, in bounded batches (one transaction per batch) so it can
+run next to live traffic. Each shard is swept in turn.
+"""
+from sqlalchemy import delete, exists, func, select
+
+from app.db import db
+from app.model import Game, GamePlayer, Player
+from app.shards import router
+
+
+def _orphan_link_games():
+    """game_player.game_id values that point at a deleted game"""
+    return select(GamePlayer.game_id).where(~exists().where(Game.id == GamePlayer.game_id))
+
+
+def _orphan_players():
+    """Players not linked to any existing game"""
+    return select(Player.id).where(~exists().where(
+        GamePlayer.player_id == Player.id, Game.id == GamePlayer.game_id))
+
+
+def count_orphans():
+    counts = {'links': 0, 'players': 0}
+    for shard in router.shards():
+        with router.pinned(shard):
+            counts['links'] += db.session.scalar(
+                select(func.count()).select_from(GamePlayer)
+                .where(~exists().where(Game.id == GamePlayer.game_id)))
+            counts['players'] += db.session.scalar(
+                select(func.count()).select_from(_orphan_players().subquery()))
+    return counts
+
+
+def sweep_batch(batch_size):
+    """
+    Deletes up to batch_size orphaned links, then up to batch_size
+    orphaned players. Returns: {'links': n, 'players': n, 'more': bool},
+    'more' meaning a batch limit was hit and there may be more to sweep
+    """
+    game_ids = db.session.scalars(_orphan_link_games().distinct().limit(batch_size)).all()
+    links = 0
+    if game_ids:
+        links = db.session.execute(
+            delete(GamePlayer).where(GamePlayer.game_id.in_(game_ids))).rowcount
+
+    player_ids = db.session.scalars(_orphan_players().order_by(Player.id).limit(batch_size)).all()
+    players = 0
+    if player_ids:
+        players = db.session.execute(delete(Player).where(Player.id.in_(player_ids))).rowcount
+
+    db.session.commit()
+    more = len(game_ids) == batch_size or len(player_ids) == batch_size
+    return {'links': links, 'players': players, 'more': more}
+
+
+def sweep(batch_size, max_batches=None):
+    """Runs sweep_batch on each shard until nothing is left; yields running totals after each batch"""
+    totals = {'batches': 0, 'links': 0, 'players': 0}
+    for shard in router.shards():
+        with router.pinned(shard):
+            while max_batches is None or totals['batches'] < max_batches:
+                counts = sweep_batch(batch_size)
+                totals['batches'] += 1
+                totals['links'] += counts['links']
+                totals['players'] += counts['players']
+                yield dict(totals)
+                if not counts['more']:
+                    break
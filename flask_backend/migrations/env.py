@@ -16,6 +16,10 @@ logger = logging.getLogger('alembic.env')
 
 
 def get_engine():
+    # `-x shard=N` (see `flask shards upgrade`) migrates game shard N instead
+    shard = context.get_x_argument(as_dictionary=True).get('shard', '0')
+    if shard != '0':
+        return current_app.extensions['migrate'].db.engines[f'shard{shard}']
     try:
         # this works with Flask-SQLAlchemy<3 and Alchemical
         return current_app.extensions['migrate'].db.get_engine()
@@ -97,6 +101,11 @@ def run_migrations_online():
     connectable = get_engine()
 
     with connectable.connect() as connection:
+        if connection.dialect.name == 'sqlite':
+            # Batch migrations drop and recreate tables: with foreign keys on,
+            # dropping `game` would cascade into game_player
+            connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+            connection.commit()
         context.configure(
             connection=connection,
             target_metadata=get_metadata(),
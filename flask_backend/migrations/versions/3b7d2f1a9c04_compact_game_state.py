@@ -0,0 +1,211 @@
+"""compact binary game state
+
+Revision ID: 3b7d2f1a9c04
+Revises: c9fad41fa455
+Create Date: 2026-10-19 10:12:31.118204
+
+"""
+import json
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7d2f1a9c04'
+down_revision = 'c9fad41fa455'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+# Format 1 of app/model/types.py as this revision wrote it, frozen here so
+# later changes to the live codec or the board can't change what it does
+FORMAT_V1 = 1
+COMPRESS_LEVEL = 6
+PURCHASABLE_TYPES = ('property', 'railroad', 'utility')
+# (name, type, price) per board position, as the board was at this revision
+SPACES = (
+    ('Go', 'go', None),
+    ('Mediterranean Avenue', 'property', 60),
+    ('Community Chest', 'community_chest', None),
+    ('Baltic Avenue', 'property', 60),
+    ('Income Tax', 'tax', None),
+    ('Reading Railroad', 'railroad', 200),
+    ('Oriental Avenue', 'property', 100),
+    ('Chance', 'chance', None),
+    ('Vermont Avenue', 'property', 100),
+    ('Connecticut Avenue', 'property', 120),
+    ('Jail', 'jail', None),
+    ('St. Charles Place', 'property', 140),
+    ('Electric Company', 'utility', 150),
+    ('States Avenue', 'property', 140),
+    ('Virginia Avenue', 'property', 160),
+    ('Pennsylvania Railroad', 'railroad', 200),
+    ('St. James Place', 'property', 180),
+    ('Community Chest', 'community_chest', None),
+    ('Tennessee Avenue', 'property', 180),
+    ('New York Avenue', 'property', 200),
+    ('Free Parking', 'free_parking', None),
+    ('Kentucky Avenue', 'property', 220),
+    ('Chance', 'chance', None),
+    ('Indiana Avenue', 'property', 220),
+    ('Illinois Avenue', 'property', 240),
+    ('B&O Railroad', 'railroad', 200),
+    ('Atlantic Avenue', 'property', 260),
+    ('Ventnor Avenue', 'property', 260),
+    ('Water Works', 'utility', 150),
+    ('Marvin Gardens', 'property', 280),
+    ('Go to Jail', 'go_to_jail', None),
+    ('Pacific Avenue', 'property', 300),
+    ('North Carolina Avenue', 'property', 300),
+    ('Community Chest', 'community_chest', None),
+    ('Pennsylvania Avenue', 'property', 320),
+    ('Short Line', 'railroad', 200),
+    ('Chance', 'chance', None),
+    ('Park Place', 'property', 350),
+    ('Luxury Tax', 'tax', None),
+    ('Boardwalk', 'property', 400),
+)
+
+
+def _board_template():
+    """Board entries exactly as create_game wrote them, in board order"""
+    template = {}
+    for position, (name, kind, price) in enumerate(SPACES):
+        if kind in PURCHASABLE_TYPES:
+            template[name] = {'position': position, 'price': price, 'type': kind}
+        else:
+            template[name] = {'position': position, 'type': kind}
+    return template
+
+
+BOARD_TEMPLATE = _board_template()
+TEMPLATE_NAMES = tuple(BOARD_TEMPLATE)
+TEMPLATE_INDEX = {name: index for index, name in enumerate(TEMPLATE_NAMES)}
+PURCHASABLE_KEYS = {'position', 'price', 'type', 'owner', 'houses'}
+
+
+def _pack_board(board):
+    """{'s': one slot per template entry (0 absent, 1 plain, [owner, houses]), 'x': the rest}"""
+    slots = [0] * len(TEMPLATE_NAMES)
+    extra = {}
+    for index, name in enumerate(TEMPLATE_NAMES):
+        entry = board.get(name)
+        if entry is None:
+            continue
+        static = BOARD_TEMPLATE[name]
+        if static['type'] in PURCHASABLE_TYPES:
+            if entry.keys() == PURCHASABLE_KEYS and all(entry[k] == v for k, v in static.items()):
+                slots[index] = [entry['owner'], entry['houses']]
+                continue
+        elif entry == static:
+            slots[index] = 1
+            continue
+        extra[name] = entry
+    for name, entry in board.items():
+        if name not in BOARD_TEMPLATE:
+            extra[name] = entry
+    return {'s': slots, 'x': extra}
+
+
+def _unpack_board(packed):
+    board = {}
+    for name, slot in zip(TEMPLATE_NAMES, packed['s']):
+        if not slot:
+            continue
+        static = BOARD_TEMPLATE[name]
+        if static['type'] in PURCHASABLE_TYPES:
+            board[name] = {'position': static['position'], 'price': static['price'],
+                           'owner': slot[0], 'houses': slot[1], 'type': static['type']}
+        else:
+            board[name] = dict(static)
+    board.update(packed['x'])
+    return board
+
+
+def encode_state(state):
+    """Game state dict -> format 1 bytes"""
+    body = dict(state)
+    if isinstance(state.get('board'), dict):
+        body['board'] = _pack_board(state['board'])
+    if isinstance(state.get('players'), list):
+        body['players'] = [
+            dict(player, properties=[TEMPLATE_INDEX.get(name, name) for name in player['properties']])
+            if isinstance(player.get('properties'), list) else player
+            for player in state['players']
+        ]
+    text = json.dumps(body, separators=(',', ':'), ensure_ascii=False)
+    return bytes((FORMAT_V1,)) + zlib.compress(text.encode('utf-8'), COMPRESS_LEVEL)
+
+
+def decode_state(data):
+    """Format 1 bytes or plain JSON -> game state dict"""
+    if isinstance(data, dict):
+        return data
+    if isinstance(data, str):
+        return json.loads(data)
+    data = bytes(data)
+    if data[:1] == b'{':
+        return json.loads(data)
+    if data[0] != FORMAT_V1:
+        raise ValueError(f"Unknown game state format {data[0]}")
+
+    state = json.loads(zlib.decompress(data[1:]))
+    if isinstance(state.get('board'), dict):
+        state['board'] = _unpack_board(state['board'])
+    for player in state.get('players') or ():
+        if isinstance(player.get('properties'), list):
+            player['properties'] = [TEMPLATE_NAMES[n] if type(n) is int else n
+                                    for n in player['properties']]
+    return state
+
+
+def _convert(source, source_type, target, target_type, convert):
+    """Copies game.<source> into game.<target> in batches of BATCH_SIZE rows"""
+    connection = op.get_bind()
+    game = sa.table('game', sa.column('id', sa.Integer), sa.column(source, source_type),
+                    sa.column(target, target_type))
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(game.c.id, game.c[source])
+            .where(game.c.id > last_id)
+            .order_by(game.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        connection.execute(
+            game.update().where(game.c.id == sa.bindparam('row_id')),
+            [{'row_id': row_id, target: convert(value)} for row_id, value in rows],
+        )
+        last_id = rows[-1][0]
+
+
+def upgrade():
+    with op.batch_alter_table('game') as batch_op:
+        batch_op.add_column(sa.Column('state_packed', sa.LargeBinary(), nullable=True))
+
+    _convert('state', sa.JSON, 'state_packed', sa.LargeBinary,
+             lambda value: encode_state(decode_state(value)))
+
+    with op.batch_alter_table('game') as batch_op:
+        batch_op.drop_column('state')
+        batch_op.alter_column('state_packed', new_column_name='state',
+                              existing_type=sa.LargeBinary(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('game') as batch_op:
+        batch_op.add_column(sa.Column('state_json', sa.Text(), nullable=True))
+
+    _convert('state', sa.LargeBinary, 'state_json', sa.Text,
+             lambda value: json.dumps(decode_state(value)))
+
+    with op.batch_alter_table('game') as batch_op:
+        batch_op.drop_column('state')
+        batch_op.alter_column('state_json', new_column_name='state',
+                              existing_type=sa.Text(), type_=sa.JSON(), nullable=False,
+                              postgresql_using='state_json::json')
@@ -0,0 +1,49 @@
+"""cascade deletes from game and player to game_player
+
+Revision ID: 5c2a9e7f13d8
+Revises: 8e41c0d5a7b2
+Create Date: 2026-10-19 12:37:05.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c2a9e7f13d8'
+down_revision = '8e41c0d5a7b2'
+branch_labels = None
+depends_on = None
+
+
+def _game_player(ondelete):
+    """game_player as it should look, for SQLite's copy-and-rename table rebuild"""
+    return sa.Table('game_player', sa.MetaData(),
+        sa.Column('game_id', sa.Integer(), nullable=False),
+        sa.Column('player_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['game_id'], ['game.id'], ondelete=ondelete),
+        sa.ForeignKeyConstraint(['player_id'], ['player.id'], ondelete=ondelete),
+        sa.PrimaryKeyConstraint('game_id', 'player_id'),
+    )
+
+
+def _set_ondelete(ondelete):
+    if op.get_bind().dialect.name == 'sqlite':
+        with op.batch_alter_table('game_player', recreate='always', copy_from=_game_player(ondelete)):
+            pass
+        return
+
+    # Names Postgres gave the unnamed constraints of the first migration
+    for column, target in (('game_id', 'game'), ('player_id', 'player')):
+        name = f'game_player_{column}_fkey'
+        op.drop_constraint(name, 'game_player', type_='foreignkey')
+        op.create_foreign_key(name, 'game_player', target, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    _set_ondelete('CASCADE')
+
+
+def downgrade():
+    _set_ondelete(None)
@@ -0,0 +1,62 @@
+"""never reuse game and player ids
+
+Revision ID: 7a1f4c9e2b86
+Revises: e5c81a2d7f40
+Create Date: 2026-10-20 09:14:27.605318
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a1f4c9e2b86'
+down_revision = 'e5c81a2d7f40'
+branch_labels = None
+depends_on = None
+
+TABLES = ('game', 'player')
+
+
+def _archived_highest(connection):
+    """Highest game and player ids held by game_archive"""
+    games = players = 0
+    for game_id, rows in connection.execute(sa.text('SELECT id, players FROM game_archive')):
+        games = max(games, game_id)
+        if isinstance(rows, str):
+            rows = json.loads(rows)
+        players = max([players] + [row['id'] for row in rows or ()])
+    return {'game': games, 'player': players}
+
+
+def upgrade():
+    # Postgres sequences never go back; SQLite reuses the highest rowid
+    # unless the table is AUTOINCREMENT
+    connection = op.get_bind()
+    if connection.dialect.name != 'sqlite':
+        return
+
+    for table in TABLES:
+        with op.batch_alter_table(table, recreate='always',
+                                  table_kwargs={'sqlite_autoincrement': True}):
+            pass
+
+    # Start past every id in use, archived ones included
+    archived = _archived_highest(connection)
+    for table in TABLES:
+        highest = max(connection.execute(sa.text(f'SELECT COALESCE(MAX(id), 0) FROM {table}')).scalar(),
+                      archived[table])
+        connection.execute(sa.text('DELETE FROM sqlite_sequence WHERE name = :name'), {'name': table})
+        connection.execute(sa.text('INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)'),
+                           {'name': table, 'seq': highest})
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table in TABLES:
+        with op.batch_alter_table(table, recreate='always',
+                                  table_kwargs={'sqlite_autoincrement': False}):
+            pass
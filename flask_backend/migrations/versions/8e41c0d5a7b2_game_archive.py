@@ -0,0 +1,41 @@
+"""game archive table
+
+Revision ID: 8e41c0d5a7b2
+Revises: 3b7d2f1a9c04
+Create Date: 2026-10-19 11:04:52.380911
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e41c0d5a7b2'
+down_revision = '3b7d2f1a9c04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('game_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('state', sa.LargeBinary(), nullable=False),
+    sa.Column('players', sa.JSON(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('reason', sa.String(length=20), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['owner_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('game_archive', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_game_archive_owner_id'), ['owner_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('game_archive', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_game_archive_owner_id'))
+
+    op.drop_table('game_archive')
@@ -0,0 +1,28 @@
+"""game id allocator for sharded games
+
+Revision ID: b82e6c4f9d13
+Revises: f3a9c27d1e65
+Create Date: 2026-10-19 17:02:31.418266
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b82e6c4f9d13'
+down_revision = 'f3a9c27d1e65'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('game_id_allocator',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+
+
+def downgrade():
+    op.drop_table('game_id_allocator')
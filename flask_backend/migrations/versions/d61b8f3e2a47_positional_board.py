@@ -0,0 +1,261 @@
+"""positional board in game state
+
+Revision ID: d61b8f3e2a47
+Revises: a4d7e2b9c510
+Create Date: 2026-10-19 15:40:08.552013
+
+"""
+import json
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd61b8f3e2a47'
+down_revision = 'a4d7e2b9c510'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+TABLES = ('game', 'game_archive')
+
+# The board and the state formats as they were at this revision, frozen here
+# so later changes to app.game.board or app.model.types can't change what it
+# writes. Format 1: name-keyed board packed against a template; format 2:
+# positional board, slots as 0 or [owner, houses], property names as positions
+FORMAT_V1 = 1
+FORMAT_V2 = 2
+COMPRESS_LEVEL = 6
+PURCHASABLE_TYPES = ('property', 'railroad', 'utility')
+# (name, type, price) per board position
+SPACES = (
+    ('Go', 'go', None),
+    ('Mediterranean Avenue', 'property', 60),
+    ('Community Chest', 'community_chest', None),
+    ('Baltic Avenue', 'property', 60),
+    ('Income Tax', 'tax', None),
+    ('Reading Railroad', 'railroad', 200),
+    ('Oriental Avenue', 'property', 100),
+    ('Chance', 'chance', None),
+    ('Vermont Avenue', 'property', 100),
+    ('Connecticut Avenue', 'property', 120),
+    ('Jail', 'jail', None),
+    ('St. Charles Place', 'property', 140),
+    ('Electric Company', 'utility', 150),
+    ('States Avenue', 'property', 140),
+    ('Virginia Avenue', 'property', 160),
+    ('Pennsylvania Railroad', 'railroad', 200),
+    ('St. James Place', 'property', 180),
+    ('Community Chest', 'community_chest', None),
+    ('Tennessee Avenue', 'property', 180),
+    ('New York Avenue', 'property', 200),
+    ('Free Parking', 'free_parking', None),
+    ('Kentucky Avenue', 'property', 220),
+    ('Chance', 'chance', None),
+    ('Indiana Avenue', 'property', 220),
+    ('Illinois Avenue', 'property', 240),
+    ('B&O Railroad', 'railroad', 200),
+    ('Atlantic Avenue', 'property', 260),
+    ('Ventnor Avenue', 'property', 260),
+    ('Water Works', 'utility', 150),
+    ('Marvin Gardens', 'property', 280),
+    ('Go to Jail', 'go_to_jail', None),
+    ('Pacific Avenue', 'property', 300),
+    ('North Carolina Avenue', 'property', 300),
+    ('Community Chest', 'community_chest', None),
+    ('Pennsylvania Avenue', 'property', 320),
+    ('Short Line', 'railroad', 200),
+    ('Chance', 'chance', None),
+    ('Park Place', 'property', 350),
+    ('Luxury Tax', 'tax', None),
+    ('Boardwalk', 'property', 400),
+)
+
+NAMES = tuple(name for name, _, _ in SPACES)
+PURCHASABLE = tuple(kind in PURCHASABLE_TYPES for _, kind, _ in SPACES)
+# Spellings used by the old routes.py board and the frontend
+ALIASES = {
+    "B. & O. Railroad": 25,
+    "Community Chest 1": 2, "Community Chest 2": 17, "Community Chest 3": 33,
+    "Chance 1": 7, "Chance 2": 22, "Chance 3": 36,
+}
+
+
+def _positions():
+    index = {}
+    for pos, name in enumerate(NAMES):
+        # Chance and Community Chest appear three times: the name means the first
+        index.setdefault(name, pos)
+        if name.endswith(" Avenue"):
+            index.setdefault(name.replace(" Avenue", " Ave"), pos)
+    index.update(ALIASES)
+    return index
+
+
+POSITIONS = _positions()
+
+
+def _board_template():
+    """Format 1 template: board entries as create_game wrote them, in board order"""
+    template = {}
+    for position, (name, kind, price) in enumerate(SPACES):
+        if kind in PURCHASABLE_TYPES:
+            template[name] = {'position': position, 'price': price, 'type': kind}
+        else:
+            template[name] = {'position': position, 'type': kind}
+    return template
+
+
+BOARD_TEMPLATE = _board_template()
+TEMPLATE_NAMES = tuple(BOARD_TEMPLATE)
+
+
+def _unpack_board_v1(packed):
+    board = {}
+    for name, slot in zip(TEMPLATE_NAMES, packed['s']):
+        if not slot:
+            continue
+        static = BOARD_TEMPLATE[name]
+        if static['type'] in PURCHASABLE_TYPES:
+            board[name] = {'position': static['position'], 'price': static['price'],
+                           'owner': slot[0], 'houses': slot[1], 'type': static['type']}
+        else:
+            board[name] = dict(static)
+    board.update(packed['x'])
+    return board
+
+
+def _unpack_board_v2(packed):
+    return [
+        None if slot == 0 else {'owner': slot[0], 'houses': slot[1]} if type(slot) is list else slot
+        for slot in packed
+    ]
+
+
+def _pack_board_v2(board):
+    packed = []
+    for slot in board:
+        if slot is None:
+            packed.append(0)
+        elif slot.keys() == {'owner', 'houses'}:
+            packed.append([slot['owner'], slot['houses']])
+        else:
+            packed.append(slot)
+    return packed
+
+
+def decode_state(data):
+    """Plain JSON, format 1 or format 2 bytes -> game state dict"""
+    if isinstance(data, dict):
+        return data
+    if isinstance(data, str):
+        return json.loads(data)
+    data = bytes(data)
+    if data[:1] == b'{':
+        return json.loads(data)
+    if data[0] not in (FORMAT_V1, FORMAT_V2):
+        raise ValueError(f"Unknown game state format {data[0]}")
+
+    state = json.loads(zlib.decompress(data[1:]))
+    board = state.get('board')
+    if data[0] == FORMAT_V1:
+        if isinstance(board, dict):
+            state['board'] = _unpack_board_v1(board)
+        names = TEMPLATE_NAMES
+    else:
+        if isinstance(board, list):
+            state['board'] = _unpack_board_v2(board)
+        names = NAMES
+    for player in state.get('players') or ():
+        if isinstance(player.get('properties'), list):
+            player['properties'] = [names[n] if type(n) is int else n for n in player['properties']]
+    return state
+
+
+def encode_state(state):
+    """Game state dict -> format 2 bytes"""
+    body = dict(state)
+    if isinstance(state.get('board'), list):
+        body['board'] = _pack_board_v2(state['board'])
+    if isinstance(state.get('players'), list):
+        body['players'] = [
+            dict(player, properties=[POSITIONS.get(name, name) for name in player['properties']])
+            if isinstance(player.get('properties'), list) else player
+            for player in state['players']
+        ]
+    text = json.dumps(body, separators=(',', ':'), ensure_ascii=False)
+    return bytes((FORMAT_V2,)) + zlib.compress(text.encode('utf-8'), COMPRESS_LEVEL)
+
+
+def to_slots(board):
+    """Name-keyed board -> slots (None for spaces that can't be owned)"""
+    if not isinstance(board, dict):
+        return board
+    slots = [{'owner': None, 'houses': 0} if purchasable else None for purchasable in PURCHASABLE]
+    for name, entry in board.items():
+        pos = entry.get('position', POSITIONS.get(name))
+        if pos is None or not PURCHASABLE[pos]:
+            continue
+        slots[pos] = {'owner': entry.get('owner'), 'houses': entry.get('houses', 0)}
+    return slots
+
+
+def to_named(board):
+    """Slots back to the name-keyed board, exactly as games used to store it"""
+    named = {}
+    for pos, (name, kind, price) in enumerate(SPACES):
+        if PURCHASABLE[pos]:
+            slot = board[pos]
+            named[name] = {'position': pos, 'price': price, 'owner': slot['owner'],
+                           'houses': slot['houses'], 'type': kind}
+        else:
+            named[name] = {'position': pos, 'type': kind}
+    return named
+
+
+def _rewrite(table_name, convert):
+    """Rewrites <table>.state in batches of BATCH_SIZE rows"""
+    connection = op.get_bind()
+    table = sa.table(table_name, sa.column('id', sa.Integer), sa.column('state', sa.LargeBinary))
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(table.c.id, table.c.state)
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        connection.execute(
+            table.update().where(table.c.id == sa.bindparam('row_id')),
+            [{'row_id': row_id, 'state': convert(value)} for row_id, value in rows],
+        )
+        last_id = rows[-1][0]
+
+
+def _to_positional(value):
+    state = decode_state(value)
+    if 'board' in state:
+        state['board'] = to_slots(state['board'])
+    return encode_state(state)
+
+
+def _to_named(value):
+    # Plain JSON: the format 1 reader before this revision accepts it
+    state = decode_state(value)
+    if isinstance(state.get('board'), list):
+        state['board'] = to_named(state['board'])
+    return json.dumps(state, separators=(',', ':')).encode('utf-8')
+
+
+def upgrade():
+    for table_name in TABLES:
+        _rewrite(table_name, _to_positional)
+
+
+def downgrade():
+    for table_name in TABLES:
+        _rewrite(table_name, _to_named)
@@ -0,0 +1,26 @@
+"""index on game.owner_id
+
+Revision ID: e5c81a2d7f40
+Revises: b82e6c4f9d13
+Create Date: 2026-10-19 17:48:12.730154
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5c81a2d7f40'
+down_revision = 'b82e6c4f9d13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('game', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_game_owner_id'), ['owner_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('game', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_game_owner_id'))
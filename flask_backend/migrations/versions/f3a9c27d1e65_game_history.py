@@ -0,0 +1,26 @@
+"""undo/redo history column on game
+
+Revision ID: f3a9c27d1e65
+Revises: d61b8f3e2a47
+Create Date: 2026-10-19 16:21:44.093871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a9c27d1e65'
+down_revision = 'd61b8f3e2a47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('game', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('history', sa.LargeBinary(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('game', schema=None) as batch_op:
+        batch_op.drop_column('history')
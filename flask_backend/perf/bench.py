@@ -0,0 +1,274 @@
+"""
+Micro-benchmarks for game_logic and MonopolyAI
+Synthetic states and fixed seeds, so runs are comparable across commits.
+
+    python -m perf.bench run                      # print results
+    python -m perf.bench run --save perf/baseline.json
+    python -m perf.bench compare perf/baseline.json --threshold 0.25
+
+`compare` re-runs the suite and exits non-zero if any benchmark got slower
+than the baseline by more than the threshold, after scaling the baseline by
+how much slower a fixed calibration workload runs now.
+Benchmarks are measured in interleaved rounds to keep machine noise even.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import timeit
+
+from app.game.ai_player import MonopolyAI
+from app.game.board import NAMES, PURCHASABLE_POSITIONS, SIZE, TYPES, new_board, position_of
+from app.game.game_logic import (
+    calculate_rent, can_build_house, check_winner, handle_jail, handle_landing,
+)
+from app.model.types import decode_state, encode_state
+
+SEED = 1234
+RICH = 10 ** 9  # enough money that no benchmark ever goes bankrupt
+
+
+def make_state(num_players=2, owned_by=None, houses=0):
+    """
+    Synthetic game state: `owned_by` (player index) owns every purchasable
+    space, or nothing is owned when None
+    """
+    players = [
+        {'id': i + 1, 'name': f"Player {i + 1}", 'money': RICH, 'position': 0,
+         'properties': [], 'in_jail': False, 'jail_turns': 0, 'is_computer': True}
+        for i in range(num_players)
+    ]
+    board = new_board()
+    for position in PURCHASABLE_POSITIONS:
+        owner = players[owned_by]['id'] if owned_by is not None else None
+        board[position] = {'owner': owner, 'houses': houses}
+        if owner:
+            players[owned_by]['properties'].append(NAMES[position])
+    return {'currentPlayer': 0, 'turn': 1, 'players': players, 'board': board}
+
+
+def landing_benchmarks():
+    """handle_landing once per space type, plus the unowned and rent-paying property paths"""
+    cases = {}
+    seen = set()
+    for position in range(SIZE):
+        if TYPES[position] in seen:
+            continue
+        seen.add(TYPES[position])
+        cases[f"handle_landing[{TYPES[position]}]"] = position
+
+    benches = {}
+    for name, position in cases.items():
+        state = make_state(owned_by=1)
+        player = state['players'][0]
+
+        def bench(player=player, position=position, state=state):
+            player['in_jail'] = False
+            handle_landing(player, position, state)
+        benches[name] = bench
+
+    unowned = make_state()
+    benches['handle_landing[property, unowned]'] = (
+        lambda: handle_landing(unowned['players'][0], 39, unowned))
+    return benches
+
+
+def rent_benchmarks():
+    benches = {}
+    state = make_state()
+    for houses in range(6):
+        property_data = {'owner': 2, 'houses': houses}
+        benches[f"calculate_rent[{houses} houses]"] = (
+            lambda p=property_data: calculate_rent(39, p, state))
+    return benches
+
+
+def jail_benchmarks():
+    state = make_state()
+    player = state['players'][0]
+
+    def free():
+        handle_jail(player, (2, 5))
+
+    def doubles():
+        player['in_jail'] = True
+        player['jail_turns'] = 0
+        handle_jail(player, (3, 3))
+
+    def stays():
+        player['in_jail'] = True
+        player['jail_turns'] = 0
+        handle_jail(player, (2, 5))
+
+    return {
+        'handle_jail[not in jail]': free,
+        'handle_jail[rolls doubles]': doubles,
+        'handle_jail[stays]': stays,
+    }
+
+
+def winner_benchmarks():
+    benches = {}
+    for count in range(2, 9):
+        state = make_state(num_players=count)
+        benches[f"check_winner[{count} players]"] = lambda s=state: check_winner(s)
+    return benches
+
+
+def build_benchmarks():
+    state = make_state(owned_by=0)
+    player = state['players'][0]
+    return {'can_build_house': lambda: can_build_house(player, 'Boardwalk', state)}
+
+
+def ai_benchmarks():
+    benches = {}
+    for label, owned_by in (('sparse', None), ('full', 0)):
+        state = make_state(num_players=4, owned_by=owned_by)
+        if owned_by is None:
+            # Sparse: a couple of properties owned by the AI
+            for name in ('Boardwalk', 'Park Place'):
+                state['board'][position_of(name)]['owner'] = 1
+        player = dict(state['players'][0], money=1500)
+        board = state['board']
+        prop = board[position_of('Boardwalk')]
+
+        benches[f"MonopolyAI.should_buy_property[{label}]"] = (
+            lambda p=player: MonopolyAI.should_buy_property(p, 400))
+        benches[f"MonopolyAI.should_build[{label}]"] = (
+            lambda p=player, d=prop, b=board: MonopolyAI.should_build(p, d, b))
+        benches[f"MonopolyAI.choose_property_to_build[{label}]"] = (
+            lambda p=player, b=board: MonopolyAI.choose_property_to_build(p, b))
+    return benches
+
+
+def state_codec_benchmarks():
+    """Game.state column: CompactState against the plain JSON it replaced"""
+    state = make_state(num_players=4, owned_by=1, houses=2)
+    text = json.dumps(state)
+    packed = encode_state(state)
+    return {
+        'state[json encode]': lambda: json.dumps(state),
+        'state[json decode]': lambda: json.loads(text),
+        'state[compact encode]': lambda: encode_state(state),
+        'state[compact decode]': lambda: decode_state(packed),
+    }
+
+
+def all_benchmarks():
+    benches = {}
+    for group in (landing_benchmarks, rent_benchmarks, jail_benchmarks,
+                  winner_benchmarks, build_benchmarks, ai_benchmarks, state_codec_benchmarks):
+        benches.update(group())
+    return benches
+
+
+def _calibrate_number(timer, min_time):
+    """How many calls make one timed batch of about `min_time` seconds"""
+    number = 1
+    while (taken := timer.timeit(number)) < 0.01:
+        number *= 2
+    return max(int(number * min_time / taken), 1)
+
+
+def measure_all(benches, rounds=7, min_time=0.05):
+    """
+    Best time per call in nanoseconds for each benchmark. Rounds are
+    interleaved (every benchmark once per round) so that a slow patch on
+    the machine affects all benchmarks alike instead of a few of them.
+    """
+    timers = {name: timeit.Timer(fn) for name, fn in benches.items()}
+    numbers = {name: _calibrate_number(timer, min_time) for name, timer in timers.items()}
+    best = dict.fromkeys(benches, float('inf'))
+    for _ in range(rounds):
+        for name, timer in timers.items():
+            random.seed(SEED)
+            per_call = timer.timeit(numbers[name]) / numbers[name] * 1e9
+            best[name] = min(best[name], per_call)
+    return best
+
+
+def calibration_workload():
+    """
+    Fixed pure-Python workload measured with the suite. Baselines store it so
+    compare can scale them when the whole machine is slower or faster.
+    """
+    return sum(i * i for i in range(200))
+
+
+def run_suite(only=None):
+    benches = {name: fn for name, fn in all_benchmarks().items() if not only or only in name}
+    benches['_calibration'] = calibration_workload
+    results = measure_all(benches)
+    calibration = results.pop('_calibration')
+    return results, calibration
+
+
+def print_results(results):
+    for name, ns in results.items():
+        print(f"{name:48} {ns:10.0f} ns")
+
+
+def run(args):
+    results, calibration = run_suite(args.only)
+    print_results(results)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'calibration_ns': calibration,
+                'results_ns': results,
+            }, f, indent=2)
+        print(f"\nBaseline written to {args.save}")
+    return 0
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        saved = json.load(f)
+    baseline = saved['results_ns']
+    results, calibration = run_suite(args.only)
+    speed = calibration / saved['calibration_ns']
+    print(f"machine speed factor vs baseline: {speed:.2f}\n")
+
+    regressed = []
+    for name, ns in results.items():
+        old = baseline.get(name)
+        if old is None:
+            print(f"{name:48} {ns:10.0f} ns   (no baseline)")
+            continue
+        change = (ns - old * speed) / (old * speed)
+        flag = ''
+        if change > args.threshold:
+            flag = '  REGRESSION'
+            regressed.append(name)
+        print(f"{name:48} {old:10.0f} -> {ns:10.0f} ns ({change:+.0%}){flag}")
+
+    if regressed:
+        print(f"\n{len(regressed)} benchmark(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="run the suite")
+    run_parser.add_argument('--save', help="write the results to this baseline file")
+    run_parser.add_argument('--only', help="only run benchmarks whose name contains this")
+
+    compare_parser = commands.add_parser('compare', help="run the suite and compare to a baseline")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('--threshold', type=float, default=0.25,
+                                help="allowed relative slowdown (default 0.25)")
+    compare_parser.add_argument('--only', help="only run benchmarks whose name contains this")
+
+    args = parser.parse_args(argv)
+    return run(args) if args.command == 'run' else compare(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
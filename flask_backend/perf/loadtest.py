@@ -0,0 +1,268 @@
+"""
+HTTP load test
+Boots create_app() against a throwaway SQLite database (or --database-url),
+serves it on a local port and drives it with concurrent virtual clients that
+play like the frontend does: create a game, then move / buy / build / ai-move
+/ reload in a loop. Writes a JSON report with throughput and latency
+percentiles per endpoint that can be compared across commits.
+
+    python -m perf.loadtest run --clients 20 --duration 30 --out report.json
+    python -m perf.loadtest compare base.json report.json --threshold 0.10
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(int(len(sorted_values) * p / 100), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class Recorder:
+    """Latencies and error counts per endpoint, shared by all clients"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def record(self, endpoint, seconds, ok):
+        with self.lock:
+            self.latencies[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def report(self, elapsed):
+        endpoints = {}
+        total = errors = 0
+        for endpoint, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            total += len(values)
+            errors += self.errors[endpoint]
+            endpoints[endpoint] = {
+                'count': len(values),
+                'errors': self.errors[endpoint],
+                'rps': len(values) / elapsed,
+                'mean_ms': 1000 * sum(values) / len(values),
+                'p50_ms': 1000 * percentile(values, 50),
+                'p90_ms': 1000 * percentile(values, 90),
+                'p99_ms': 1000 * percentile(values, 99),
+                'max_ms': 1000 * values[-1],
+            }
+        return {
+            'requests': total,
+            'errors': errors,
+            'throughput_rps': total / elapsed,
+            'endpoints': endpoints,
+        }
+
+
+class VirtualClient(threading.Thread):
+    """One player session: register, log in, create a game and keep playing it"""
+
+    def __init__(self, base_url, recorder, deadline, seed):
+        super().__init__(daemon=True)
+        import requests
+        self.http = requests.Session()
+        self.base_url = base_url
+        self.recorder = recorder
+        self.deadline = deadline
+        self.rng = random.Random(seed)
+
+    def call(self, endpoint, method, path, expected=(200, 201), **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.http.request(method, self.base_url + path, timeout=30, **kwargs)
+            ok = response.status_code in expected
+        except Exception:
+            response, ok = None, False
+        self.recorder.record(endpoint, time.perf_counter() - start, ok)
+        if response is None or not ok:
+            return None
+        return response.json()
+
+    def run(self):
+        email = f"load-{uuid.uuid4().hex[:12]}@example.com"
+        credentials = {'username': email.split('@')[0], 'email': email, 'password': 'load-test'}
+        self.call('POST /user/register', 'POST', '/user/register', json=credentials)
+        login = self.call('POST /user/login', 'POST', '/user/login', json=credentials)
+        if not login:
+            return
+        self.http.headers['Authorization'] = f"Bearer {login['token']}"
+
+        while time.time() < self.deadline:
+            created = self.call('POST /game/create', 'POST', '/game/create',
+                                json={'numHumanPlayers': 1, 'numComputerPlayers': 1})
+            if not created:
+                return
+            self.play(created['game_id'], created['game']['state'])
+
+    def play(self, game_id, state):
+        # A finished game sends the client back to create a new one
+        while time.time() < self.deadline and not state.get('winner') and len(state['players']) > 1:
+            player = state['players'][state['currentPlayer'] % len(state['players'])]
+            dice = [self.rng.randint(1, 6), self.rng.randint(1, 6)]
+            moved = self.call('POST /game/<id>/move', 'POST', f'/game/{game_id}/move',
+                              json={'player_id': player['id'], 'dice': dice})
+            if not moved:
+                return
+            state = moved['state']
+            offer = moved.get('actions', {}).get('can_buy')
+
+            if player.get('is_computer'):
+                if offer:
+                    self.call('POST /game/<id>/ai-move', 'POST', f'/game/{game_id}/ai-move',
+                              json={'player_id': player['id'], 'action': 'buy',
+                                    'property': offer['property']})
+                self.call('POST /game/<id>/ai-move', 'POST', f'/game/{game_id}/ai-move',
+                          json={'player_id': player['id'], 'action': 'build'})
+            else:
+                if offer and self.rng.random() < 0.7:
+                    self.call('POST /game/<id>/buy', 'POST', f'/game/{game_id}/buy',
+                              json={'player_id': player['id'], 'property': offer['property']})
+                owned = player.get('properties') or []
+                if owned and self.rng.random() < 0.2:
+                    # 400 is a legitimate answer (e.g. not enough money)
+                    self.call('POST /game/<id>/build', 'POST', f'/game/{game_id}/build',
+                              expected=(200, 400),
+                              json={'player_id': player['id'], 'property': self.rng.choice(owned)})
+
+            # The frontend reloads the game after AI actions
+            loaded = self.call('GET /game/<id>', 'GET', f'/game/{game_id}')
+            if loaded:
+                state = loaded['state']
+            if self.rng.random() < 0.05:
+                self.call('GET /game/my-games', 'GET', '/game/my-games')
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix='monopoly-load-')
+    os.environ['DATABASE_URL'] = args.database_url or f"sqlite:///{workdir}/load.db?timeout=30"
+    os.environ['JOB_QUEUE_PATH'] = os.path.join(workdir, 'jobs.sqlite3')
+    # Clients play as fast as they can, which admission control would throttle
+    if not args.admission:
+        os.environ['ADMISSION_ENABLED'] = 'false'
+
+    from werkzeug.serving import make_server
+    from app import create_app
+    from app.db import db
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+
+    # Per-request access logs would drown the report
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    recorder = Recorder()
+    started = time.time()
+    deadline = started + args.duration
+    clients = [VirtualClient(base_url, recorder, deadline, args.seed + i) for i in range(args.clients)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.time() - started
+    server.shutdown()
+
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'clients': args.clients,
+            'duration_s': elapsed,
+            'seed': args.seed,
+            'database': 'sqlite' if not args.database_url else args.database_url.split(':')[0],
+            'python': platform.python_version(),
+            'started_at': started,
+        },
+        **recorder.report(elapsed),
+    }
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    print(f"\nReport written to {args.out}")
+    return 0
+
+
+def print_report(report):
+    print(f"{report['requests']} requests, {report['errors']} errors, "
+          f"{report['throughput_rps']:.1f} req/s")
+    print(f"{'endpoint':32} {'count':>7} {'rps':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for name, row in report['endpoints'].items():
+        print(f"{name:32} {row['count']:>7} {row['rps']:>8.1f} {row['p50_ms']:>8.1f} "
+              f"{row['p99_ms']:>8.1f} {row['errors']:>7}")
+
+
+def compare(args):
+    """Prints p50/p99 changes per endpoint; fails if a p99 grew beyond the threshold"""
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    print(f"throughput: {base['throughput_rps']:.1f} -> {new['throughput_rps']:.1f} req/s")
+    regressed = []
+    for name, row in new['endpoints'].items():
+        old = base['endpoints'].get(name)
+        if not old:
+            print(f"{name:32} (new endpoint)")
+            continue
+        change = (row['p99_ms'] - old['p99_ms']) / old['p99_ms'] if old['p99_ms'] else 0.0
+        flag = ''
+        if change > args.threshold:
+            flag = '  REGRESSION'
+            regressed.append(name)
+        print(f"{name:32} p50 {old['p50_ms']:7.1f} -> {row['p50_ms']:7.1f}   "
+              f"p99 {old['p99_ms']:7.1f} -> {row['p99_ms']:7.1f} ({change:+.0%}){flag}")
+    return 1 if regressed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="run a load test")
+    run_parser.add_argument('--clients', type=int, default=10)
+    run_parser.add_argument('--duration', type=float, default=30, help="seconds")
+    run_parser.add_argument('--seed', type=int, default=1)
+    run_parser.add_argument('--database-url', help="use this database instead of a temporary SQLite file")
+    run_parser.add_argument('--out', default='loadtest-report.json')
+    run_parser.add_argument('--admission', action='store_true', help="keep admission control enabled")
+
+    compare_parser = commands.add_parser('compare', help="compare two reports")
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help="allowed relative p99 increase (default 0.10)")
+
+    args = parser.parse_args(argv)
+    return run(args) if args.command == 'run' else compare(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
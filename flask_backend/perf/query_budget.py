@@ -0,0 +1,217 @@
+"""
+SQL query budgets and plans
+Boots create_app() against a throwaway SQLite database (or --database-url)
+and sends each endpoint through the test client, counting the SQL
+statements it runs. Each endpoint has a declared budget.
+
+Every endpoint runs twice: as a user with few games and as one with
+many. A count that grows with the data is an N+1 (say to_dict()
+lazy-loading each game's players) and fails even when it is under
+budget. The SELECTs of the key lookups are run through EXPLAIN; a plan
+that reads a whole watched table fails.
+
+    python -m perf.query_budget                # exit status 1 on any failure
+    python -m perf.query_budget --show-sql --only my_games
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+from collections import namedtuple
+
+from sqlalchemy import event
+
+# Games (hot and archived each) of the two users every endpoint runs as
+FEW, MANY = 2, 10
+
+# budget: most statements allowed; plans: tables its SELECTs must not scan
+Case = namedtuple('Case', 'name method path budget body expect plans',
+                  defaults=(None, (200,), ()))
+
+CASES = (
+    Case('get_user', 'GET', lambda f: '/user/get_user', 1, plans=('user',)),
+    Case('board', 'GET', lambda f: '/board', 0),
+    Case('get_game', 'GET', lambda f: f'/game/{f.game_id}', 3, plans=('game', 'player')),
+    Case('my_games', 'GET', lambda f: '/game/my-games', 4,
+         plans=('user', 'game', 'player', 'game_archive')),
+    Case('my_games_slim', 'GET', lambda f: '/game/my-games?format=slim', 3,
+         plans=('user', 'game', 'game_archive')),
+    Case('create_game', 'POST', lambda f: '/game/create', 8,
+         body=lambda f: {'numHumanPlayers': 1, 'numComputerPlayers': 1}, expect=(201,)),
+    Case('move', 'POST', lambda f: f'/game/{f.game_id}/move', 4,
+         body=lambda f: {'player_id': f.human_id, 'dice': [1, 2]}, plans=('game',)),
+    Case('buy', 'POST', lambda f: f'/game/{f.game_id}/buy', 4,
+         body=lambda f: {'player_id': f.human_id, 'property': 'Baltic Avenue'}, plans=('game',)),
+    Case('build', 'POST', lambda f: f'/game/{f.game_id}/build', 4,
+         body=lambda f: {'player_id': f.human_id, 'property': 'Baltic Avenue'}, expect=(200, 400)),
+    Case('undo', 'POST', lambda f: f'/game/{f.game_id}/undo', 5,
+         plans=('user', 'game')),
+    Case('update_game', 'PUT', lambda f: f'/game/{f.game_id}/state', 6,
+         body=lambda f: {'state': f.state}),
+    Case('ai_move', 'POST', lambda f: f'/game/{f.game_id}/ai-move', 4,
+         body=lambda f: {'player_id': f.computer_id, 'action': 'build'}),
+    Case('decide_batch', 'POST', lambda f: '/ai/decide-batch', 2,
+         body=lambda f: {'decisions': [
+             {'game_id': game_id, 'player_id': computer_id, 'action': 'buy', 'property': 'Boardwalk'}
+             for game_id, computer_id in f.computers]},
+         plans=('game',)),
+    Case('leaderboard', 'GET', lambda f: '/leaderboard', 1),
+    Case('leaderboard_me', 'GET', lambda f: '/leaderboard/me', 2, expect=(200, 404),
+         plans=('user',)),
+)
+
+
+class Fixture:
+    """A user with `size` hot and `size` archived games, and the ids the cases need"""
+
+    def __init__(self, client, email, size):
+        from flask_jwt_extended import create_access_token
+        from app.archive import archive_game
+        from app.db import db
+        from app.model import Game, User
+        from sqlalchemy.orm.attributes import flag_modified
+
+        db.session.add(User(username=email.split('@')[0], email=email, password='x'))
+        db.session.commit()
+        self.headers = {'Authorization': f"Bearer {create_access_token(identity=email)}"}
+        self.client = client
+
+        game_ids = [self.request('POST', '/game/create', {'numHumanPlayers': 1, 'numComputerPlayers': 1})
+                    .get_json()['game_id'] for _ in range(2 * size)]
+        for game_id in game_ids[size:]:
+            archive_game(db.session.get(Game, game_id), 'idle')
+        db.session.commit()
+
+        hot = [db.session.get(Game, game_id) for game_id in game_ids[:size]]
+        # Computer players can only buy where they stand (decide_batch buys Boardwalk)
+        for game in hot:
+            game.state['players'][1]['position'] = 39
+            flag_modified(game, 'state')
+        db.session.commit()
+        self.game_id = hot[0].id
+        self.state = hot[0].state
+        self.human_id = self.state['players'][0]['id']
+        self.computer_id = self.state['players'][1]['id']
+        self.computers = [(game.id, game.state['players'][1]['id']) for game in hot]
+        db.session.remove()
+
+    def request(self, method, path, body=None):
+        return self.client.open(path, method=method, json=body, headers=self.headers)
+
+
+class Recorder:
+    """Statements run on any engine while `active`"""
+
+    def __init__(self, engines):
+        self.active = False
+        self.statements = []
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if self.active:
+            self.statements.append((conn.engine, statement, parameters, executemany))
+
+    def run(self, fn):
+        self.statements = []
+        self.active = True
+        try:
+            return fn()
+        finally:
+            self.active = False
+
+
+def _table(name):
+    return name.strip('"`[]').lower()
+
+
+def full_scans(engine, statement, parameters, tables):
+    """Watched tables the plan of a SELECT reads in full"""
+    with engine.connect() as connection:
+        if engine.dialect.name == 'sqlite':
+            rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)
+            scanned = {_table(m.group(1)) for row in rows
+                       for m in [re.match(r'SCAN (\S+)', row[-1])] if m}
+        else:
+            # Tiny tables would always be scanned: ask whether an index could be used
+            connection.exec_driver_sql('SET enable_seqscan = off')
+            rows = connection.exec_driver_sql('EXPLAIN ' + statement, parameters)
+            scanned = {_table(m.group(1)) for row in rows
+                       for m in [re.search(r'Seq Scan on (\S+)', row[0])] if m}
+    return sorted(scanned & set(tables))
+
+
+def check_case(case, fixtures, recorder, show_sql):
+    """Runs a case as every fixture; returns (counts, problems)"""
+    counts, problems = [], []
+    for fixture in fixtures:
+        body = case.body(fixture) if case.body else None
+        response = recorder.run(lambda: fixture.request(case.method, case.path(fixture), body))
+        statements = recorder.statements
+        counts.append(len(statements))
+        if response.status_code not in case.expect:
+            problems.append(f"status {response.status_code}, expected {case.expect}")
+        if show_sql:
+            for _, statement, _, _ in statements:
+                print(f"    {' '.join(statement.split())[:160]}")
+
+        for engine, statement, parameters, executemany in statements:
+            if executemany or not case.plans or not statement.lstrip().upper().startswith('SELECT'):
+                continue
+            for table in full_scans(engine, statement, parameters, case.plans):
+                problems.append(f"full scan of {table}: {' '.join(statement.split())[:120]}")
+
+    if max(counts) > case.budget:
+        problems.append(f"{max(counts)} queries, budget {case.budget}")
+    # Fewer queries the second time is a cache hit, not an N+1
+    if counts[-1] > counts[0]:
+        problems.append(f"query count grows with the data ({FEW} vs {MANY} games: {counts}), likely an N+1")
+    return counts, problems
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix='monopoly-queries-')
+    os.environ['DATABASE_URL'] = args.database_url or f"sqlite:///{workdir}/queries.db"
+    os.environ['JOB_QUEUE_PATH'] = os.path.join(workdir, 'jobs.sqlite3')
+    os.environ['ADMISSION_ENABLED'] = 'false'
+    os.environ['JOB_WORKERS'] = '0'
+
+    from app import create_app
+    from app.db import db
+
+    app = create_app()
+    failed = 0
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+        fixtures = [Fixture(client, 'few@example.com', FEW), Fixture(client, 'many@example.com', MANY)]
+        recorder = Recorder(db.engines.values())
+
+        print(f"{'endpoint':16} {'queries':>9} {'budget':>7}")
+        for case in CASES:
+            if args.only and args.only not in case.name:
+                continue
+            counts, problems = check_case(case, fixtures, recorder, args.show_sql)
+            print(f"{case.name:16} {'/'.join(map(str, counts)):>9} {case.budget:>7}"
+                  f"{'  FAIL' if problems else ''}")
+            for problem in problems:
+                print(f"    {problem}")
+            failed += bool(problems)
+
+    if failed:
+        print(f"\n{failed} endpoint(s) over budget or scanning")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', help="database to run against (default: a throwaway SQLite file)")
+    parser.add_argument('--only', help="only run endpoints whose name contains this")
+    parser.add_argument('--show-sql', action='store_true', help="print the statements of each run")
+    return run(parser.parse_args(argv))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
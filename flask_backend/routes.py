@@ -3,24 +3,13 @@ from flask_jwt_extended import (
     jwt_required, get_jwt_identity, get_jwt, create_access_token, create_refresh_token
 )
 from datetime import datetime
-from flask_backend.app.ai_player import MonopolyAI
-from flask_backend.app.game_logic import BOARD_SPACES, handle_landing, can_build_house, handle_jail, check_winner
+from app.game.ai_player import MonopolyAI
+from app.game.board import NAMES, PRICES, new_board, property_slot
+from app.game.game_logic import handle_landing, can_build_house, handle_jail, check_winner
 
 routes = Blueprint('routes', __name__)
 logged_out_tokens = set()
 
-# ------------------ BOARD MAPPING ------------------
-BOARD_POSITIONS = {
-    0: "Go", 1: "Mediterranean Avenue", 2: "Community Chest 1", 3: "Baltic Avenue", 4: "Income Tax",
-    5: "Reading Railroad", 6: "Oriental Avenue", 7: "Chance 1", 8: "Vermont Avenue", 9: "Connecticut Avenue",
-    10: "Jail", 11: "St. Charles Place", 12: "Electric Company", 13: "States Avenue", 14: "Virginia Avenue",
-    15: "Pennsylvania Railroad", 16: "St. James Place", 17: "Community Chest 2", 18: "Tennessee Avenue",
-    19: "New York Avenue", 20: "Free Parking", 21: "Kentucky Avenue", 22: "Chance 2", 23: "Indiana Avenue",
-    24: "Illinois Avenue", 25: "B. & O. Railroad", 26: "Atlantic Avenue", 27: "Ventnor Avenue", 28: "Water Works",
-    29: "Marvin Gardens", 30: "Go to Jail", 31: "Pacific Avenue", 32: "North Carolina Avenue", 33: "Community Chest 3",
-    34: "Pennsylvania Avenue", 35: "Short Line", 36: "Chance 3", 37: "Park Place", 38: "Luxury Tax", 39: "Boardwalk"
-}
-
 # ------------------ AUTH ------------------
 
 # ------------------ GAMES ------------------
@@ -50,15 +39,6 @@ def create_game():
         db.session.flush()
         players_list.append(player)
 
-    # Properties have prices and can be owned, other spaces are just positions
-    board = {}
-    for pos in range(40):
-        name = BOARD_POSITIONS.get(pos, f"Space {pos}")
-        if "Avenue" in name or "Railroad" in name or name in ["Electric Company", "Water Works", "Boardwalk", "Park Place"]:
-            board[name] = {"price": 60 + pos*10, "owner": None, "houses": 0, "position": pos}
-        else:
-            board[name] = {"position": pos}
-
     # Create computer players if requested
     computer_colors = ['purple', 'orange', 'pink', 'brown']
     
@@ -78,7 +58,7 @@ def create_game():
         'currentPlayer': 0,  # Index of whose turn it is
         'players': [p.to_dict() for p in players_list],  # All player data
         'turn': 1,  # Current turn number
-        'board': board  # All board spaces and their properties
+        'board': new_board()  # Owner and houses of every space that can be bought
     }
 
     # Create and save the game
@@ -245,14 +225,15 @@ def buy_property(game_id):
     if not player:
         return jsonify({'error': 'Player not found'}), 404
     
-    property_data = game.state['board'].get(property_name)
-    if not property_data:
+    position, property_data = property_slot(game.state['board'], property_name)
+    if property_data is None:
         return jsonify({'error': 'Property not found'}), 404
+    property_name = NAMES[position]
     
-    if property_data.get('owner') is not None:
+    if property_data['owner'] is not None:
         return jsonify({'error': 'Property already owned'}), 400
     
-    price = property_data.get('price', 0)
+    price = PRICES[position]
     if player['money'] < price:
         return jsonify({'error': 'Not enough money'}), 400
     
@@ -297,7 +278,8 @@ def build_property(game_id):
     if not can_build:
         return jsonify({'error': reason}), 400
 
-    property_data = game.state['board'][property_name]
+    position, property_data = property_slot(game.state['board'], property_name)
+    property_name = NAMES[position]
     house_cost = 100
     
     # Build the house
@@ -334,11 +316,12 @@ def ai_action(game_id):
     
     if action_type == 'buy':
         property_name = data.get('property')
-        prop = game.state['board'].get(property_name)
-        if prop and MonopolyAI.should_buy_property(player, prop):
+        position, prop = property_slot(game.state['board'], property_name)
+        if prop is not None and MonopolyAI.should_buy_property(player, PRICES[position]):
             # Buy property
-            if player['money'] >= prop['price']:
-                player['money'] -= prop['price']
+            property_name = NAMES[position]
+            if player['money'] >= PRICES[position]:
+                player['money'] -= PRICES[position]
                 prop['owner'] = player_id
                 player['properties'] = player.get('properties', []) + [property_name]
                 result = {'action': 'buy', 'property': property_name}
@@ -348,7 +331,7 @@ def ai_action(game_id):
     elif action_type == 'build':
         property_name = MonopolyAI.choose_property_to_build(player, game.state['board'])
         if property_name:
-            prop = game.state['board'][property_name]
+            _, prop = property_slot(game.state['board'], property_name)
             if MonopolyAI.should_build(player, prop, game.state['board']):
                 build_cost = 100 if prop.get('houses', 0) < 4 else 500
                 if player['money'] >= build_cost:
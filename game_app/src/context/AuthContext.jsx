@@ -31,9 +31,22 @@ export const AuthProvider = ({ children }) => {
     if (token) {
       config.headers.Authorization = `Bearer ${token}`
     }
+    // Lets the backend read our own recent writes from the primary database
+    const lastWrite = sessionStorage.getItem("lastWrite")
+    if (lastWrite) {
+      config.headers["X-Last-Write"] = lastWrite
+    }
     return config
   })
 
+  axios.interceptors.response.use((response) => {
+    const lastWrite = response.headers["x-last-write"]
+    if (lastWrite) {
+      sessionStorage.setItem("lastWrite", lastWrite)
+    }
+    return response
+  })
+
   // Check if user is logged in when app loads
   useEffect(() => {
     const checkAuth = async () => {